@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""Per-request CPU of /predict against /predict/fast.
+
+Two measurements, both reported as CPU microseconds per request:
+
+- codec: request parsing and response encoding only, with the model call
+  left out. /predict's side is what FastAPI does with the schemas in
+  src/api/schemas.py: validate a PredictRequest, validate the returned
+  dict as a PredictResponse, then JSON-encode it.
+- end to end: requests driven straight through the ASGI app on one event
+  loop (middleware, routing, metrics and the model call included), with
+  inference inline so all CPU lands on this thread. No HTTP server or
+  TestClient, whose own overhead would swamp the difference.
+
+    python -m benchmarks.fastpath --requests 5000
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+import numpy as np
+from fastapi.encoders import jsonable_encoder
+
+from src.api import fastpath
+from src.api.schemas import PredictRequest, PredictResponse
+
+FEATURES = {
+    "sepal length (cm)": 5.1,
+    "sepal width (cm)": 3.5,
+    "petal length (cm)": 1.4,
+    "petal width (cm)": 0.2,
+}
+RESULT = {
+    "prediction": "setosa",
+    "confidence": 1.0,
+    "model_version": "1.0.0",
+    "inference_time_ms": 0.412,
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="/predict fast-path benchmark")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--backend", default="compiled", help="MODEL_BACKEND to use")
+    return parser.parse_args()
+
+
+def cpu_us_per_call(fn: Callable[[], object], n: int, repeat: int) -> float:
+    """Median over `repeat` runs of CPU time per call, in microseconds."""
+    runs = []
+    for _ in range(repeat):
+        start = time.process_time()
+        for _ in range(n):
+            fn()
+        runs.append((time.process_time() - start) / n * 1e6)
+    return statistics.median(runs)
+
+
+async def cpu_us_per_request(
+    fn: Callable[[], Awaitable[int]], n: int, repeat: int
+) -> float:
+    """cpu_us_per_call for a coroutine, run back to back on one loop."""
+    runs = []
+    for _ in range(repeat):
+        start = time.process_time()
+        for _ in range(n):
+            await fn()
+        runs.append((time.process_time() - start) / n * 1e6)
+    return statistics.median(runs)
+
+
+async def post(app: Any, path: str, body: bytes, content_type: str) -> int:
+    """POST body to an ASGI app and return the response status."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [
+            (b"content-type", content_type.encode()),
+            (b"content-length", str(len(body)).encode()),
+        ],
+        "client": ("127.0.0.1", 1234),
+        "server": ("127.0.0.1", 8000),
+    }
+    sent = False
+    status = 0
+
+    async def receive() -> dict[str, Any]:
+        nonlocal sent
+        if sent:
+            return {"type": "http.disconnect"}
+        sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message: dict[str, Any]) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+def schema_codec() -> bytes:
+    body = json.dumps({"features": FEATURES}).encode()
+    request = PredictRequest.model_validate_json(body)
+    _ = [request.features[name] for name in FEATURES]
+    response = PredictResponse.model_validate(RESULT)
+    return json.dumps(jsonable_encoder(response)).encode()
+
+
+def fast_codec() -> bytes:
+    body = json.dumps(list(FEATURES.values())).encode()
+    fastpath.parse_rows(body, fastpath.JSON, len(FEATURES))
+    return fastpath.encode([RESULT], single=True)
+
+
+def float32_codec() -> bytes:
+    body = np.array([list(FEATURES.values())], dtype="<f4").tobytes()
+    fastpath.parse_rows(body, fastpath.FLOAT32, len(FEATURES))
+    return fastpath.encode([RESULT], single=False)
+
+
+def report(label: str, baseline: float, us: float) -> None:
+    print(f"  {label:<22} {us:8.1f} us   ({baseline / us:4.1f}x)")
+
+
+def main():
+    args = parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    n, repeat = args.requests, args.repeat
+
+    print(f"codec only, {n} calls x {repeat}")
+    schema = cpu_us_per_call(schema_codec, n, repeat)
+    report("/predict schemas", schema, schema)
+    report("/predict/fast json", schema, cpu_us_per_call(fast_codec, n, repeat))
+    report("/predict/fast float32", schema, cpu_us_per_call(float32_codec, n, repeat))
+
+    # inline inference, so every request's CPU is spent on this thread
+    os.environ["INFERENCE_EXECUTOR"] = "none"
+    os.environ["MODEL_BACKEND"] = args.backend
+    os.environ.pop("MLFLOW_TRACKING_URI", None)
+    from src.api.main import app
+
+    print(f"\nend to end (ASGI, backend={args.backend}), {n} requests x {repeat}")
+    asyncio.run(end_to_end(app, n, repeat))
+
+
+async def end_to_end(app: Any, n: int, repeat: int) -> None:
+    named = json.dumps({"features": FEATURES}).encode()
+    positional = json.dumps(list(FEATURES.values())).encode()
+    raw = np.array([list(FEATURES.values())], dtype="<f4").tobytes()
+    calls = {
+        "/predict schemas": lambda: post(app, "/predict", named, fastpath.JSON),
+        "/predict/fast json": lambda: post(
+            app, "/predict/fast", positional, fastpath.JSON
+        ),
+        "/predict/fast float32": lambda: post(
+            app, "/predict/fast", raw, fastpath.FLOAT32
+        ),
+    }
+
+    async with app.router.lifespan_context(app):
+        for call in calls.values():
+            assert await call() == 200
+        results = {
+            label: await cpu_us_per_request(call, n, repeat)
+            for label, call in calls.items()
+        }
+
+    for label, us in results.items():
+        report(label, results["/predict schemas"], us)
+
+
+if __name__ == "__main__":
+    main()
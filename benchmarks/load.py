@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""Load test for the serving API: throughput and latency percentiles.
+
+Drives src.api.main:app with a closed loop of concurrent clients, one
+level at a time, and reports requests/s plus p50/p95/p99 latency for each
+scenario:
+
+- single: POST /predict, one row
+- batch: POST /predict/batch, --batch-size rows
+- mixed: /predict with a --health-ratio share of GET /health in between
+- model: IrisClassifier.predict called directly, no HTTP (concurrency 1
+  only), to tell a model regression from an API one
+
+--server inprocess sends requests through httpx's ASGI transport, so
+there's no socket. --server uvicorn starts a real server on a local port
+and goes over TCP. The app is configured from the environment as usual
+(MODEL_BACKEND, INFERENCE_EXECUTOR, ...), and those settings are stored
+with the results.
+
+    python -m benchmarks.load --server inprocess --concurrency 1,8,32
+    python -m benchmarks.load --output run.json
+    python -m benchmarks.load --compare benchmarks/baseline.json
+
+--compare exits 1 when any scenario's throughput dropped by more than
+--tolerance, or its p99 rose by more than --p99-tolerance, against the
+baseline. Numbers depend on
+the machine, so only compare against a baseline taken on the same kind
+of host.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from collections.abc import Awaitable, Callable
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+FEATURES = {
+    "sepal length (cm)": 5.1,
+    "sepal width (cm)": 3.5,
+    "petal length (cm)": 1.4,
+    "petal width (cm)": 0.2,
+}
+SCENARIOS = ("single", "batch", "mixed", "model")
+# settings that change the numbers, recorded so runs compare like with like
+SETTINGS = (
+    "MODEL_BACKEND",
+    "INFERENCE_EXECUTOR",
+    "INFERENCE_WORKERS",
+    "PREDICT_MICROBATCH_ENABLED",
+    "PREDICTION_CACHE_SIZE",
+    "METRICS_MODE",
+    "ADMISSION_CONTROL_ENABLED",
+)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Serving API load test")
+    parser.add_argument(
+        "--server", choices=["inprocess", "uvicorn"], default="inprocess"
+    )
+    parser.add_argument(
+        "--scenarios", default=",".join(SCENARIOS), help="comma-separated subset"
+    )
+    parser.add_argument(
+        "--concurrency", default="1,8,32", help="comma-separated client counts"
+    )
+    parser.add_argument("--requests", type=int, default=2000, help="per level")
+    parser.add_argument("--warmup", type=int, default=200, help="per level")
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--health-ratio", type=float, default=0.2)
+    parser.add_argument("--output", type=Path, help="write results as JSON here")
+    parser.add_argument("--compare", type=Path, help="baseline JSON to check against")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="allowed relative drop in throughput",
+    )
+    parser.add_argument(
+        "--p99-tolerance",
+        type=float,
+        default=0.5,
+        help="allowed relative rise in p99, which is noisier than throughput",
+    )
+    return parser.parse_args()
+
+
+Request = Callable[[], Awaitable[None]]
+
+
+def requests_for(
+    client: httpx.AsyncClient, args: argparse.Namespace
+) -> dict[str, Request]:
+    """One coroutine factory per HTTP scenario. Non-2xx responses raise."""
+    single = {"features": FEATURES}
+    batch = {"instances": [FEATURES] * args.batch_size}
+    rng = random.Random(0)
+
+    async def call(method: str, path: str, body: Any = None) -> None:
+        response = await client.request(method, path, json=body)
+        response.raise_for_status()
+
+    async def mixed() -> None:
+        if rng.random() < args.health_ratio:
+            await call("GET", "/health")
+        else:
+            await call("POST", "/predict", single)
+
+    return {
+        "single": lambda: call("POST", "/predict", single),
+        "batch": lambda: call("POST", "/predict/batch", batch),
+        "mixed": mixed,
+    }
+
+
+async def run_level(request: Request, concurrency: int, total: int) -> dict[str, Any]:
+    """Send `total` requests from `concurrency` clients, each one at a time."""
+    latencies: list[float] = []
+    errors = 0
+    remaining = total
+
+    async def client() -> None:
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            try:
+                await request()
+            except httpx.HTTPError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return summarize(latencies, errors, elapsed)
+
+
+def run_model_level(total: int) -> dict[str, Any]:
+    """IrisClassifier.predict back to back, no HTTP or event loop."""
+    from src.models.loader import load_model
+
+    model = load_model()
+    if model is None:
+        raise SystemExit("No model to benchmark, train one first")
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(total):
+        call_start = time.perf_counter()
+        model.predict(FEATURES)
+        latencies.append(time.perf_counter() - call_start)
+    return summarize(latencies, 0, time.perf_counter() - start)
+
+
+def summarize(latencies: list[float], errors: int, elapsed: float) -> dict[str, Any]:
+    ms = [s * 1000 for s in latencies]
+    # inclusive: quantiles within the observed range, even for small runs
+    cuts = (
+        statistics.quantiles(ms, n=100, method="inclusive") if len(ms) > 1 else ms * 99
+    )
+    return {
+        "requests": len(ms) + errors,
+        "errors": errors,
+        "throughput_rps": round(len(ms) / elapsed, 1),
+        "p50_ms": round(cuts[49], 3),
+        "p95_ms": round(cuts[94], 3),
+        "p99_ms": round(cuts[98], 3),
+    }
+
+
+async def run_http(
+    client: httpx.AsyncClient, args: argparse.Namespace, scenarios: list[str]
+) -> list[dict[str, Any]]:
+    requests = requests_for(client, args)
+    results = []
+    for scenario in scenarios:
+        for concurrency in parse_levels(args.concurrency):
+            await run_level(requests[scenario], concurrency, args.warmup)
+            result = await run_level(requests[scenario], concurrency, args.requests)
+            results.append({"scenario": scenario, "concurrency": concurrency, **result})
+            report(results[-1])
+    return results
+
+
+async def run_inprocess(args: argparse.Namespace, scenarios: list[str]) -> list[dict]:
+    from src.api.main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with (
+        app.router.lifespan_context(app),
+        httpx.AsyncClient(transport=transport, base_url="http://bench") as client,
+    ):
+        return await run_http(client, args, scenarios)
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port: int = s.getsockname()[1]
+        return port
+
+
+async def run_uvicorn(args: argparse.Namespace, scenarios: list[str]) -> list[dict]:
+    port = free_port()
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "src.api.main:app",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+            "--no-access-log",
+        ]
+    )
+    limits = httpx.Limits(max_connections=max(parse_levels(args.concurrency)))
+    try:
+        async with httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=30
+        ) as client:
+            await wait_ready(client, server)
+            return await run_http(client, args, scenarios)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+async def wait_ready(client: httpx.AsyncClient, server: subprocess.Popen) -> None:
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise SystemExit("uvicorn exited before it was ready")
+        try:
+            if (await client.get("/ready")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise SystemExit("uvicorn wasn't ready after 60s")
+
+
+def parse_levels(levels: str) -> list[int]:
+    return [int(level) for level in levels.split(",")]
+
+
+def report(result: dict[str, Any]) -> None:
+    print(
+        f"  {result['scenario']:<7} c={result['concurrency']:<4} "
+        f"{result['throughput_rps']:9.1f} req/s   "
+        f"p50 {result['p50_ms']:8.3f} ms   p95 {result['p95_ms']:8.3f} ms   "
+        f"p99 {result['p99_ms']:8.3f} ms   errors {result['errors']}"
+    )
+
+
+def compare(
+    baseline: dict[str, Any],
+    run: dict[str, Any],
+    tolerance: float,
+    p99_tolerance: float,
+) -> list[str]:
+    """Regressions in `run` against `baseline`, as printable lines.
+
+    Exits if the two have nothing comparable, rather than pass with no
+    regressions because nothing was checked.
+    """
+    if baseline["server"] != run["server"]:
+        raise SystemExit(
+            f"Baseline was taken with --server {baseline['server']}, this run "
+            f"used --server {run['server']}; nothing to compare"
+        )
+    if baseline["settings"] != run["settings"]:
+        print(f"warning: baseline settings differ: {baseline['settings']}")
+    before = {(r["scenario"], r["concurrency"]): r for r in baseline["results"]}
+    matched = [
+        (result, before[key])
+        for result in run["results"]
+        if (key := (result["scenario"], result["concurrency"])) in before
+    ]
+    if not matched:
+        raise SystemExit(
+            "No scenario and concurrency in this run is in the baseline; "
+            "nothing to compare"
+        )
+    regressions = []
+    for result, old in matched:
+        label = f"{result['scenario']} c={result['concurrency']}"
+        if result["throughput_rps"] < old["throughput_rps"] * (1 - tolerance):
+            regressions.append(
+                f"{label}: throughput {old['throughput_rps']} -> "
+                f"{result['throughput_rps']} req/s"
+            )
+        if result["p99_ms"] > old["p99_ms"] * (1 + p99_tolerance):
+            regressions.append(f"{label}: p99 {old['p99_ms']} -> {result['p99_ms']} ms")
+        if result["errors"] > old["errors"]:
+            regressions.append(f"{label}: errors {old['errors']} -> {result['errors']}")
+    return regressions
+
+
+def main():
+    args = parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    scenarios = args.scenarios.split(",")
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        raise SystemExit(f"Unknown scenarios: {sorted(unknown)}")
+
+    http = [s for s in scenarios if s != "model"]
+    print(f"{args.server}, {args.requests} requests per level")
+    if args.server == "inprocess":
+        results = asyncio.run(run_inprocess(args, http))
+    else:
+        results = asyncio.run(run_uvicorn(args, http))
+    if "model" in scenarios:
+        results.append(
+            {"scenario": "model", "concurrency": 1, **run_model_level(args.requests)}
+        )
+        report(results[-1])
+
+    run = {
+        "created": datetime.now(UTC).isoformat(timespec="seconds"),
+        "server": args.server,
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "settings": {name: os.environ.get(name) for name in SETTINGS},
+        "batch_size": args.batch_size,
+        "results": results,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(run, indent=2) + "\n")
+        print(f"\nwrote {args.output}")
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())
+        regressions = compare(baseline, run, args.tolerance, args.p99_tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+        print(f"\nno regressions against {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
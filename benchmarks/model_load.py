@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""Compare loading models/model.pkl against loading the same model as a bundle.
+
+Writes a bundle of models/model.pkl to a temporary directory, then times
+IrisClassifier loading the pickle (sklearn and compiled backends) and
+the bundle, and measures the heap each one holds once loaded. A bundle's
+tables are memory-mapped, not allocated, so they're reported separately.
+--n-estimators fits a forest of that size on iris instead, to see how
+load time scales with the model.
+
+    python -m benchmarks.model_load --repeat 50
+    python -m benchmarks.model_load --n-estimators 1000
+"""
+
+import argparse
+import gc
+import pickle
+import statistics
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+
+from sklearn.datasets import load_iris
+from sklearn.ensemble import RandomForestClassifier
+
+from src.models.bundle import save_bundle
+from src.models.iris_classifier import IrisClassifier
+from src.models.tree_engine import CompiledForest
+from training.train_iris import loaded_bytes
+
+MODEL_PATH = Path(__file__).parent.parent / "models" / "model.pkl"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Model load benchmark")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument(
+        "--n-estimators", type=int, help="benchmark a fresh forest of this size"
+    )
+    return parser.parse_args()
+
+
+def time_load(load: Callable[[], IrisClassifier], repeat: int) -> list[float]:
+    load()  # imports and page cache
+    samples = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        load()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def heap_bytes(load: Callable[[], IrisClassifier]) -> int:
+    """Python heap still held by a loaded model."""
+    gc.collect()
+    tracemalloc.start()
+    model = load()
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del model
+    return held
+
+
+def report(label: str, samples: list[float], heap: int) -> None:
+    ms = sorted(s * 1000 for s in samples)
+    print(
+        f"{label:<18} median {statistics.median(ms):8.2f} ms   "
+        f"min {ms[0]:8.2f} ms   heap {heap / 1e6:7.2f} MB"
+    )
+
+
+def fit_pickle(path: Path, n_estimators: int) -> None:
+    """A model.pkl like training's, with a forest of n_estimators trees."""
+    iris = load_iris()
+    model = RandomForestClassifier(n_estimators=n_estimators, random_state=0)
+    model.fit(iris.data, iris.target)
+    info = {
+        "model": model,
+        "feature_names": list(iris.feature_names),
+        "target_names": list(iris.target_names),
+        "version": f"bench-{n_estimators}",
+    }
+    path.write_bytes(pickle.dumps(info))
+
+
+def main():
+    args = parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = MODEL_PATH
+        if args.n_estimators:
+            model_path = Path(tmp) / "model.pkl"
+            fit_pickle(model_path, args.n_estimators)
+        source = IrisClassifier(model_path)
+        forest = CompiledForest.from_sklearn(source.model)
+        bundle = save_bundle(
+            Path(tmp) / "bundle",
+            forest,
+            source.feature_names,
+            source.target_names,
+            str(source.version),
+        )
+        loads = {
+            "pickle (sklearn)": lambda: IrisClassifier(model_path),
+            "pickle (compiled)": lambda: IrisClassifier(model_path, "compiled"),
+            "bundle": lambda: IrisClassifier(bundle),
+        }
+
+        # sklearn allocates its trees' node tables out of tracemalloc's
+        # sight, loaded_bytes() adds them back
+        estimator = loaded_bytes(pickle.dumps(source.model))
+        heaps = {
+            "pickle (sklearn)": estimator,
+            "pickle (compiled)": estimator + forest.nbytes,
+            "bundle": heap_bytes(loads["bundle"]),
+        }
+
+        print(f"{source.model.n_estimators} trees, {args.repeat} loads each")
+        for label, load in loads.items():
+            report(label, time_load(load, args.repeat), heaps[label])
+        print(f"bundle tables      {forest.nbytes / 1e6:8.2f} MB memory-mapped")
+
+
+if __name__ == "__main__":
+    main()
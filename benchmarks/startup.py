@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""Compare a cold start against a warm artifact-cache start.
+
+Registers models/model.pkl in a throwaway sqlite MLflow registry (or uses
+--tracking-uri), then times IrisClassifier.from_mlflow with an empty cache
+directory and with one already holding the version.
+
+    python -m benchmarks.startup --repeat 10
+"""
+
+import argparse
+import logging
+import pickle
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import mlflow
+import mlflow.sklearn
+from mlflow.tracking import MlflowClient
+
+from src.models.iris_classifier import IrisClassifier
+
+MODEL_PATH = Path(__file__).parent.parent / "models" / "model.pkl"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Model startup benchmark")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument(
+        "--tracking-uri", help="benchmark against this registry instead of a local one"
+    )
+    parser.add_argument("--model-name", default="iris-classifier")
+    parser.add_argument("--stage", default="Production")
+    return parser.parse_args()
+
+
+def local_registry(workdir: Path, model_name: str, stage: str) -> str:
+    """Register models/model.pkl in a fresh sqlite registry and promote it."""
+    uri = f"sqlite:///{workdir / 'mlflow.db'}"
+    mlflow.set_tracking_uri(uri)
+    exp = mlflow.create_experiment(
+        "startup-bench", artifact_location=(workdir / "artifacts").as_uri()
+    )
+
+    with open(MODEL_PATH, "rb") as f:
+        data = pickle.load(f)
+
+    with mlflow.start_run(experiment_id=exp):
+        mlflow.set_tag("feature_names", ",".join(data["feature_names"]))
+        mlflow.set_tag("target_names", ",".join(data["target_names"]))
+        mlflow.sklearn.log_model(
+            data["model"],
+            name="model",
+            registered_model_name=model_name,
+            serialization_format="cloudpickle",
+        )
+
+    client = MlflowClient(uri)
+    version = client.get_latest_versions(model_name, stages=["None"])[0].version
+    client.transition_model_version_stage(model_name, version, stage)
+    return uri
+
+
+def time_load(uri: str, name: str, stage: str, cache_dir: Path) -> float:
+    start = time.perf_counter()
+    IrisClassifier.from_mlflow(uri, name, stage, cache_dir=cache_dir)
+    return time.perf_counter() - start
+
+
+def report(label: str, samples: list[float]) -> None:
+    ms = sorted(s * 1000 for s in samples)
+    print(
+        f"{label:<12} median {statistics.median(ms):8.1f} ms   "
+        f"min {ms[0]:8.1f} ms   max {ms[-1]:8.1f} ms"
+    )
+
+
+def main():
+    args = parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        uri = args.tracking_uri or local_registry(workdir, args.model_name, args.stage)
+
+        # one untimed load so imports and the registry connection are warm
+        time_load(uri, args.model_name, args.stage, workdir / "prime")
+
+        cold = [
+            time_load(uri, args.model_name, args.stage, workdir / f"cold-{i}")
+            for i in range(args.repeat)
+        ]
+
+        warm_dir = workdir / "warm"
+        time_load(uri, args.model_name, args.stage, warm_dir)
+        warm = [
+            time_load(uri, args.model_name, args.stage, warm_dir)
+            for _ in range(args.repeat)
+        ]
+
+    print(f"from_mlflow startup, {args.repeat} runs each ({uri.split(':')[0]})")
+    report("cold cache", cold)
+    report("warm cache", warm)
+    print(f"speedup      {statistics.median(cold) / statistics.median(warm):8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""Adaptive admission control in front of the scoring routes.
+
+The inference executor's queue (INFERENCE_MAX_QUEUE) is a fixed bound. How
+much of it a pod can take before latency suffers depends on the model, the
+backend and the CPU it got, so a fixed bound is either too low or lets
+latency grow many times over before anything is refused. With
+ADMISSION_CONTROL_ENABLED=true, AdaptiveLimiter estimates the limit from
+the latency scoring calls actually see instead, and calls over it are
+refused with a 429 before their body is even read. Scoring calls are
+/predict, everything under it, and /models/{name}/{version}/predict.
+
+The limit follows the gradient method (as in Netflix's concurrency-limits):
+
+- every admitted call's latency feeds a short average (the last ~10
+  calls) and a long one (the last ~500), the baseline. While calls are
+  queueing, the baseline moves ten times slower.
+- while the short average stays within ADMISSION_LATENCY_TOLERANCE times
+  the baseline, the limit grows by about its square root per call.
+- past that, it shrinks by the ratio, by up to half per call.
+- the limit only grows while at least half of it is in use, so a quiet
+  pod doesn't drift up to ADMISSION_MAX_LIMIT.
+
+Latency is measured from admission until the response is sent, not from
+IrisClassifier's inference_time_ms alone: that leaves out time spent
+waiting for an executor worker or the event loop, which is where
+overload shows up first.
+
+/predict/stream is admitted like the rest, but its latency isn't
+sampled: a stream takes as long as its body does, so it says nothing
+about queueing.
+
+A call can also send the time it's willing to wait in an
+X-Request-Timeout-Ms header. It's refused straight away if calls are
+currently taking longer than that, rather than answered after the client
+has given up.
+
+Everything runs on the event loop, so the limiter needs no lock.
+"""
+
+import math
+import os
+import re
+import time
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.monitoring import metrics
+
+TIMEOUT_HEADER = b"x-request-timeout-ms"
+
+# every route that scores rows
+SCORING_PATHS = re.compile(r"/predict(/.*)?|/models/[^/]+/[^/]+/predict")
+
+# scoring routes whose duration follows the request body, not the load
+UNTIMED_PATHS = re.compile(r"/predict/stream")
+
+
+class _Ewma:
+    """Exponentially weighted mean over roughly the last `window` values."""
+
+    __slots__ = ("window", "value")
+
+    def __init__(self, window: int):
+        self.window = window
+        self.value: float | None = None
+
+    def add(self, x: float, window: int | None = None) -> float:
+        """Add x, weighted as if averaging over `window` values this once."""
+        if self.value is None:
+            self.value = x
+        else:
+            self.value += 2 / ((window or self.window) + 1) * (x - self.value)
+        return self.value
+
+
+class AdaptiveLimiter:
+    """Concurrency limit that follows observed latency.
+
+    try_acquire() before a call, release() after it with how long it took.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 20,
+        min_limit: int = 2,
+        max_limit: int = 200,
+        tolerance: float = 2.0,
+        smoothing: float = 0.2,
+    ):
+        if not 1 <= min_limit <= initial_limit <= max_limit:
+            raise ValueError(
+                "Need 1 <= min_limit <= initial_limit <= max_limit, got "
+                f"{min_limit}, {initial_limit}, {max_limit}"
+            )
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.tolerance = tolerance
+        self.smoothing = smoothing
+        self.in_flight = 0
+        self._short = _Ewma(10)
+        self._long = _Ewma(500)
+        metrics.ADMISSION_LIMIT.set(int(self.limit))
+
+    @property
+    def latency(self) -> float:
+        """Recent latency of admitted calls, in seconds; 0 before the first."""
+        return self._short.value or 0.0
+
+    def try_acquire(self, timeout: float | None = None) -> str | None:
+        """Admit a call, or say why not: "limit" or "deadline".
+
+        timeout is how many seconds the caller will wait for an answer.
+        """
+        if self.in_flight >= int(self.limit):
+            return "limit"
+        if timeout is not None and self.latency > timeout:
+            return "deadline"
+        self.in_flight += 1
+        return None
+
+    def release(self, latency: float | None) -> None:
+        """Finish an admitted call; latency=None if it failed."""
+        in_flight = self.in_flight
+        self.in_flight -= 1
+        if latency is not None:
+            self._update(latency, in_flight)
+
+    def _update(self, latency: float, in_flight: int) -> None:
+        short = self._short.add(latency)
+        # while calls are queueing the baseline only creeps towards what
+        # they see, or overload would become the new normal within a few
+        # hundred calls; a model that really got slower is still learned,
+        # over a few thousand
+        baseline = self._long.value
+        queueing = baseline is not None and short > self.tolerance * baseline
+        long = self._long.add(latency, 5000 if queueing else None)
+        # once latency drops well below the baseline, e.g. after a faster
+        # model was loaded, catch up faster than the average would
+        if long > 2 * short:
+            long = self._long.value = long * 0.95
+
+        if in_flight < self.limit / 2:
+            return
+        gradient = max(0.5, min(1.0, self.tolerance * long / short)) if short else 1.0
+        target = self.limit * gradient + math.sqrt(self.limit)
+        limit = (1 - self.smoothing) * self.limit + self.smoothing * target
+        limit = max(self.min_limit, min(self.max_limit, limit))
+        if int(limit) != int(self.limit):
+            metrics.ADMISSION_LIMIT.set(int(limit))
+        self.limit = limit
+
+
+def make_limiter() -> AdaptiveLimiter | None:
+    """A limiter from the ADMISSION_* settings, or None if it's disabled."""
+    if os.environ.get("ADMISSION_CONTROL_ENABLED", "false").lower() != "true":
+        return None
+    return AdaptiveLimiter(
+        initial_limit=int(os.environ.get("ADMISSION_INITIAL_LIMIT", "20")),
+        min_limit=int(os.environ.get("ADMISSION_MIN_LIMIT", "2")),
+        max_limit=int(os.environ.get("ADMISSION_MAX_LIMIT", "200")),
+        tolerance=float(os.environ.get("ADMISSION_LATENCY_TOLERANCE", "2.0")),
+    )
+
+
+_active: AdaptiveLimiter | None = None
+
+
+def activate(limiter: AdaptiveLimiter | None) -> None:
+    """Make `limiter` the one AdmissionMiddleware admits calls through."""
+    global _active
+    _active = limiter
+
+
+def _timeout(scope: Scope) -> float | None:
+    """The caller's X-Request-Timeout-Ms, in seconds.
+
+    Raises:
+        ValueError: the header isn't a positive number
+    """
+    for name, value in scope["headers"]:
+        if name == TIMEOUT_HEADER:
+            timeout = float(value) / 1000
+            if not timeout > 0:
+                raise ValueError(value)
+            return timeout
+    return None
+
+
+class AdmissionMiddleware:
+    """Admits calls to `paths` through the active limiter, if there is one.
+
+    A plain ASGI middleware, so a refused call costs no body read, no
+    validation and no executor slot. Other paths, /health and /ready
+    included, go straight through. Calls to `untimed` paths are admitted
+    but their latency doesn't move the limit.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        paths: re.Pattern[str] = SCORING_PATHS,
+        untimed: re.Pattern[str] = UNTIMED_PATHS,
+    ):
+        self.app = app
+        self.paths = paths
+        self.untimed = untimed
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        limiter = _active
+        if (
+            limiter is None
+            or scope["type"] != "http"
+            or not self.paths.fullmatch(scope["path"])
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            timeout = _timeout(scope)
+        except ValueError:
+            response = JSONResponse(
+                {"detail": "X-Request-Timeout-Ms must be a positive number"}, 400
+            )
+            await response(scope, receive, send)
+            return
+
+        refused = limiter.try_acquire(timeout)
+        if refused is not None:
+            metrics.ADMISSION_REJECTED.labels(reason=refused).inc()
+            detail = (
+                "Server at capacity, retry later"
+                if refused == "limit"
+                else "Can't answer within X-Request-Timeout-Ms"
+            )
+            response = JSONResponse(
+                {"detail": detail}, 429, headers={"Retry-After": "1"}
+            )
+            await response(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        latency = None
+        timed = not self.untimed.fullmatch(scope["path"])
+        try:
+            await self.app(scope, receive, send_status)
+            # errors return early and refusals are instant; neither says
+            # anything about how long scoring takes
+            if timed and 200 <= status < 300:
+                latency = time.perf_counter() - start
+        finally:
+            limiter.release(latency)
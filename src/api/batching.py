@@ -0,0 +1,145 @@
+"""Dynamic micro-batching of concurrent /predict calls.
+
+Concurrent requests are held for a short window, stacked into one feature
+matrix and scored with a single predict_batch() call. Each caller then gets
+its own row of the result back. Under load this amortizes the fixed
+per-call overhead of predict_proba across many requests.
+"""
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+BatchFn = Callable[[list[dict[str, Any]]], Awaitable[list[dict[str, Any]]]]
+
+# errors caused by the contents of a row rather than by the model or pool
+ROW_ERRORS = (KeyError, ValueError, TypeError)
+
+# (features, future the caller is awaiting)
+_Item = tuple[dict[str, Any], "asyncio.Future[dict[str, Any]]"]
+
+
+def _fail(items: list[_Item], error: Exception) -> None:
+    for _, future in items:
+        if not future.done():
+            future.set_exception(error)
+
+
+class MicroBatcher:
+    """Collects single-row predictions into batches.
+
+    A batch is flushed as soon as it holds max_batch_size rows, or when
+    max_wait_us has passed since its first row arrived — whichever comes
+    first. So an idle service adds at most max_wait_us to a request, and a
+    busy one fills batches without waiting at all.
+
+    Batches are dispatched without waiting for the previous one to finish,
+    so with an executor behind predict_batch several can run at once.
+    """
+
+    def __init__(
+        self, predict_batch: BatchFn, max_batch_size: int = 32, max_wait_us: int = 2000
+    ):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be >= 1")
+        self.predict_batch = predict_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait_s = max_wait_us / 1_000_000
+        self._queue: asyncio.Queue[_Item] = asyncio.Queue()
+        self._task: asyncio.Task[None] | None = None
+        self._inflight: set[asyncio.Task[None]] = set()
+
+    async def start(self) -> None:
+        """Start the background batching loop."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the loop and fail anything still waiting."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+
+        while not self._queue.empty():
+            _fail([self._queue.get_nowait()], RuntimeError("Batcher stopped"))
+
+    async def submit(self, features: dict[str, Any]) -> dict[str, Any]:
+        """Queue one row and wait for its prediction."""
+        if self._task is None:
+            raise RuntimeError("Batcher not started")
+        future: asyncio.Future[dict[str, Any]] = (
+            asyncio.get_running_loop().create_future()
+        )
+        await self._queue.put((features, future))
+        return await future
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._collect()
+            task = asyncio.create_task(self._dispatch(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _collect(self) -> list[_Item]:
+        """Block for the first row, then gather more until size or deadline."""
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait_s
+
+        try:
+            while len(batch) < self.max_batch_size:
+                # drain whatever is already queued without yielding
+                try:
+                    batch.append(self._queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except TimeoutError:
+                    break
+        except asyncio.CancelledError:
+            # stop() cancelled us mid-batch: these rows are off the queue and
+            # not dispatched, so nothing else would ever answer their callers
+            _fail(batch, RuntimeError("Batcher stopped"))
+            raise
+
+        return batch
+
+    async def _dispatch(self, batch: list[_Item]) -> None:
+        # skip callers that already went away (client disconnect)
+        live = [(row, fut) for row, fut in batch if not fut.done()]
+        if not live:
+            return
+
+        try:
+            results = await self.predict_batch([row for row, _ in live])
+        except Exception as e:
+            if isinstance(e, ROW_ERRORS) and len(live) > 1:
+                # one bad row shouldn't fail everyone else in the batch -
+                # rescore individually so each caller gets its own error
+                logger.debug("Batch of %d failed, rescoring per row", len(live))
+                await asyncio.gather(*(self._dispatch([item]) for item in live))
+            else:
+                for _, fut in live:
+                    if not fut.done():
+                        fut.set_exception(e)
+            return
+
+        for (_, fut), result in zip(live, results, strict=True):
+            if not fut.done():
+                fut.set_result(result)
@@ -0,0 +1,223 @@
+"""Bounded executor that keeps model inference off the event loop.
+
+predict_proba is CPU-bound. Called directly from an async handler it blocks
+the uvicorn worker's event loop, so one slow inference stalls every other
+request, /health included. This runs inference on a thread or process
+pool instead, with a cap on how much work can be outstanding. Anything over
+the cap is rejected straight away rather than queued without limit.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections.abc import Callable
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, TypeVar
+
+import numpy as np
+
+from src.models.interface import ModelInterface
+from src.monitoring import metrics
+from src.monitoring.drift import DriftCounts, DriftMonitor
+from src.monitoring.metrics import PendingMetrics, record_stage
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# model copy owned by a process-pool worker, set by _init_worker
+_worker_model: ModelInterface | None = None
+
+
+def _timed_call(fn: Callable[..., Any], *args: Any) -> tuple[float, Any]:
+    # monotonic() is system-wide on Linux, so a process worker's start time
+    # can be compared with the submit time taken in the parent
+    return time.monotonic(), fn(*args)
+
+
+class ExecutorSaturatedError(Exception):
+    """Raised when the executor already has as much work as it will take."""
+
+
+def _init_worker(
+    model: ModelInterface, warmup: Callable[[ModelInterface], None] | None
+) -> None:
+    global _worker_model
+    _worker_model = model
+    metrics.hold_for_parent()
+    if warmup is not None:
+        warmup(model)
+
+
+def _worker_ready() -> int:
+    # long enough that one worker can't take every start() call itself
+    time.sleep(0.05)
+    return os.getpid()
+
+
+def _worker_predict(
+    method: str, payload: Any
+) -> tuple[list[dict[str, Any]], PendingMetrics, DriftCounts | None]:
+    if _worker_model is None:
+        raise RuntimeError("Worker has no model")
+    result: list[dict[str, Any]] = getattr(_worker_model, method)(payload)
+    drift: DriftMonitor | None = getattr(_worker_model, "drift", None)
+    return result, metrics.drain(), drift.drain() if drift is not None else None
+
+
+class InferenceExecutor:
+    """Thread or process pool with a bounded number of in-flight calls.
+
+    kind="thread" shares the loaded model across threads. sklearn's tree
+    traversal releases the GIL, so this already spreads over several cores
+    and is the cheap default. kind="process" gives every worker its own
+    copy of the model. That sidesteps the GIL entirely, at the cost of one
+    model per worker and a pickle round-trip for rows and results.
+
+    At most max_workers calls run at once and up to max_queue more wait
+    for a worker. Past that, run() raises ExecutorSaturatedError.
+
+    warmup, if given, is called on each process worker's model copy when
+    the worker starts. It must be picklable (a module-level function).
+    """
+
+    def __init__(
+        self,
+        model: ModelInterface,
+        kind: str = "thread",
+        max_workers: int | None = None,
+        max_queue: int = 64,
+        warmup: Callable[[ModelInterface], None] | None = None,
+    ):
+        self.kind = kind
+        self.warmup = warmup
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.capacity = self.max_workers + max_queue
+        self._in_flight = 0
+        self._model = model
+        self._threads: ThreadPoolExecutor | None = None
+
+        self._pool: Executor
+        if kind == "thread":
+            self._pool = ThreadPoolExecutor(
+                self.max_workers, thread_name_prefix="inference"
+            )
+        elif kind == "process":
+            self._pool = ProcessPoolExecutor(
+                self.max_workers, initializer=_init_worker, initargs=(model, warmup)
+            )
+        else:
+            raise ValueError(f"Unknown executor kind '{kind}'")
+
+    async def start(self) -> None:
+        """Start every process worker and wait for it to warm up.
+
+        Process workers are otherwise started by the first calls, which
+        would wait for the worker to start and warm up. Threads share the
+        model that was already warmed, so there's nothing to do for them.
+        """
+        if self.kind != "process":
+            return
+        await asyncio.gather(
+            *(
+                asyncio.wrap_future(self._pool.submit(_worker_ready))
+                for _ in range(self.max_workers)
+            )
+        )
+
+    @property
+    def in_flight(self) -> int:
+        """Calls currently running or waiting for a worker."""
+        return self._in_flight
+
+    async def run(
+        self, fn: Callable[..., T], *args: Any, pool: Executor | None = None
+    ) -> T:
+        """Run fn(*args) on the pool, or raise if it's already full."""
+        if self._in_flight >= self.capacity:
+            raise ExecutorSaturatedError(
+                f"Inference queue full ({self._in_flight}/{self.capacity})"
+            )
+
+        loop = asyncio.get_running_loop()
+        self._in_flight += 1
+        submitted = time.monotonic()
+        try:
+            cf = (pool or self._pool).submit(_timed_call, fn, *args)
+        except BaseException:
+            self._in_flight -= 1
+            raise
+
+        # release the slot when the work actually finishes, not when the
+        # awaiting request goes away - a cancelled caller doesn't stop the
+        # worker, so the slot is still busy until then
+        cf.add_done_callback(lambda _: loop.call_soon_threadsafe(self._release))
+        result: T
+        started, result = await asyncio.wrap_future(cf)
+        record_stage("queue_wait", max(started - submitted, 0.0))
+        return result
+
+    async def predict_batch(
+        self, model: ModelInterface, rows: list[dict[str, Any]]
+    ) -> list[dict[str, Any]]:
+        """Score rows on the pool.
+
+        In process mode the worker's own model copy is used, and the metrics
+        and drift counts the worker recorded come back with the results and
+        are merged into this process's. Workers only hold the model the pool
+        was started with. Any other model (say, one from the multi-model
+        registry) runs on a side thread pool under the same in-flight cap.
+        """
+        return await self._predict(model, "predict_batch", rows)
+
+    async def predict_array(
+        self, model: ModelInterface, X: np.ndarray
+    ) -> list[dict[str, Any]]:
+        """Score an ordered feature matrix on the pool, like predict_batch."""
+        return await self._predict(model, "predict_array", X)
+
+    async def _predict(
+        self, model: ModelInterface, method: str, payload: Any
+    ) -> list[dict[str, Any]]:
+        if self.kind != "process":
+            return await self.run(getattr(model, method), payload)
+        if model is not self._model:
+            if self._threads is None:
+                self._threads = ThreadPoolExecutor(
+                    self.max_workers, thread_name_prefix="inference"
+                )
+            return await self.run(getattr(model, method), payload, pool=self._threads)
+
+        results, recorded, observed = await self.run(_worker_predict, method, payload)
+        metrics.merge(recorded)
+        drift: DriftMonitor | None = getattr(self._model, "drift", None)
+        if observed is not None and drift is not None:
+            drift.merge(observed)
+        return results
+
+    def with_model(self, model: ModelInterface) -> "InferenceExecutor":
+        """Executor to use after `model` replaces the current one.
+
+        Threads share whatever model they're handed, so that's just self.
+        Process workers each hold a copy, so they need a fresh pool.
+        """
+        if self.kind != "process":
+            return self
+        return InferenceExecutor(
+            model,
+            kind=self.kind,
+            max_workers=self.max_workers,
+            max_queue=self.max_queue,
+            warmup=self.warmup,
+        )
+
+    def shutdown(self, wait: bool = True, cancel_futures: bool = True) -> None:
+        """Stop the pool, by default dropping anything that hasn't started."""
+        self._pool.shutdown(wait=wait, cancel_futures=cancel_futures)
+        if self._threads is not None:
+            self._threads.shutdown(wait=wait, cancel_futures=cancel_futures)
+
+    def _release(self) -> None:
+        self._in_flight -= 1
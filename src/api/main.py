@@ -1,62 +1,457 @@
 """FastAPI application for model serving."""
 
+import asyncio
+import hmac
 import logging
 import os
+import time
 from collections.abc import AsyncIterator
-from contextlib import asynccontextmanager
-from pathlib import Path
-from typing import Any
+from contextlib import asynccontextmanager, suppress
+from typing import Annotated, Any
 
-from fastapi import FastAPI, HTTPException
+import numpy as np
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request, Response
+from fastapi.responses import PlainTextResponse
 
+from src.api import admission, fastpath, streaming
+from src.api.batching import MicroBatcher
+from src.api.executor import ExecutorSaturatedError, InferenceExecutor
 from src.api.schemas import (
+    BatchPredictRequest,
+    BatchPredictResponse,
     HealthResponse,
     ModelInfoResponse,
+    ModelsResponse,
     PredictRequest,
     PredictResponse,
     ReadyResponse,
+    ReloadResponse,
 )
+from src.api.shadow import ShadowScorer, shadow_settings
+from src.models.cache import PredictionCache
+from src.models.interface import ModelInterface
 from src.models.iris_classifier import IrisClassifier
+from src.models.loader import (
+    attach_drift,
+    load_model,
+    make_resolver,
+    registry_settings,
+    warm_up,
+)
+from src.models.registry import ModelNotFoundError, ModelRegistry
+from src.models.resolver import RegistryResolver, RegistryTimeoutError
+from src.monitoring import drift, metrics, stages
 from src.monitoring.metrics import setup_metrics
+from src.monitoring.profiler import SamplingProfiler
+from src.monitoring.startup import STARTUP, process_age
 
 logger = logging.getLogger(__name__)
 
 # global model instance
 model: IrisClassifier | None = None
 
+# pool that runs inference off the event loop, chosen via INFERENCE_EXECUTOR
+executor: InferenceExecutor | None = None
+
+# optional micro-batcher for /predict, enabled via PREDICT_MICROBATCH_ENABLED
+batcher: MicroBatcher | None = None
+
+# candidate scored on mirrored /predict traffic, enabled via SHADOW_MODEL_STAGE
+shadow: ShadowScorer | None = None
+
+# MLflow registry lookups with a timeout, shared by every load and reload
+resolver: RegistryResolver | None = None
+
+# every model this process can serve by name/version, default included
+registry: ModelRegistry | None = None
+
+# set once startup, including warmup, is done; /ready reports it
+_ready = False
+
+# set while an /admin/profile call is sampling; one profile at a time
+profiler: SamplingProfiler | None = None
+
+# serializes hot reloads so a poll and an admin call can't race;
+# recreated in lifespan so it belongs to the serving event loop
+_reload_lock = asyncio.Lock()
+
+
+class ReloadUnavailableError(Exception):
+    """Raised by reload_model when there's no registry to reload from."""
+
+
+async def _score_rows(
+    rows: list[dict[str, Any]], target: ModelInterface | None = None
+) -> list[dict[str, Any]]:
+    """Score rows against target, or whichever model is currently loaded."""
+    return await _score("predict_batch", rows, target)
+
+
+async def _score_mirrored(rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Score rows on the live model, then hand them to the shadow, if any."""
+    results = await _score_rows(rows)
+    if shadow is not None:
+        shadow.mirror(rows, results)
+    return results
+
+
+async def _score_array(
+    X: np.ndarray, target: ModelInterface | None = None
+) -> list[dict[str, Any]]:
+    """Score an ordered feature matrix, like _score_rows."""
+    return await _score("predict_array", X, target)
+
+
+async def _score(
+    method: str, payload: Any, target: ModelInterface | None
+) -> list[dict[str, Any]]:
+    # read the globals once - a hot reload may swap them while we wait
+    current, pool = target or model, executor
+    if current is None:
+        raise RuntimeError("Model not loaded")
+
+    start = time.perf_counter()
+    results: list[dict[str, Any]]
+    if pool is None:
+        results = getattr(current, method)(payload)
+    else:
+        results = await getattr(pool, method)(current, payload)
+
+    if STARTUP.first_request_pending:
+        STARTUP.record_first_request(time.perf_counter() - start)
+    return results
+
+
+def _saturated() -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail="Inference queue full, retry later",
+        headers={"Retry-After": "1"},
+    )
+
+
+def _load_registry_model(name: str, version: str) -> IrisClassifier:
+    """Registry loader: fetch name at a version number or stage from MLflow."""
+    mlflow_uri = registry_settings()[0]
+    if not mlflow_uri:
+        raise ModelNotFoundError(
+            f"Model '{name}/{version}' isn't loaded and no MLflow registry is set"
+        )
+    try:
+        loaded = IrisClassifier.from_mlflow(
+            mlflow_uri,
+            name,
+            version,
+            backend=os.environ.get("MODEL_BACKEND", "sklearn"),
+            cache_dir=os.environ.get("MODEL_CACHE_DIR"),
+            shared_dir=os.environ.get("MODEL_SHARED_DIR"),
+            resolver=_resolver(),
+        )
+    except (RuntimeError, TimeoutError) as e:
+        raise ModelNotFoundError(str(e)) from e
+    warm_up(loaded)
+    return loaded
+
+
+async def _pinned_version(name: str, version: str) -> str:
+    """version, or the number a stage name points at right now.
+
+    The registry caches models by (name, version). Keyed by the stage
+    itself, a model would keep serving whatever was at that stage when it
+    was first loaded, and the default model would be loaded a second time.
+    Stage lookups are cached for REGISTRY_METADATA_TTL_SECONDS.
+    """
+    lookups = _resolver()
+    if version.isdigit() or lookups is None:
+        return version
+    try:
+        mv = await lookups.version_async(name, version)
+    except (RuntimeError, TimeoutError) as e:
+        raise ModelNotFoundError(str(e)) from e
+    return str(mv.version)
+
+
+def _resolver() -> RegistryResolver | None:
+    """The shared resolver, created on first use if MLflow was set up late."""
+    global resolver
+    if resolver is None:
+        resolver = make_resolver()
+    return resolver
+
+
+def _install_model(new: IrisClassifier, new_executor: InferenceExecutor | None) -> None:
+    """Make `new` the serving model, scored on `new_executor`.
+
+    Requests already in flight hold a reference to the old model (and, in
+    process mode, the old pool) and finish on it. Everything that starts
+    after this returns sees the new one.
+    """
+    global model, executor
+
+    old = model
+    if old is not None and old.cache is not None:
+        old.cache.clear()
+
+    old_executor = executor
+    executor = new_executor
+    model = new
+    drift.activate(new.drift)
+
+    if registry is not None:
+        model_name = registry_settings()[1]
+        if old is not None:
+            registry.unpin(model_name, str(old.version))
+        registry.put(model_name, str(new.version), new, pinned=True)
+
+    if old_executor is not None and old_executor is not executor:
+        # let queued work finish on the old workers, then they exit
+        old_executor.shutdown(wait=False, cancel_futures=False)
+
+
+async def reload_model(force: bool = False) -> dict[str, Any]:
+    """Pick up a newly promoted registry version without a restart.
+
+    The registry lookup, load and warmup all run in a worker thread, so
+    requests keep being served by the current model throughout. In process
+    mode the new pool's workers are started and warmed too. The swap
+    itself is a single reference assignment.
+
+    Raises:
+        ReloadUnavailableError: MLFLOW_TRACKING_URI isn't set
+        ModelNotFoundError: the registry has nothing at MODEL_STAGE
+    """
+    mlflow_uri, model_name, model_stage = registry_settings()
+    lookups = _resolver()
+    if not mlflow_uri or lookups is None:
+        raise ReloadUnavailableError("MLFLOW_TRACKING_URI is not set")
+
+    async with _reload_lock:
+        previous = model.version if model is not None else None
+        try:
+            mv = await lookups.version_async(model_name, model_stage, fresh=True)
+        except RuntimeError as e:
+            raise ModelNotFoundError(str(e)) from e
+        latest = str(mv.version)
+        if latest == previous and not force:
+            return {"status": "unchanged", "version": previous}
+
+        backend = model.backend if model is not None else "sklearn"
+        new = await asyncio.to_thread(
+            IrisClassifier.from_mlflow,
+            mlflow_uri,
+            model_name,
+            model_stage,
+            backend=backend,
+            cache_dir=os.environ.get("MODEL_CACHE_DIR"),
+            shared_dir=os.environ.get("MODEL_SHARED_DIR"),
+            resolver=lookups,
+        )
+        await asyncio.to_thread(warm_up, new)
+        attach_drift(new)
+        # process workers copy the model when the pool starts, so the
+        # cache must be on it by then; it drops the old version's entries
+        # on the first lookup under the new one
+        if model is not None:
+            new.cache = model.cache
+        new_executor = executor.with_model(new) if executor is not None else None
+        if new_executor is not None:
+            await new_executor.start()
+
+        _install_model(new, new_executor)
+        logger.info("Swapped model version %s -> %s", previous, new.version)
+        return {
+            "status": "reloaded",
+            "version": new.version,
+            "previous_version": previous,
+        }
+
+
+async def reload_shadow(fresh: bool = True) -> None:
+    """Load SHADOW_MODEL_STAGE's current registry version if it changed.
+
+    Like reload_model(), everything up to the swap happens in a worker
+    thread, and comparisons already queued finish on the old candidate.
+    fresh=False accepts a cached registry lookup, e.g. one prefetched at
+    startup.
+    """
+    global shadow
+
+    mlflow_uri, model_name, _ = registry_settings()
+    stage, fraction, max_pending = shadow_settings()
+    lookups = _resolver()
+    if not stage or not mlflow_uri or lookups is None:
+        return
+
+    async with _reload_lock:
+        previous = shadow.model.version if shadow is not None else None
+        mv = await lookups.version_async(model_name, stage, fresh=fresh)
+        latest = str(mv.version)
+        if latest == previous:
+            return
+
+        candidate = await asyncio.to_thread(_load_registry_model, model_name, stage)
+        if shadow is None:
+            shadow = ShadowScorer(candidate, fraction=fraction, max_pending=max_pending)
+        else:
+            shadow.model = candidate
+        logger.info(
+            "Shadow model: %s version %s on %.0f%% of /predict traffic",
+            stage,
+            candidate.version,
+            fraction * 100,
+        )
+
+
+async def _poll_registry(interval: float) -> None:
+    """Check the registry every `interval` seconds and reload on change."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await reload_model()
+        except Exception:
+            logger.exception("Registry poll failed, still serving current model")
+        try:
+            await reload_shadow()
+        except Exception:
+            logger.exception("Shadow model poll failed, keeping current candidate")
+
+
+def require_admin(x_admin_token: Annotated[str | None, Header()] = None) -> None:
+    """Guard admin endpoints with ADMIN_TOKEN when one is configured."""
+    expected = os.environ.get("ADMIN_TOKEN")
+    if expected and not hmac.compare_digest(x_admin_token or "", expected):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     """Load model on startup — try MLflow registry first, fall back to pickle."""
-    global model
+    global model, executor, batcher, registry, resolver, shadow, _reload_lock, _ready
 
-    mlflow_uri = os.environ.get("MLFLOW_TRACKING_URI")
-    model_name = os.environ.get("MLFLOW_MODEL_NAME", "iris-classifier")
-    model_stage = os.environ.get("MLFLOW_MODEL_STAGE", "Production")
+    _reload_lock = asyncio.Lock()
 
-    # try MLflow first
-    if mlflow_uri:
-        try:
-            model = IrisClassifier.from_mlflow(mlflow_uri, model_name, model_stage)
-            logger.info(
-                "Loaded model from MLflow registry: %s version %s",
-                model_name,
-                model.version,
+    # everything before this point: interpreter start-up and imports
+    age = process_age()
+    if age is not None:
+        STARTUP.record("import", age)
+
+    with STARTUP.phase("model_load"):
+        resolver = make_resolver()
+        if resolver is not None:
+            # the serving and shadow stages in one round trip's time
+            model_name, model_stage = registry_settings()[1:]
+            shadow_stage = shadow_settings()[0]
+            await resolver.prefetch(
+                [(model_name, model_stage)]
+                + ([(model_name, shadow_stage)] if shadow_stage else [])
             )
+        model = load_model(resolver)
+    if model is not None:
+        with STARTUP.phase("warmup"):
+            warm_up(model)
+        attach_drift(model)
+        drift.activate(model.drift)
+
+    budget_mb = float(os.environ.get("MODEL_REGISTRY_MEMORY_MB", "256"))
+    registry = ModelRegistry(_load_registry_model, int(budget_mb * 1024 * 1024))
+    if model is not None:
+        registry.put(registry_settings()[1], str(model.version), model, pinned=True)
+
+    cache_size = int(os.environ.get("PREDICTION_CACHE_SIZE", "0"))
+    if model is not None and cache_size > 0:
+        round_digits = os.environ.get("PREDICTION_CACHE_ROUND_DIGITS")
+        model.cache = PredictionCache(
+            maxsize=cache_size,
+            ttl_seconds=float(os.environ.get("PREDICTION_CACHE_TTL_SECONDS", "300")),
+            round_digits=int(round_digits) if round_digits else None,
+        )
+        logger.info("Prediction cache enabled (size=%d)", cache_size)
+
+    executor_kind = os.environ.get("INFERENCE_EXECUTOR", "thread")
+    if model is not None and executor_kind != "none":
+        executor = InferenceExecutor(
+            model,
+            kind=executor_kind,
+            max_workers=int(os.environ.get("INFERENCE_WORKERS", "0")) or None,
+            max_queue=int(os.environ.get("INFERENCE_MAX_QUEUE", "64")),
+            warmup=warm_up,
+        )
+        await executor.start()
+        logger.info(
+            "Inference executor: %s pool, %d workers, queue %d",
+            executor.kind,
+            executor.max_workers,
+            executor.max_queue,
+        )
+
+    if os.environ.get("PREDICT_MICROBATCH_ENABLED", "false").lower() == "true":
+        batcher = MicroBatcher(
+            _score_mirrored,
+            max_batch_size=int(os.environ.get("PREDICT_MICROBATCH_MAX_SIZE", "32")),
+            max_wait_us=int(os.environ.get("PREDICT_MICROBATCH_MAX_WAIT_US", "2000")),
+        )
+        await batcher.start()
+        logger.info(
+            "Micro-batching enabled (max_size=%d, max_wait_us=%d)",
+            batcher.max_batch_size,
+            int(batcher.max_wait_s * 1_000_000),
+        )
+
+    limiter = admission.make_limiter()
+    if limiter is not None:
+        admission.activate(limiter)
+        logger.info(
+            "Admission control enabled (limit %d, between %d and %d)",
+            limiter.limit,
+            limiter.min_limit,
+            limiter.max_limit,
+        )
+
+    if model is not None:
+        try:
+            await reload_shadow(fresh=False)
         except Exception:
-            logger.exception("Failed to load from MLflow, falling back to pickle")
+            logger.exception("Failed to load shadow model, serving without one")
 
-    # fall back to pickle
-    if model is None:
-        model_path = Path(__file__).parent.parent.parent / "models" / "model.pkl"
-        if model_path.exists():
-            model = IrisClassifier(model_path)
-            logger.info("Loaded model from %s", model_path)
-        else:
-            logger.warning("No model found — tried MLflow and %s", model_path)
+    poller: asyncio.Task[None] | None = None
+    reload_interval = float(os.environ.get("MODEL_RELOAD_INTERVAL_SECONDS", "0"))
+    if reload_interval > 0 and registry_settings()[0]:
+        poller = asyncio.create_task(_poll_registry(reload_interval))
+        logger.info("Polling model registry every %.0fs", reload_interval)
+
+    # a scrape only reaches one worker process, so each one flushes its own
+    flusher: asyncio.Task[None] | None = None
+    if metrics.multiprocess():
+        flush_interval = float(os.environ.get("METRICS_FLUSH_SECONDS", "1"))
+        flusher = asyncio.create_task(metrics.flush_periodically(flush_interval))
+
+    _ready = True
+    STARTUP.log_summary()
 
     yield
 
+    _ready = False
+    admission.activate(None)
+    for task in (poller, flusher):
+        if task is not None:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+    if batcher is not None:
+        await batcher.stop()
+        batcher = None
+    if executor is not None:
+        executor.shutdown()
+        executor = None
+    if shadow is not None:
+        shadow.close()
+        shadow = None
+    if resolver is not None:
+        resolver.close()
+        resolver = None
+    metrics.flush()
+    drift.activate(None)
+    registry = None
     model = None
 
 
@@ -67,7 +462,10 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+# innermost of the three, so refused calls still show up in request metrics
+app.add_middleware(admission.AdmissionMiddleware)
 setup_metrics(app)
+app.add_middleware(stages.StageTimingMiddleware)
 
 
 @app.get("/health", response_model=HealthResponse)
@@ -81,18 +479,186 @@ async def ready() -> dict[str, Any]:
     """Readiness probe - is the service ready to serve traffic?"""
     if model is None:
         raise HTTPException(status_code=503, detail="Model not loaded")
+    if not _ready:
+        raise HTTPException(status_code=503, detail="Warming up")
     return {"status": "ready", "model_loaded": True}
 
 
 @app.post("/predict", response_model=PredictResponse)
+@stages.timed
 async def predict(request: PredictRequest) -> dict[str, Any]:
     """Run inference on input features."""
     if model is None:
         raise HTTPException(status_code=503, detail="Model not loaded")
 
     try:
-        result = model.predict(request.features)
-        return result
+        if batcher is not None:
+            return await batcher.submit(request.features)
+        return (await _score_mirrored([request.features]))[0]
+    except ExecutorSaturatedError:
+        raise _saturated() from None
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=f"Missing feature: {e}") from None
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e)) from None
+
+
+@app.post("/predict/batch", response_model=BatchPredictResponse)
+@stages.timed
+async def predict_batch(request: BatchPredictRequest) -> dict[str, Any]:
+    """Run inference on many rows with a single model call."""
+    if model is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+
+    try:
+        results = await _score_rows(request.instances)
+        return {"predictions": results}
+    except ExecutorSaturatedError:
+        raise _saturated() from None
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=f"Missing feature: {e}") from None
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e)) from None
+
+
+@app.post(
+    "/predict/fast",
+    response_model=BatchPredictResponse | PredictResponse,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                fastpath.JSON: {
+                    "schema": {"type": "array", "items": {}},
+                    "example": [5.1, 3.5, 1.4, 0.2],
+                },
+                fastpath.FLOAT32: {"schema": {"type": "string", "format": "binary"}},
+            },
+        }
+    },
+)
+async def predict_fast(request: Request) -> Response:
+    """Run inference on positional feature rows, skipping pydantic.
+
+    Values are in /model/info's feature order. A JSON body is one row
+    ([5.1, 3.5, 1.4, 0.2]) or a list of rows. An application/x-float32
+    body is raw little-endian float32, row after row. A single JSON row
+    gets one prediction back; anything else gets {"predictions": [...]}.
+    """
+    current = model
+    if current is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+
+    content_type = request.headers.get("content-type", fastpath.JSON)
+    if fastpath.media_type(content_type) not in fastpath.CONTENT_TYPES:
+        raise HTTPException(
+            status_code=415,
+            detail=f"Unsupported content type, use one of {fastpath.CONTENT_TYPES}",
+        )
+
+    try:
+        X, single = fastpath.parse_rows(
+            await request.body(), content_type, len(current.feature_names)
+        )
+        stages.parsed()
+        results = await _score_array(X, current)
+    except ExecutorSaturatedError:
+        raise _saturated() from None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from None
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e)) from None
+
+    stages.finished()
+    return Response(fastpath.encode(results, single), media_type=fastpath.JSON)
+
+
+@app.post(
+    "/predict/stream",
+    response_class=streaming.ScoringStreamResponse,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                streaming.NDJSON: {"schema": {"type": "string"}},
+                streaming.CSV: {"schema": {"type": "string"}},
+            },
+        }
+    },
+)
+async def predict_stream(request: Request) -> streaming.ScoringStreamResponse:
+    """Score an NDJSON or CSV body of any length, streaming results back.
+
+    Rows are read as they arrive and scored PREDICT_STREAM_CHUNK_ROWS at a
+    time, so memory use doesn't grow with the input. Results come back in
+    the input's format and row order. Bad rows get an error entry with
+    their line number instead of failing the whole stream.
+    """
+    current = model
+    if current is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+
+    kind = fastpath.media_type(request.headers.get("content-type", streaming.NDJSON))
+    if kind not in streaming.CONTENT_TYPES:
+        raise HTTPException(
+            status_code=415,
+            detail=f"Unsupported content type, use one of {streaming.CONTENT_TYPES}",
+        )
+
+    async def score(rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        return await _score_rows(rows, current)
+
+    chunk_rows = int(os.environ.get("PREDICT_STREAM_CHUNK_ROWS", "1000"))
+    return streaming.ScoringStreamResponse(
+        streaming.score_stream(
+            request.stream(),
+            kind,
+            current.feature_names,
+            streaming.retrying(score),
+            chunk_rows=chunk_rows,
+        ),
+        media_type=kind,
+    )
+
+
+@app.get("/models", response_model=ModelsResponse)
+async def list_models() -> dict[str, Any]:
+    """Models resident in this process and their memory use."""
+    if registry is None:
+        raise HTTPException(status_code=503, detail="Registry not initialized")
+    return {
+        "models": registry.describe(),
+        "memory_bytes": registry.memory_bytes,
+        "memory_budget_bytes": registry.memory_budget_bytes,
+    }
+
+
+@app.post("/models/{name}/{version}/predict", response_model=PredictResponse)
+@stages.timed
+async def predict_model(
+    name: str, version: str, request: PredictRequest
+) -> dict[str, Any]:
+    """Run inference on a specific model, loading it if needed.
+
+    version is a registry version number or a stage name.
+    """
+    if registry is None:
+        raise HTTPException(status_code=503, detail="Registry not initialized")
+
+    try:
+        target = await registry.get(name, await _pinned_version(name, version))
+    except ModelNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e)) from None
+    except Exception as e:
+        logger.exception("Failed to load %s/%s", name, version)
+        raise HTTPException(
+            status_code=502, detail=f"Failed to load model: {e}"
+        ) from None
+
+    try:
+        return (await _score_rows([request.features], target))[0]
+    except ExecutorSaturatedError:
+        raise _saturated() from None
     except KeyError as e:
         raise HTTPException(status_code=400, detail=f"Missing feature: {e}") from None
     except Exception as e:
@@ -105,3 +671,65 @@ async def model_info() -> dict[str, Any]:
     if model is None:
         raise HTTPException(status_code=503, detail="Model not loaded")
     return model.get_model_info()
+
+
+@app.post(
+    "/admin/reload",
+    response_model=ReloadResponse,
+    dependencies=[Depends(require_admin)],
+)
+async def admin_reload(force: bool = False) -> dict[str, Any]:
+    """Load the registry's current version and swap it in if it changed.
+
+    The shadow model, if any, is refreshed too, on a best-effort basis.
+    """
+    try:
+        result = await reload_model(force=force)
+    except ReloadUnavailableError as e:
+        raise HTTPException(status_code=409, detail=str(e)) from None
+    except ModelNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e)) from None
+    except RegistryTimeoutError as e:
+        raise HTTPException(
+            status_code=504, detail=f"Reload failed, still serving old model: {e}"
+        ) from None
+    except Exception as e:
+        logger.exception("Hot reload failed")
+        raise HTTPException(
+            status_code=502, detail=f"Reload failed, still serving old model: {e}"
+        ) from None
+    try:
+        await reload_shadow()
+    except Exception:
+        logger.exception("Shadow model reload failed, keeping current candidate")
+    return result
+
+
+@app.post(
+    "/admin/profile",
+    response_class=PlainTextResponse,
+    dependencies=[Depends(require_admin)],
+)
+async def admin_profile(
+    seconds: Annotated[float, Query(gt=0, le=60)] = 10.0,
+    interval_ms: Annotated[float, Query(ge=1, le=1000)] = 5.0,
+) -> PlainTextResponse:
+    """Sample this process's Python stacks and return them collapsed.
+
+    The output feeds straight into flamegraph.pl or speedscope. Only
+    threads in this process are sampled, so with INFERENCE_EXECUTOR=process
+    the model's own work happens out of view.
+    """
+    global profiler
+    if profiler is not None:
+        raise HTTPException(status_code=409, detail="A profile is already running")
+
+    profiler = SamplingProfiler(interval_ms / 1000)
+    profiler.start()
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        profiler.stop()
+        body = profiler.collapsed()
+        profiler = None
+    return PlainTextResponse(body)
@@ -1,7 +1,12 @@
 """Request/response schemas for the API."""
 
+import os
+
 from pydantic import BaseModel, Field
 
+# most rows one /predict/batch call may send; read once, at import
+MAX_BATCH_ROWS = int(os.environ.get("PREDICT_BATCH_MAX_ROWS", "1000"))
+
 
 class PredictRequest(BaseModel):
     """Input features for prediction."""
@@ -28,6 +33,38 @@ class PredictResponse(BaseModel):
     inference_time_ms: float
 
 
+class BatchPredictRequest(BaseModel):
+    """Many rows of input features, scored in one model call."""
+
+    instances: list[dict[str, float]] = Field(
+        ...,
+        min_length=1,
+        max_length=MAX_BATCH_ROWS,
+        json_schema_extra={
+            "example": [
+                {
+                    "sepal length (cm)": 5.1,
+                    "sepal width (cm)": 3.5,
+                    "petal length (cm)": 1.4,
+                    "petal width (cm)": 0.2,
+                },
+                {
+                    "sepal length (cm)": 6.7,
+                    "sepal width (cm)": 3.0,
+                    "petal length (cm)": 5.2,
+                    "petal width (cm)": 2.3,
+                },
+            ]
+        },
+    )
+
+
+class BatchPredictResponse(BaseModel):
+    """Prediction results, in the same order as the request instances."""
+
+    predictions: list[PredictResponse]
+
+
 class HealthResponse(BaseModel):
     """Health check response."""
 
@@ -49,3 +86,28 @@ class ModelInfoResponse(BaseModel):
     framework: str
     features: list[str]
     classes: list[str]
+
+
+class ReloadResponse(BaseModel):
+    """Result of a hot model reload."""
+
+    status: str
+    version: str | None
+    previous_version: str | None = None
+
+
+class LoadedModel(BaseModel):
+    """One model resident in the in-process registry."""
+
+    name: str
+    version: str
+    memory_bytes: int
+    pinned: bool
+
+
+class ModelsResponse(BaseModel):
+    """Models currently loaded for /models/{name}/{version} routes."""
+
+    models: list[LoadedModel]
+    memory_bytes: int
+    memory_budget_bytes: int
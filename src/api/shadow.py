@@ -0,0 +1,125 @@
+"""Shadow scoring of live /predict traffic against a candidate model.
+
+With SHADOW_MODEL_STAGE set (e.g. Staging, next to the default
+MLFLOW_MODEL_STAGE=Production) the service loads that registry version as
+well, and replays a random SHADOW_TRAFFIC_FRACTION of /predict calls
+against it once the live answer is ready. Callers only ever get the live
+model's answer.
+
+The candidate runs on a thread of its own, never on the inference
+executor, and the request doesn't wait for it. If that thread falls
+behind, calls beyond SHADOW_MAX_PENDING are dropped rather than queued, so
+a slow candidate can't build up memory or steal more than one thread's
+worth of CPU from live traffic.
+
+Each mirrored call is compared with what was served:
+
+- shadow_predictions_total{result}: rows where the candidate predicted the
+  same class ("agree") or another one ("disagree").
+- shadow_latency_delta_seconds: candidate inference time minus the live
+  model's for the same rows. Skipped when live rows came from the
+  prediction cache.
+- shadow_requests_total{outcome}: "scored", "dropped" or "failed".
+"""
+
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any
+
+import numpy as np
+
+from src.models.iris_classifier import IrisClassifier
+from src.monitoring import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def shadow_settings() -> tuple[str | None, float, int]:
+    """(SHADOW_MODEL_STAGE, SHADOW_TRAFFIC_FRACTION, SHADOW_MAX_PENDING)."""
+    return (
+        os.environ.get("SHADOW_MODEL_STAGE") or None,
+        float(os.environ.get("SHADOW_TRAFFIC_FRACTION", "0.1")),
+        int(os.environ.get("SHADOW_MAX_PENDING", "16")),
+    )
+
+
+class ShadowScorer:
+    """Mirrors scored calls to a candidate model and records how it compares.
+
+    `model` can be replaced at any time, e.g. when the candidate stage
+    moves to a new version; comparisons already queued finish on the old one.
+    """
+
+    def __init__(
+        self,
+        model: IrisClassifier,
+        fraction: float = 0.1,
+        max_pending: int = 16,
+        seed: int | None = None,
+    ):
+        if not 0.0 <= fraction <= 1.0:
+            raise ValueError("fraction must be between 0 and 1")
+        if max_pending < 1:
+            raise ValueError("max_pending must be >= 1")
+        self.model = model
+        self.fraction = fraction
+        self.max_pending = max_pending
+        self._random = random.Random(seed)
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shadow")
+
+    def mirror(
+        self, rows: list[dict[str, Any]], live: list[dict[str, Any]]
+    ) -> Future[None] | None:
+        """Maybe queue rows for the candidate, given the live results for them.
+
+        Returns right away, with the queued comparison or None if this call
+        wasn't sampled or had to be dropped.
+        """
+        if self._random.random() >= self.fraction:
+            return None
+        if not self._slots.acquire(blocking=False):
+            metrics.SHADOW_REQUESTS.labels(outcome="dropped").inc()
+            return None
+        future = self._pool.submit(self._compare, self.model, rows, live)
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def close(self) -> None:
+        """Drop queued comparisons and let the thread exit."""
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def _compare(
+        candidate: IrisClassifier,
+        rows: list[dict[str, Any]],
+        live: list[dict[str, Any]],
+    ) -> None:
+        try:
+            # the candidate's own column order, it may not match the live model's
+            X = np.array(
+                [[row[name] for name in candidate.feature_names] for row in rows]
+            )
+            start = time.perf_counter()
+            proba = candidate.predict_proba(X)
+            elapsed = time.perf_counter() - start
+        except Exception:
+            logger.exception("Shadow model %s failed", candidate.version)
+            metrics.SHADOW_REQUESTS.labels(outcome="failed").inc()
+            return
+
+        predicted = np.asarray(candidate.target_names)[np.argmax(proba, axis=1)]
+        served = np.array([result["prediction"] for result in live])
+        agree = int(np.count_nonzero(predicted == served))
+        metrics.SHADOW_PREDICTIONS.labels(result="agree").inc(agree)
+        metrics.SHADOW_PREDICTIONS.labels(result="disagree").inc(len(rows) - agree)
+
+        # every live row of a call shares one inference time; 0 means cached
+        live_ms = min(result["inference_time_ms"] for result in live)
+        if live_ms > 0:
+            metrics.SHADOW_LATENCY_DELTA.observe(elapsed - live_ms / 1000)
+        metrics.SHADOW_REQUESTS.labels(outcome="scored").inc()
@@ -0,0 +1,243 @@
+"""Incremental bulk scoring for /predict/stream.
+
+Nightly re-scoring jobs push whole files at the service. Scoring a file one
+/predict call per row is slow, and one /predict/batch call holds the whole
+file in memory at once. Here the request body is read as it arrives, split
+into lines, and scored chunk_rows rows at a time through predict_batch().
+Each chunk's results are streamed back before the next chunk is read. At
+most one chunk of rows is ever held, however long the input is.
+
+Input formats, by Content-Type:
+
+- application/x-ndjson: one row per line, either a feature dict (like
+  /predict's "features") or a positional array in feature_names order.
+- text/csv: a header line naming the features (any order, extra columns
+  ignored), then one row per line. Fields can't contain newlines.
+
+Results come back in the same format and the same order as the input rows.
+A row that can't be parsed or scored gets an error entry in its place, with
+its 1-based line number, and the rest of the stream carries on.
+"""
+
+import asyncio
+import csv
+import io
+import logging
+from collections.abc import AsyncIterator
+from typing import Any
+
+import orjson
+from starlette.requests import ClientDisconnect
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+from src.api.batching import ROW_ERRORS, BatchFn
+from src.api.executor import ExecutorSaturatedError
+
+logger = logging.getLogger(__name__)
+
+NDJSON = "application/x-ndjson"
+CSV = "text/csv"
+CONTENT_TYPES = (NDJSON, CSV)
+
+CSV_COLUMNS = ("line", "prediction", "confidence", "model_version", "error")
+
+# a line longer than this is treated as a broken stream, not buffered
+MAX_LINE_BYTES = 64 * 1024
+
+# (line number, parsed row or None, error message or None)
+_Entry = tuple[int, dict[str, Any] | None, str | None]
+
+
+class StreamFormatError(ValueError):
+    """The stream as a whole can't be read (not just one bad row)."""
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Split a byte stream into lines without holding more than one line."""
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line
+        if len(buffer) > MAX_LINE_BYTES:
+            raise StreamFormatError(f"Line longer than {MAX_LINE_BYTES} bytes")
+    if buffer:
+        yield buffer
+
+
+class _Parser:
+    """Turns lines into feature dicts, one format at a time."""
+
+    def __init__(self, kind: str, feature_names: list[str]):
+        self.kind = kind
+        self.feature_names = feature_names
+        self.header: list[str] | None = None
+
+    def parse(self, line: str) -> dict[str, Any] | None:
+        """Feature dict for a data line, or None for a CSV header line.
+
+        Raises ValueError (or TypeError) for a line that isn't a valid row.
+        """
+        if self.kind == NDJSON:
+            row = orjson.loads(line)
+            if isinstance(row, list):
+                if len(row) != len(self.feature_names):
+                    raise ValueError(
+                        f"Expected {len(self.feature_names)} values, got {len(row)}"
+                    )
+                return dict(zip(self.feature_names, row, strict=True))
+            if not isinstance(row, dict):
+                raise ValueError("Each line must be a JSON object or array")
+            return row
+
+        fields = next(csv.reader([line]))
+        if self.header is None:
+            self.header = [f.strip() for f in fields]
+            missing = set(self.feature_names) - set(self.header)
+            if missing:
+                raise StreamFormatError(f"CSV header is missing {sorted(missing)}")
+            return None
+        if len(fields) != len(self.header):
+            raise ValueError(f"Expected {len(self.header)} fields, got {len(fields)}")
+        values = dict(zip(self.header, fields, strict=True))
+        return {name: float(values[name]) for name in self.feature_names}
+
+
+def _encode(
+    kind: str, line: int, result: dict[str, Any] | None, error: str | None
+) -> bytes:
+    if kind == NDJSON:
+        if error is not None:
+            return orjson.dumps({"line": line, "error": error}) + b"\n"
+        return orjson.dumps(result) + b"\n"
+
+    result = result or {}
+    out = io.StringIO()
+    csv.writer(out, lineterminator="\n").writerow(
+        [line, *(result.get(col, "") for col in CSV_COLUMNS[1:4]), error or ""]
+    )
+    return out.getvalue().encode()
+
+
+async def _score_chunk(
+    entries: list[_Entry], score: BatchFn
+) -> list[tuple[dict[str, Any] | None, str | None]]:
+    """Score the parsed rows in a chunk, keeping errors in place."""
+    rows = [row for _, row, _ in entries if row is not None]
+    try:
+        results = iter(await score(rows)) if rows else iter([])
+    except ROW_ERRORS:
+        # one bad row shouldn't fail the chunk - score rows on their own
+        return [
+            await _score_one(row, score) if row is not None else (None, error)
+            for _, row, error in entries
+        ]
+    return [
+        (next(results), None) if row is not None else (None, error)
+        for _, row, error in entries
+    ]
+
+
+async def _score_one(
+    row: dict[str, Any], score: BatchFn
+) -> tuple[dict[str, Any] | None, str | None]:
+    try:
+        return (await score([row]))[0], None
+    except KeyError as e:
+        return None, f"Missing feature: {e}"
+    except ROW_ERRORS as e:
+        return None, str(e)
+
+
+async def score_stream(
+    chunks: AsyncIterator[bytes],
+    kind: str,
+    feature_names: list[str],
+    score: BatchFn,
+    chunk_rows: int = 1000,
+) -> AsyncIterator[bytes]:
+    """Score a streamed NDJSON or CSV body, yielding encoded results per chunk."""
+    parser = _Parser(kind, feature_names)
+    if kind == CSV:
+        yield (",".join(CSV_COLUMNS) + "\n").encode()
+
+    entries: list[_Entry] = []
+    line_no = 0
+
+    async def flush() -> bytes:
+        scored = await _score_chunk(entries, score)
+        out = b"".join(
+            _encode(kind, line, result, error)
+            for (line, _, _), (result, error) in zip(entries, scored, strict=True)
+        )
+        entries.clear()
+        return out
+
+    try:
+        async for raw in iter_lines(chunks):
+            line_no += 1
+            line = raw.decode("utf-8", errors="replace").strip()
+            if not line:
+                continue
+            try:
+                row = parser.parse(line)
+            except StreamFormatError:
+                raise
+            except ROW_ERRORS as e:
+                entries.append((line_no, None, f"Invalid row: {e}"))
+            else:
+                if row is not None:
+                    entries.append((line_no, row, None))
+
+            if len(entries) >= chunk_rows:
+                yield await flush()
+        if entries:
+            yield await flush()
+    except StreamFormatError as e:
+        # the status line is long gone - report it in-band and stop
+        logger.warning("Aborting scoring stream at line %d: %s", line_no, e)
+        if entries:
+            yield await flush()
+        yield _encode(kind, line_no, None, str(e))
+
+
+def retrying(score: BatchFn, max_delay: float = 1.0) -> BatchFn:
+    """Wrap score so a full executor makes the stream wait instead of fail.
+
+    A stream is work the service has already accepted, so when the
+    executor is saturated it backs off and retries the chunk. That slows
+    the client down through TCP backpressure rather than dropping the rows
+    it has already sent.
+    """
+
+    async def wrapped(rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        delay = 0.005
+        while True:
+            try:
+                return await score(rows)
+            except ExecutorSaturatedError:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, max_delay)
+
+    return wrapped
+
+
+class ScoringStreamResponse(StreamingResponse):
+    """StreamingResponse that leaves receive() to the request body.
+
+    Starlette's version watches for a client disconnect by reading receive()
+    alongside the body iterator, and that would swallow the request body
+    score_stream is still reading. Here the body iterator is the only
+    reader. A disconnect surfaces as ClientDisconnect from request.stream(),
+    or as a failed send once the input is done.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await self.stream_response(send)
+        except OSError:
+            raise ClientDisconnect() from None
+        if self.background is not None:
+            await self.background()
@@ -0,0 +1,145 @@
+"""Local on-disk cache of model versions pulled from the MLflow registry.
+
+Without it, every pod start downloads and unpickles the artifact and makes
+several registry round-trips. Cached versions are stored in the same pickle
+format training writes to models/model.pkl, so a hit loads with the plain
+IrisClassifier(path) constructor. The only registry call left is the one
+that says which version is current.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import pickle
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+MODEL_FILE = "model.pkl"
+META_FILE = "meta.json"
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ArtifactCache:
+    """Directory of cached model versions.
+
+    Each version lives in root/<key>/. The key is a hash of
+    (model name, version, run_id), so a re-registered version with a new
+    run never collides with an old entry. meta.json records those fields
+    plus the sha256 of model.pkl, and get() checks it before handing the
+    file out. A truncated or tampered file counts as a miss.
+
+    root/pins/ records which version was last served for each
+    (name, stage). pinned() uses that to start a pod when the registry
+    can't be reached.
+    """
+
+    def __init__(self, root: str | Path):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def key(model_name: str, version: str, run_id: str) -> str:
+        ident = "\0".join([model_name, str(version), run_id])
+        return hashlib.sha256(ident.encode()).hexdigest()[:32]
+
+    def get(self, model_name: str, version: str, run_id: str) -> Path | None:
+        """Path to the cached model.pkl, or None if absent or corrupt."""
+        entry = self.root / self.key(model_name, version, run_id)
+        try:
+            meta = json.loads((entry / META_FILE).read_text())
+            if _sha256(entry / MODEL_FILE) != meta["sha256"]:
+                logger.warning("Checksum mismatch in %s, ignoring entry", entry)
+                return None
+        except (OSError, ValueError, KeyError):
+            return None
+        return entry / MODEL_FILE
+
+    def put(
+        self,
+        model_name: str,
+        version: str,
+        run_id: str,
+        model: Any,
+        feature_names: list[str],
+        target_names: list[str],
+    ) -> Path:
+        """Write a version into the cache and return its model.pkl path."""
+        entry = self.root / self.key(model_name, version, run_id)
+
+        # build the entry in a scratch dir and rename it into place, so a
+        # crash or a second pod writing the same version never leaves a
+        # half-written entry behind
+        tmp = Path(tempfile.mkdtemp(dir=self.root, prefix=".tmp-"))
+        try:
+            with open(tmp / MODEL_FILE, "wb") as f:
+                pickle.dump(
+                    {
+                        "model": model,
+                        "feature_names": feature_names,
+                        "target_names": target_names,
+                        # SQL-backed registries give ints; served as str
+                        "version": str(version),
+                    },
+                    f,
+                )
+            meta = {
+                "model_name": model_name,
+                "version": str(version),
+                "run_id": run_id,
+                "sha256": _sha256(tmp / MODEL_FILE),
+            }
+            (tmp / META_FILE).write_text(json.dumps(meta))
+            os.rename(tmp, entry)
+        except OSError:
+            if not entry.exists():
+                raise
+            # someone else cached this version first - theirs is as good
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+        return entry / MODEL_FILE
+
+    def add_file(
+        self, model_name: str, version: str, run_id: str, source: Path
+    ) -> Path:
+        """Copy an extra artifact, like an exported model, into a cached entry.
+
+        It isn't covered by the checksum in meta.json. Backends that load
+        an export check it against the model when they're set up instead.
+        """
+        entry = self.root / self.key(model_name, version, run_id)
+        target = entry / source.name
+        tmp = entry / f".tmp-{os.getpid()}-{source.name}"
+        shutil.copyfile(source, tmp)
+        os.replace(tmp, target)
+        return target
+
+    def pin(self, model_name: str, stage: str, version: str, run_id: str) -> None:
+        """Remember that this version is the one being served for stage."""
+        pins = self.root / "pins"
+        pins.mkdir(exist_ok=True)
+        pin = pins / f"{self.key(model_name, stage, '')}.json"
+        tmp = pin.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"version": str(version), "run_id": run_id}))
+        os.replace(tmp, pin)
+
+    def pinned(self, model_name: str, stage: str) -> Path | None:
+        """Cached model.pkl last served for stage, if there is one."""
+        pin = self.root / "pins" / f"{self.key(model_name, stage, '')}.json"
+        try:
+            data = json.loads(pin.read_text())
+        except (OSError, ValueError):
+            return None
+        return self.get(model_name, data["version"], data["run_id"])
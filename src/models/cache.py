@@ -0,0 +1,113 @@
+"""Bounded LRU + TTL cache for prediction results.
+
+Real traffic repeats a small set of inputs a lot. For those, the result
+can be served from memory instead of running the model again. Entries are
+keyed on the ordered feature vector, optionally rounded so near-identical
+inputs share an entry. The cache only ever holds results from one model
+version: the first lookup under a new version clears it.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+import numpy as np
+
+from src.monitoring.metrics import PREDICTION_CACHE_EVICTIONS, record_cache_lookup
+
+CacheKey = tuple[float, ...]
+
+
+class PredictionCache:
+    """Thread-safe LRU cache with a per-entry time-to-live.
+
+    Args:
+        maxsize: most entries held before the least recently used is dropped
+        ttl_seconds: how long an entry stays valid after it was stored
+        round_digits: round features to this many decimals before keying,
+            or None to key on exact values
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 10_000,
+        ttl_seconds: float = 300.0,
+        round_digits: int | None = None,
+    ):
+        if maxsize < 1:
+            raise ValueError("maxsize must be >= 1")
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self.round_digits = round_digits
+        self._entries: OrderedDict[CacheKey, tuple[float, dict[str, Any]]] = (
+            OrderedDict()
+        )
+        self._version: str | None = None
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> dict[str, Any]:
+        # process workers get a pickled copy of the model, cache included
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def make_keys(self, X: np.ndarray) -> list[CacheKey]:
+        """One key per row of an ordered feature matrix."""
+        if self.round_digits is not None:
+            X = np.round(X, self.round_digits)
+        return [tuple(row) for row in X.tolist()]
+
+    def get(self, version: str, key: CacheKey) -> dict[str, Any] | None:
+        """Return the cached result, or None on a miss."""
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(key)
+            if entry is None:
+                record_cache_lookup(hit=False)
+                return None
+
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                PREDICTION_CACHE_EVICTIONS.labels(reason="ttl").inc()
+                record_cache_lookup(hit=False)
+                return None
+
+            self._entries.move_to_end(key)
+            record_cache_lookup(hit=True)
+            return value
+
+    def put(self, version: str, key: CacheKey, value: dict[str, Any]) -> None:
+        """Store a result, evicting the least recently used entry if full."""
+        with self._lock:
+            self._check_version(version)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                PREDICTION_CACHE_EVICTIONS.labels(reason="lru").inc()
+
+    def clear(self) -> None:
+        """Drop every entry, e.g. because a different model was loaded."""
+        with self._lock:
+            self._clear()
+
+    def _check_version(self, version: str) -> None:
+        if version != self._version:
+            self._clear()
+            self._version = version
+
+    def _clear(self) -> None:
+        if self._entries:
+            PREDICTION_CACHE_EVICTIONS.labels(reason="invalidated").inc(
+                len(self._entries)
+            )
+            self._entries.clear()
@@ -1,6 +1,8 @@
 """Abstract interface for ML models."""
 
+import pickle
 from abc import ABC, abstractmethod
+from collections.abc import Sequence
 from typing import Any
 
 
@@ -11,6 +13,9 @@ class ModelInterface(ABC):
     This keeps the API code decoupled from specific model details.
     """
 
+    # what runs inference, for models that can run in more than one way
+    backend = "default"
+
     @abstractmethod
     def predict(self, features: dict[str, Any]) -> dict[str, Any]:
         """Run inference on input features.
@@ -23,6 +28,61 @@ class ModelInterface(ABC):
         """
         pass
 
+    def predict_batch(self, rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Run inference on many rows at once.
+
+        The default just loops over predict(). Override it when the
+        underlying model can score a whole matrix in one call.
+
+        Args:
+            rows: list of feature dicts, same shape as predict() takes
+
+        Returns:
+            list of prediction dicts, one per input row, in order
+        """
+        return [self.predict(row) for row in rows]
+
+    def memory_bytes(self) -> int:
+        """Approximate memory this model holds, used for registry budgeting.
+
+        The default is the model's pickled size, which tracks in-memory size
+        closely for array-backed models. Override if that's a poor estimate
+        or the model can't be pickled.
+        """
+        try:
+            return len(pickle.dumps(self, protocol=pickle.HIGHEST_PROTOCOL))
+        except (pickle.PicklingError, TypeError, AttributeError):
+            return 0
+
+    def set_backend(self, backend: str) -> None:
+        """Switch what runs inference, e.g. to an exported form of the model.
+
+        The default only accepts the model's own backend. Override it for
+        models that can run on more than one.
+
+        Raises:
+            ValueError: if the backend is unknown or can't run this model
+        """
+        if backend != self.backend:
+            raise ValueError(f"{type(self).__name__} has no backend '{backend}'")
+
+    def warmup(
+        self, batch_sizes: Sequence[int] = (1,), iterations: int = 1
+    ) -> dict[int, list[float]]:
+        """Run synthetic batches so real requests don't pay for lazy setup.
+
+        The default does nothing. Override it for models that initialize
+        anything on first use.
+
+        Args:
+            batch_sizes: rows per synthetic batch, one round for each
+            iterations: how many times to run each batch size
+
+        Returns:
+            dict of batch_size -> seconds taken by each iteration
+        """
+        return {}
+
     @abstractmethod
     def get_model_info(self) -> dict[str, Any]:
         """Return model metadata.
@@ -2,27 +2,95 @@
 
 import logging
 import pickle
+import tempfile
 import time
+from collections import Counter
+from collections.abc import Callable, Sequence
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
-import mlflow
-import mlflow.sklearn
 import numpy as np
-from mlflow.tracking import MlflowClient
 
+from src.models import backends
+from src.models.artifact_cache import ArtifactCache
+from src.models.backends import OnnxModel
+from src.models.bundle import is_bundle, load_bundle, save_bundle
+from src.models.cache import PredictionCache
 from src.models.interface import ModelInterface
-from src.monitoring.metrics import INFERENCE_TIME, PREDICTION_COUNTER
+from src.models.resolver import RegistryResolver
+from src.models.shared import attach
+from src.models.tree_engine import CompiledForest
+from src.monitoring.drift import REFERENCE_FILE, DriftMonitor, load_reference
+from src.monitoring.metrics import (
+    record_inference,
+    record_predictions,
+    record_stage,
+)
+
+if TYPE_CHECKING:
+    from mlflow.tracking import MlflowClient
 
 logger = logging.getLogger(__name__)
 
 
+def _download_export(
+    client: "MlflowClient", run_id: str, name: str, directory: str
+) -> Path:
+    """Fetch an exported model that training logged next to the MLflow model."""
+    try:
+        return Path(client.download_artifacts(run_id, name, directory))
+    except Exception as e:
+        raise RuntimeError(f"Run {run_id} has no {name} artifact to serve") from e
+
+
+def _download_reference(client: "MlflowClient", run_id: str, directory: str) -> None:
+    """Fetch the run's drift reference profile into directory, if it has one."""
+    try:
+        client.download_artifacts(run_id, REFERENCE_FILE, directory)
+    except Exception:
+        logger.info("Run %s has no %s, drift monitoring is off", run_id, REFERENCE_FILE)
+
+
+def check_shared_backend(backend: str) -> None:
+    """Refuse a backend that a shared model (always compiled) can't stand in for.
+
+    sklearn is fine: the compiled forest gives the same probabilities.
+    """
+    if backend not in ("sklearn", "compiled"):
+        raise ValueError(
+            f"Shared models (MODEL_SHARED_DIR) are served by the compiled "
+            f"backend; backend {backend!r} can't be shared"
+        )
+
+
 class IrisClassifier(ModelInterface):
     """RandomForest classifier for Iris dataset."""
 
-    def __init__(self, model_path: str | Path):
+    # optional result cache in front of the model, see src/models/cache.py
+    cache: PredictionCache | None = None
+    # optional input/prediction drift tracking, see src/monitoring/drift.py
+    drift: DriftMonitor | None = None
+    # training profile the drift monitor compares against, if saved
+    reference: dict[str, Any] | None = None
+    # what scores a batch, set by set_backend() or _load_bundle()
+    _predict_proba: backends.PredictProba
+
+    def __init__(self, model_path: str | Path, backend: str | None = None):
+        """Load a model.pkl, or a bundle directory (see src/models/bundle.py).
+
+        backend defaults to "sklearn" for a pickle. A bundle has no sklearn
+        estimator, so "compiled" is its only backend.
+        """
         self.model_path = Path(model_path)
-        self._load_model()
+        if is_bundle(self.model_path):
+            self.artifact_dir: Path | None = self.model_path
+            self._load_bundle()
+            backend = backend or "compiled"
+        else:
+            # exported forms of the model (model.onnx, ...) sit next to the pickle
+            self.artifact_dir = self.model_path.parent
+            self._load_model()
+        self.set_backend(backend or "sklearn")
 
     def _load_model(self) -> None:
         """Load model from pickle file."""
@@ -32,22 +100,126 @@ class IrisClassifier(ModelInterface):
         self.model = data["model"]
         self.feature_names = list(data["feature_names"])
         self.target_names = list(data["target_names"])
-        self.version = data.get("version", "unknown")
+        # str even if an older cache entry pickled a registry int
+        self.version = str(data.get("version", "unknown"))
+        self.reference = load_reference(self.artifact_dir)
+
+    def _load_bundle(self) -> None:
+        """Map a bundle's node tables, without unpickling anything."""
+        forest, manifest = load_bundle(self.model_path)
+
+        self.model = None
+        self.feature_names = list(manifest["feature_names"])
+        self.target_names = list(manifest["target_names"])
+        self.version = str(manifest["version"])
+        self.reference = load_reference(self.artifact_dir)
+        self._predict_proba = forest.predict_proba
+        self.backend = "compiled"
 
     @classmethod
     def from_mlflow(
-        cls, tracking_uri: str, model_name: str, stage: str
+        cls,
+        tracking_uri: str,
+        model_name: str,
+        stage: str,
+        backend: str = "sklearn",
+        cache_dir: str | Path | None = None,
+        shared_dir: str | Path | None = None,
+        resolver: RegistryResolver | None = None,
     ) -> "IrisClassifier":
-        """Load model from MLflow model registry."""
+        """Load model from MLflow model registry.
+
+        stage is a stage name ("Production") or an exact version ("3").
+        With cache_dir set, versions are kept in a local ArtifactCache. A
+        version that's already cached loads from disk with no download, and
+        if the registry can't be reached at all, the version last served for
+        this stage is used instead.
+
+        With shared_dir set, the version is served through from_shared, so
+        only the first worker process on the machine actually loads it.
+        That serves the compiled backend, so backend must be "sklearn" or
+        "compiled" (ValueError otherwise).
+
+        Registry lookups go through resolver, normally the service's shared
+        RegistryResolver, so each one is bounded by its timeout. Without
+        one, this call gets a private resolver that caches nothing.
+        """
+        # mlflow's import graph costs seconds and tens of MB per worker, so
+        # it's only pulled in when the registry is actually used
+        import mlflow
+
+        if shared_dir is not None:
+            check_shared_backend(backend)
         mlflow.set_tracking_uri(tracking_uri)
-        client = MlflowClient(tracking_uri)
+        if resolver is None:
+            own = RegistryResolver(tracking_uri, ttl_seconds=0)
+            try:
+                return cls.from_mlflow(
+                    tracking_uri,
+                    model_name,
+                    stage,
+                    backend=backend,
+                    cache_dir=cache_dir,
+                    shared_dir=shared_dir,
+                    resolver=own,
+                )
+            finally:
+                own.close()
+        cache = ArtifactCache(cache_dir) if cache_dir else None
 
         # find the latest version at the requested stage
-        versions = client.get_latest_versions(model_name, stages=[stage])
-        if not versions:
-            raise RuntimeError(f"No model '{model_name}' found at stage '{stage}'")
+        try:
+            mv = resolver.version(model_name, stage)
+        except RuntimeError:
+            # registry answered: there's nothing at this stage
+            raise
+        except Exception:
+            pinned = cache.pinned(model_name, stage) if cache else None
+            if pinned is None:
+                raise
+            logger.warning(
+                "Registry unreachable, starting from cached %s", pinned, exc_info=True
+            )
+            return cls(pinned, backend=backend)
 
-        mv = versions[0]
+        if shared_dir is not None:
+            return cls.from_shared(
+                shared_dir,
+                ArtifactCache.key(model_name, mv.version, mv.run_id),
+                lambda: cls._load_version(resolver, cache, model_name, stage, mv),
+            )
+        return cls._load_version(resolver, cache, model_name, stage, mv, backend)
+
+    @classmethod
+    def _load_version(
+        cls,
+        resolver: RegistryResolver,
+        cache: ArtifactCache | None,
+        model_name: str,
+        stage: str,
+        mv: Any,
+        backend: str = "sklearn",
+    ) -> "IrisClassifier":
+        """Load a resolved registry version, through the cache if there is one."""
+        import mlflow.sklearn
+
+        client = resolver.client
+        if cache is not None:
+            cached = cache.get(model_name, mv.version, mv.run_id)
+            if cached is not None:
+                logger.info("Loading %s version %s from cache", model_name, mv.version)
+                export = backends.export_file(backend)
+                if export is not None and not (cached.parent / export).exists():
+                    # cached for another backend, only the export is missing
+                    with tempfile.TemporaryDirectory() as tmp:
+                        cache.add_file(
+                            model_name,
+                            mv.version,
+                            mv.run_id,
+                            _download_export(client, mv.run_id, export, tmp),
+                        )
+                cache.pin(model_name, stage, mv.version, mv.run_id)
+                return cls(cached, backend=backend)
         logger.info(
             "Loading %s version %s (stage=%s, run=%s)",
             model_name,
@@ -56,13 +228,15 @@ class IrisClassifier(ModelInterface):
             mv.run_id,
         )
 
-        # load the sklearn model
-        model_uri = f"models:/{model_name}/{stage}"
-        sklearn_model = mlflow.sklearn.load_model(model_uri)
+        # feature/target names come from run tags, fetched while the model
+        # downloads
+        tags_lookup = resolver.run_tags_future(mv.run_id)
 
-        # read feature/target names from run tags
-        run = client.get_run(mv.run_id)
-        tags = run.data.tags
+        # load the version resolved above, not the stage: the stage may have
+        # moved since, and the cache entry and reported version come from mv
+        model_uri = f"models:/{model_name}/{mv.version}"
+        sklearn_model = mlflow.sklearn.load_model(model_uri)
+        tags = resolver.wait(tags_lookup)
 
         feature_str = tags.get("feature_names")
         target_str = tags.get("target_names")
@@ -76,31 +250,230 @@ class IrisClassifier(ModelInterface):
         instance.model = sklearn_model
         instance.feature_names = feature_str.split(",")
         instance.target_names = target_str.split(",")
-        instance.version = mv.version
+        instance.version = str(mv.version)
+
+        export = backends.export_file(backend)
+        with tempfile.TemporaryDirectory() as tmp:
+            # the backend reads its export while it's set up, after which
+            # only a cached copy outlives this block
+            instance.artifact_dir = Path(tmp)
+            downloaded = []
+            if export is not None:
+                downloaded.append(_download_export(client, mv.run_id, export, tmp))
+            _download_reference(client, mv.run_id, tmp)
+            instance.reference = load_reference(instance.artifact_dir)
+            if instance.reference is not None:
+                downloaded.append(instance.artifact_dir / REFERENCE_FILE)
+            instance.set_backend(backend)
+            instance.artifact_dir = None
+
+            if cache is not None:
+                instance.model_path = cache.put(
+                    model_name,
+                    mv.version,
+                    mv.run_id,
+                    sklearn_model,
+                    instance.feature_names,
+                    instance.target_names,
+                )
+                for path in downloaded:
+                    cache.add_file(model_name, mv.version, mv.run_id, path)
+                instance.artifact_dir = instance.model_path.parent
+                cache.pin(model_name, stage, mv.version, mv.run_id)
         return instance
 
+    @classmethod
+    def from_shared(
+        cls,
+        shared_dir: str | Path,
+        key: str,
+        load: Callable[[], "IrisClassifier"],
+    ) -> "IrisClassifier":
+        """Serve a model from compiled tables shared by every worker process.
+
+        The first process to ask for key calls load(), compiles the result
+        and writes it as a bundle to shared_dir/key. Every process then
+        memory-maps those files read-only. The forest's memory is paid
+        once per machine, not once per worker, and workers after the first
+        never unpickle the estimator at all.
+
+        The instance has no sklearn estimator (model is None), so
+        "compiled" is its only backend.
+        """
+
+        def publish(directory: Path) -> None:
+            source = load()
+            save_bundle(
+                directory,
+                CompiledForest.from_sklearn(source.model),
+                source.feature_names,
+                source.target_names,
+                str(source.version),
+                source.reference,
+            )
+
+        return cls(attach(shared_dir, key, publish))
+
+    def set_backend(self, backend: str) -> None:
+        """Choose what runs predict_proba, see src/models/backends.py.
+
+        "sklearn" calls the estimator directly. "compiled" flattens the
+        forest into a CompiledForest, which gives the same probabilities
+        with far less per-call overhead. "onnx" runs the model.onnx export
+        next to the pickle on ONNX Runtime. Every backend but sklearn must
+        match the estimator's probabilities before it's used.
+        """
+        if self.model is None:
+            # a bundle, maybe through from_shared: no estimator to switch to
+            if backend != "compiled":
+                raise ValueError(
+                    "Bundled and shared models only support the compiled backend"
+                )
+            return
+        predict_proba = backends.create(backend, self.model, self.artifact_dir)
+        if backend != "sklearn":
+            backends.check_parity(predict_proba, self.model, len(self.feature_names))
+        self._predict_proba = predict_proba
+        self.backend = backend
+
+    def memory_bytes(self) -> int:
+        """Approximate memory held by the estimator and any compiled copy."""
+        size = 0
+        if self.model is not None:
+            size = len(pickle.dumps(self.model, protocol=pickle.HIGHEST_PROTOCOL))
+        engine = getattr(self._predict_proba, "__self__", None)
+        if isinstance(engine, CompiledForest | OnnxModel):
+            size += engine.nbytes
+        return size
+
+    def warmup(
+        self, batch_sizes: Sequence[int] = (1,), iterations: int = 1
+    ) -> dict[int, list[float]]:
+        """Score synthetic batches of each size through the backend.
+
+        The first calls pay for lazy setup in sklearn and NumPy and touch
+        the tree tables for the first time. Random rows send each batch
+        down different paths, not the one branch an all-zeros row takes.
+        Skips the prediction cache and metrics.
+        """
+        rng = np.random.default_rng(0)
+        timings: dict[int, list[float]] = {}
+        for size in batch_sizes:
+            # iris measurements are all within this range, in cm
+            X = rng.uniform(0.0, 8.0, size=(size, len(self.feature_names)))
+            timings[size] = []
+            for _ in range(iterations):
+                start = time.perf_counter()
+                proba = self._predict_proba(X)
+                np.argmax(proba, axis=1)
+                timings[size].append(time.perf_counter() - start)
+        return timings
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """Class probabilities for an ordered feature matrix.
+
+        Bypasses the prediction cache and metrics, for offline scoring
+        where neither applies. Columns follow target_names.
+        """
+        return np.asarray(self._predict_proba(X))
+
     def predict(self, features: dict[str, Any]) -> dict[str, Any]:
         """Run prediction on input features."""
-        # build feature array in correct order
-        X = np.array([[features[name] for name in self.feature_names]])
+        return self.predict_batch([features])[0]
+
+    def predict_batch(self, rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Run prediction on many rows with a single predict_proba call."""
+        if not rows:
+            return []
 
+        # build feature matrix in correct order
         start = time.perf_counter()
-        proba = self.model.predict_proba(X)[0]
-        pred_idx = np.argmax(proba)
-        elapsed = time.perf_counter() - start
+        X = np.array([[row[name] for name in self.feature_names] for row in rows])
+        record_stage("features", time.perf_counter() - start)
+        return self.predict_array(X)
 
-        predicted_class = self.target_names[pred_idx]
+    def predict_array(self, X: np.ndarray) -> list[dict[str, Any]]:
+        """Run prediction on a matrix whose columns are in feature_names order."""
+        if X.ndim != 2 or X.shape[1] != len(self.feature_names):
+            raise ValueError(
+                f"Expected rows of {len(self.feature_names)} features "
+                f"({', '.join(self.feature_names)}), got shape {X.shape}"
+            )
+        if len(X) == 0:
+            return []
 
-        # record prometheus metrics
-        INFERENCE_TIME.observe(elapsed)
-        PREDICTION_COUNTER.labels(predicted_class=predicted_class).inc()
+        if self.cache is None:
+            return self._score(X)
+        return self._score_cached(X, self.cache)
 
-        return {
-            "prediction": predicted_class,
-            "confidence": float(proba[pred_idx]),
-            "model_version": self.version,
-            "inference_time_ms": round(elapsed * 1000, 3),
-        }
+    def _score(self, X: np.ndarray) -> list[dict[str, Any]]:
+        """Run the model on an ordered feature matrix."""
+        start = time.perf_counter()
+        proba = self._predict_proba(X)
+        inferred = time.perf_counter()
+        elapsed = inferred - start
+
+        pred_idx = np.argmax(proba, axis=1)
+        counts = np.bincount(pred_idx, minlength=len(self.target_names))
+        inference_time_ms = round(elapsed * 1000, 3)
+        confidences = proba[np.arange(len(X)), pred_idx]
+        results = [
+            {
+                "prediction": self.target_names[idx],
+                "confidence": float(conf),
+                "model_version": self.version,
+                "inference_time_ms": inference_time_ms,
+            }
+            for idx, conf in zip(pred_idx, confidences, strict=True)
+        ]
+        postprocessed = time.perf_counter()
+
+        # record prometheus metrics - one observation per model call
+        record_inference(
+            elapsed,
+            {name: int(c) for name, c in zip(self.target_names, counts, strict=True)},
+        )
+        if self.drift is not None:
+            self.drift.observe(X, pred_idx, confidences)
+        record_stage("inference", elapsed)
+        record_stage("postprocess", postprocessed - inferred)
+        record_stage("metrics", time.perf_counter() - postprocessed)
+        return results
+
+    def _score_cached(
+        self, X: np.ndarray, cache: PredictionCache
+    ) -> list[dict[str, Any]]:
+        """Serve what we can from the cache, run the model on the rest."""
+        keys = cache.make_keys(X)
+        cached = [cache.get(self.version, key) for key in keys]
+
+        results: list[dict[str, Any]] = []
+        hits: Counter[str] = Counter()
+        for hit in cached:
+            if hit is not None:
+                # no model call happened for this row
+                results.append({**hit, "inference_time_ms": 0.0})
+                hits[hit["prediction"]] += 1
+            else:
+                results.append({})
+        record_predictions(hits)
+        if self.drift is not None and hits:
+            # drift counts every row served, not just the ones the model ran on
+            index = {name: i for i, name in enumerate(self.target_names)}
+            served = [(i, hit) for i, hit in enumerate(cached) if hit is not None]
+            self.drift.observe(
+                X[[i for i, _ in served]],
+                np.array([index[hit["prediction"]] for _, hit in served]),
+                np.array([hit["confidence"] for _, hit in served]),
+            )
+
+        misses = [i for i, hit in enumerate(cached) if hit is None]
+        if misses:
+            scored = self._score(X[misses])
+            for i, result in zip(misses, scored, strict=True):
+                cache.put(self.version, keys[i], result)
+                results[i] = result
+        return results
 
     def get_model_info(self) -> dict[str, Any]:
         """Return model metadata."""
@@ -0,0 +1,156 @@
+"""Loading the default serving model from the environment.
+
+Shared by the API and the offline scoring CLI (training/score.py), so both
+resolve the model the same way: the MLflow registry if MLFLOW_TRACKING_URI
+is set, otherwise the baked-in models/model.pkl. With MODEL_BACKEND=compiled
+the baked-in models/bundle is preferred, which loads without unpickling.
+"""
+
+import logging
+import os
+from pathlib import Path
+
+from src.models.bundle import is_bundle
+from src.models.interface import ModelInterface
+from src.models.iris_classifier import IrisClassifier, check_shared_backend
+from src.models.resolver import RegistryResolver
+from src.models.shared import file_key
+from src.monitoring.drift import DriftMonitor
+from src.monitoring.metrics import MODEL_WARMUP_SECONDS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_PATH = Path(__file__).parent.parent.parent / "models" / "model.pkl"
+DEFAULT_BUNDLE_PATH = DEFAULT_MODEL_PATH.with_name("bundle")
+
+
+def registry_settings() -> tuple[str | None, str, str]:
+    """MLflow tracking URI, registered model name and stage to serve."""
+    return (
+        os.environ.get("MLFLOW_TRACKING_URI"),
+        os.environ.get("MLFLOW_MODEL_NAME", "iris-classifier"),
+        os.environ.get("MLFLOW_MODEL_STAGE", "Production"),
+    )
+
+
+def make_resolver() -> RegistryResolver | None:
+    """The process's registry client, or None without MLFLOW_TRACKING_URI."""
+    mlflow_uri = registry_settings()[0]
+    if not mlflow_uri:
+        return None
+    return RegistryResolver(
+        mlflow_uri,
+        timeout_seconds=float(os.environ.get("REGISTRY_TIMEOUT_SECONDS", "5")),
+        max_workers=int(os.environ.get("REGISTRY_WORKERS", "4")),
+        ttl_seconds=float(os.environ.get("REGISTRY_METADATA_TTL_SECONDS", "10")),
+    )
+
+
+def warmup_settings() -> tuple[list[int], int]:
+    """Batch sizes and iterations per size for warming up a loaded model.
+
+    WARMUP_BATCH_SIZES="" turns warmup off.
+    """
+    sizes = os.environ.get("WARMUP_BATCH_SIZES", "1,8,64")
+    iterations = max(int(os.environ.get("WARMUP_ITERATIONS", "3")), 1)
+    return [int(size) for size in sizes.split(",") if size.strip()], iterations
+
+
+def warm_up(model: ModelInterface) -> None:
+    """Warm `model` up per warmup_settings(), publishing how long it took."""
+    batch_sizes, iterations = warmup_settings()
+    timings = model.warmup(batch_sizes, iterations)
+    for size, passes in timings.items():
+        MODEL_WARMUP_SECONDS.labels(batch_size=str(size)).set(passes[0])
+    if timings:
+        # first pass is what a cold request would have paid, last is steady
+        logger.info(
+            "Warmup: %s",
+            ", ".join(
+                f"{size} rows {passes[0] * 1000:.1f}ms -> {passes[-1] * 1000:.1f}ms"
+                for size, passes in timings.items()
+            ),
+        )
+
+
+def attach_drift(model: IrisClassifier) -> None:
+    """Give `model` a drift monitor, if it was trained with a reference profile.
+
+    DRIFT_MONITOR_ENABLED=false turns this off. The monitor's scores are
+    only exported once it's passed to drift.activate().
+    """
+    if os.environ.get("DRIFT_MONITOR_ENABLED", "true").lower() != "true":
+        return
+    if model.reference is None:
+        logger.info("Model %s has no reference profile, no drift scores", model.version)
+        return
+    monitor = DriftMonitor(
+        model.reference,
+        half_life_rows=float(os.environ.get("DRIFT_HALF_LIFE_ROWS", "5000")),
+    )
+    if (monitor.feature_names, monitor.class_names) != (
+        model.feature_names,
+        model.target_names,
+    ):
+        logger.warning(
+            "Reference profile doesn't match model %s, ignored", model.version
+        )
+        return
+    model.drift = monitor
+
+
+def load_model(resolver: RegistryResolver | None = None) -> IrisClassifier | None:
+    """Try the MLflow registry first, fall back to the baked-in pickle.
+
+    Raises:
+        ValueError: MODEL_SHARED_DIR is set with a backend it can't serve
+    """
+    mlflow_uri, model_name, model_stage = registry_settings()
+    backend = os.environ.get("MODEL_BACKEND", "sklearn")
+    if os.environ.get("MODEL_SHARED_DIR"):
+        # before the MLflow attempt, whose errors only mean "use the pickle"
+        check_shared_backend(backend)
+
+    # try MLflow first
+    if mlflow_uri:
+        try:
+            loaded = IrisClassifier.from_mlflow(
+                mlflow_uri,
+                model_name,
+                model_stage,
+                backend=backend,
+                cache_dir=os.environ.get("MODEL_CACHE_DIR"),
+                shared_dir=os.environ.get("MODEL_SHARED_DIR"),
+                resolver=resolver,
+            )
+            logger.info(
+                "Loaded model from MLflow registry: %s version %s",
+                model_name,
+                loaded.version,
+            )
+            return loaded
+        except Exception:
+            logger.exception("Failed to load from MLflow, falling back to pickle")
+
+    # the bundle is the compiled backend's tables, already on disk; being
+    # memory-mapped, its pages are shared between workers without a shared dir
+    if backend == "compiled" and is_bundle(DEFAULT_BUNDLE_PATH):
+        logger.info("Loading model bundle %s", DEFAULT_BUNDLE_PATH)
+        return IrisClassifier(DEFAULT_BUNDLE_PATH)
+
+    # fall back to pickle
+    model_path = DEFAULT_MODEL_PATH
+    if model_path.exists():
+        shared_dir = os.environ.get("MODEL_SHARED_DIR")
+        if shared_dir:
+            logger.info("Attaching to %s via shared dir %s", model_path, shared_dir)
+            return IrisClassifier.from_shared(
+                shared_dir,
+                file_key(model_path),
+                lambda: IrisClassifier(model_path),
+            )
+        logger.info("Loading model from %s (backend=%s)", model_path, backend)
+        return IrisClassifier(model_path, backend=backend)
+
+    logger.warning("No model found — tried MLflow and %s", model_path)
+    return None
@@ -0,0 +1,139 @@
+"""In-process registry for serving several models from one pod.
+
+Each model variant used to need its own deployment, which meant a full
+Python runtime per variant for a few MB of trees. The registry keeps
+several ModelInterface instances, keyed by (name, version), in one
+process. It loads them on first use and drops the least recently used
+ones when their combined footprint goes over a memory budget. A dropped
+model is just loaded again the next time it's asked for.
+"""
+
+import asyncio
+import logging
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Any
+
+from src.models.interface import ModelInterface
+from src.monitoring.metrics import (
+    MODEL_REGISTRY_EVICTIONS,
+    MODEL_REGISTRY_LOADS,
+    MODEL_REGISTRY_MEMORY,
+    MODEL_REGISTRY_MODELS,
+)
+
+logger = logging.getLogger(__name__)
+
+Key = tuple[str, str]
+Loader = Callable[[str, str], ModelInterface]
+
+
+class ModelNotFoundError(LookupError):
+    """Raised by a loader when the requested name/version doesn't exist."""
+
+
+class ModelRegistry:
+    """LRU set of loaded models under a memory budget.
+
+    Args:
+        loader: called as loader(name, version) in a worker thread to load
+            a model that isn't resident. Should raise ModelNotFoundError for
+            names/versions that don't exist.
+        memory_budget_bytes: evict least recently used models once the
+            total of their memory_bytes() goes over this
+
+    Pinned models (the service's default model) count toward the budget
+    but are never evicted.
+    """
+
+    def __init__(self, loader: Loader, memory_budget_bytes: int):
+        self.loader = loader
+        self.memory_budget_bytes = memory_budget_bytes
+        self._models: OrderedDict[Key, ModelInterface] = OrderedDict()
+        self._sizes: dict[Key, int] = {}
+        self._pinned: set[Key] = set()
+        self._loading: dict[Key, asyncio.Task[ModelInterface]] = {}
+
+    @property
+    def memory_bytes(self) -> int:
+        return sum(self._sizes.values())
+
+    def __contains__(self, key: Key) -> bool:
+        return key in self._models
+
+    async def get(self, name: str, version: str) -> ModelInterface:
+        """Return a loaded model, loading it first if it isn't resident."""
+        key = (name, version)
+        found = self._models.get(key)
+        if found is not None:
+            self._models.move_to_end(key)
+            return found
+
+        # several requests for the same cold model share one load, run as
+        # its own task so a caller that disconnects doesn't cancel it
+        task = self._loading.get(key)
+        if task is None:
+            task = asyncio.create_task(self._load(key))
+            self._loading[key] = task
+        return await asyncio.shield(task)
+
+    async def _load(self, key: Key) -> ModelInterface:
+        try:
+            loaded = await asyncio.to_thread(self.loader, *key)
+            MODEL_REGISTRY_LOADS.inc()
+            self.put(*key, loaded)
+            return loaded
+        finally:
+            del self._loading[key]
+
+    def put(
+        self, name: str, version: str, model: ModelInterface, pinned: bool = False
+    ) -> None:
+        """Add (or replace) a model, then evict down to the budget."""
+        key = (name, version)
+        self._models[key] = model
+        self._models.move_to_end(key)
+        self._sizes[key] = model.memory_bytes()
+        if pinned:
+            self._pinned.add(key)
+        logger.info(
+            "Registry holds %s/%s (%.1f MB)", name, version, self._sizes[key] / 1e6
+        )
+        self._evict(keep=key)
+
+    def unpin(self, name: str, version: str) -> None:
+        """Make a pinned model evictable again, e.g. after a hot reload."""
+        self._pinned.discard((name, version))
+        self._evict()
+
+    def describe(self) -> list[dict[str, Any]]:
+        """Loaded models, least recently used first."""
+        return [
+            {
+                "name": name,
+                "version": version,
+                "memory_bytes": self._sizes[(name, version)],
+                "pinned": (name, version) in self._pinned,
+            }
+            for name, version in self._models
+        ]
+
+    def _evict(self, keep: Key | None = None) -> None:
+        for key in list(self._models):
+            if self.memory_bytes <= self.memory_budget_bytes:
+                break
+            if key in self._pinned or key == keep:
+                continue
+            del self._models[key]
+            freed = self._sizes.pop(key)
+            MODEL_REGISTRY_EVICTIONS.inc()
+            logger.info("Evicted %s/%s (%.1f MB)", *key, freed / 1e6)
+
+        if self.memory_bytes > self.memory_budget_bytes:
+            logger.warning(
+                "Registry over budget (%.1f / %.1f MB) with nothing left to evict",
+                self.memory_bytes / 1e6,
+                self.memory_budget_bytes / 1e6,
+            )
+        MODEL_REGISTRY_MEMORY.set(self.memory_bytes)
+        MODEL_REGISTRY_MODELS.set(len(self._models))
@@ -0,0 +1,219 @@
+"""Bounded, cached model-version lookups against the MLflow registry.
+
+MlflowClient calls block, and MLflow's own HTTP retries can keep one
+going for minutes when the registry is down. RegistryResolver runs them
+on a small pool of its own threads (REGISTRY_WORKERS), with one client
+and its connection pool shared by every lookup, and gives up waiting
+after REGISTRY_TIMEOUT_SECONDS. A stuck call keeps its worker, but
+nobody waits on it, not the event loop, not startup, not a reload.
+
+Lookups are cached:
+
+- which version a stage points at, for REGISTRY_METADATA_TTL_SECONDS.
+  Reloads ask with fresh=True, so a promotion is never missed because of
+  it; the cache saves the second lookup when that reload then loads the
+  version, and lets live and shadow stages be resolved together at
+  startup.
+- exact version numbers and run tags, for good: neither changes once
+  written.
+- failures, for the TTL too, so an unreachable registry costs one
+  timeout per TTL rather than one per caller.
+
+Concurrent lookups of the same thing share one request.
+"""
+
+import asyncio
+import logging
+import math
+import threading
+import time
+from collections.abc import Callable, Iterable
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from mlflow.tracking import MlflowClient
+
+logger = logging.getLogger(__name__)
+
+
+class RegistryTimeoutError(TimeoutError):
+    """The registry didn't answer within the resolver's timeout."""
+
+
+def _resolve_version(client: "MlflowClient", model_name: str, stage: str) -> Any:
+    """Registry entry for model_name at a stage, or at an exact version number."""
+    if stage.isdigit():
+        from mlflow.exceptions import MlflowException
+
+        try:
+            return client.get_model_version(model_name, stage)
+        except MlflowException as e:
+            if e.error_code == "RESOURCE_DOES_NOT_EXIST":
+                raise RuntimeError(
+                    f"No model '{model_name}' found at version {stage}"
+                ) from e
+            raise
+
+    versions = client.get_latest_versions(model_name, stages=[stage])
+    if not versions:
+        raise RuntimeError(f"No model '{model_name}' found at stage '{stage}'")
+    return versions[0]
+
+
+def _run_tags(client: "MlflowClient", run_id: str) -> dict[str, str]:
+    return dict(client.get_run(run_id).data.tags)
+
+
+class RegistryResolver:
+    """Registry metadata for one tracking URI, with a timeout on every wait.
+
+    Every lookup has a blocking form, for code already off the event loop
+    (from_mlflow runs in a worker thread), and an async one.
+    """
+
+    def __init__(
+        self,
+        tracking_uri: str,
+        timeout_seconds: float = 5.0,
+        max_workers: int = 4,
+        ttl_seconds: float = 10.0,
+    ):
+        self.tracking_uri = tracking_uri
+        self.timeout_seconds = timeout_seconds
+        self.ttl_seconds = ttl_seconds
+        self._pool = ThreadPoolExecutor(max_workers, thread_name_prefix="registry")
+        self._client: MlflowClient | None = None
+        # key -> (lookup, monotonic time it stops being reused)
+        self._entries: dict[tuple[str, ...], tuple[Future[Any], float]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def client(self) -> "MlflowClient":
+        """The shared client, also used for artifact downloads."""
+        with self._lock:
+            if self._client is None:
+                from mlflow.tracking import MlflowClient
+
+                self._client = MlflowClient(self.tracking_uri)
+            return self._client
+
+    def version(self, model_name: str, stage: str, fresh: bool = False) -> Any:
+        """Registry entry at a stage ("Production") or exact version ("3").
+
+        fresh=True skips a cached answer, but still joins a lookup that's
+        already in flight.
+
+        Raises:
+            RuntimeError: the registry has nothing there
+            RegistryTimeoutError: no answer within timeout_seconds
+        """
+        return self.wait(self._version(model_name, stage, fresh))
+
+    async def version_async(
+        self, model_name: str, stage: str, fresh: bool = False
+    ) -> Any:
+        """version(), without blocking the event loop."""
+        return await self._wait_async(self._version(model_name, stage, fresh))
+
+    def run_tags(self, run_id: str) -> dict[str, str]:
+        """Tags of the run a version was trained in."""
+        tags: dict[str, str] = self.wait(self.run_tags_future(run_id))
+        return tags
+
+    def run_tags_future(self, run_id: str) -> "Future[dict[str, str]]":
+        """Start fetching a run's tags; wait with wait()."""
+        return self._lookup(("run", run_id), True, False, _run_tags, run_id)
+
+    async def prefetch(self, lookups: Iterable[tuple[str, str]]) -> None:
+        """Resolve several (model name, stage) pairs at once into the cache.
+
+        Failures are only logged; they're cached like any other answer, so
+        whoever asks next gets the same error without another wait.
+        """
+        lookups = list(lookups)
+        results = await asyncio.gather(
+            *(self.version_async(name, stage) for name, stage in lookups),
+            return_exceptions=True,
+        )
+        for (name, stage), result in zip(lookups, results, strict=True):
+            if isinstance(result, Exception):
+                logger.warning("Couldn't resolve %s at %s: %s", name, stage, result)
+
+    def close(self) -> None:
+        """Stop taking lookups; calls still running finish in the background."""
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _version(self, model_name: str, stage: str, fresh: bool) -> "Future[Any]":
+        return self._lookup(
+            ("version", model_name, stage),
+            stage.isdigit(),
+            fresh,
+            _resolve_version,
+            model_name,
+            stage,
+        )
+
+    def _lookup(
+        self,
+        key: tuple[str, ...],
+        immutable: bool,
+        fresh: bool,
+        fetch: Callable[..., Any],
+        *args: Any,
+    ) -> "Future[Any]":
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                future, expires = entry
+                if not future.done() or (now < expires and not fresh):
+                    return future
+            future = self._pool.submit(self._fetch, fetch, *args)
+            self._entries[key] = (future, math.inf)
+        future.add_done_callback(lambda done: self._settle(key, done, immutable))
+        return future
+
+    def _fetch(self, fetch: Callable[..., Any], *args: Any) -> Any:
+        return fetch(self.client, *args)
+
+    def _settle(
+        self, key: tuple[str, ...], future: "Future[Any]", immutable: bool
+    ) -> None:
+        """Set how long a finished lookup is reused."""
+        failed = future.cancelled() or future.exception() is not None
+        expires = (
+            math.inf
+            if immutable and not failed
+            else time.monotonic() + self.ttl_seconds
+        )
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] is future:
+                self._entries[key] = (future, expires)
+
+    def wait(self, future: "Future[Any]") -> Any:
+        """Result of a lookup started with one of the *_future methods."""
+        try:
+            return future.result(timeout=self.timeout_seconds)
+        except TimeoutError:
+            if future.done():
+                # the lookup itself timed out, e.g. an HTTP timeout
+                raise
+            raise self._timed_out() from None
+
+    async def _wait_async(self, future: "Future[Any]") -> Any:
+        # shielded: a caller giving up mustn't cancel a lookup others share
+        wrapped = asyncio.wrap_future(future)
+        try:
+            return await asyncio.wait_for(asyncio.shield(wrapped), self.timeout_seconds)
+        except TimeoutError:
+            if future.done():
+                raise
+            raise self._timed_out() from None
+
+    def _timed_out(self) -> RegistryTimeoutError:
+        return RegistryTimeoutError(
+            f"MLflow registry at {self.tracking_uri} didn't answer "
+            f"within {self.timeout_seconds:g}s"
+        )
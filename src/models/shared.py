@@ -0,0 +1,63 @@
+"""Publish-once, attach-everywhere storage for worker processes.
+
+With several uvicorn/gunicorn workers, each one normally unpickles its own
+copy of the model, so memory grows linearly with the worker count. Here the
+first worker to load a given model writes it into a shared directory
+(ideally tmpfs, e.g. /dev/shm). Every worker, that one included, then maps
+the files read-only. The kernel keeps one copy of the pages no matter how
+many processes map them.
+"""
+
+import fcntl
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+from collections.abc import Callable
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+def attach(shared_dir: str | Path, key: str, publish: Callable[[Path], None]) -> Path:
+    """Directory holding the published files for key.
+
+    If nothing is published under key yet, publish(tmp_dir) is called to
+    write the files, and tmp_dir is renamed into place. A file lock makes
+    sure only one process publishes while the others wait and then reuse
+    its result. The rename means a reader never sees a half-written entry.
+    """
+    root = Path(shared_dir)
+    root.mkdir(parents=True, exist_ok=True)
+    entry = root / key
+    if entry.exists():
+        return entry
+
+    with open(root / f".{key}.lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        if entry.exists():
+            # another worker published while we waited for the lock
+            return entry
+
+        tmp = Path(tempfile.mkdtemp(dir=root, prefix=".tmp-"))
+        try:
+            publish(tmp)
+            os.rename(tmp, entry)
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+        logger.info("Published shared model %s", entry)
+
+    return entry
+
+
+def file_key(path: str | Path) -> str:
+    """Shared-dir key for a model file, from its location, size and mtime.
+
+    Cheap enough to compute in every worker. Replacing the file changes
+    the key, so a new model never attaches to the old one's tables.
+    """
+    path = Path(path).resolve()
+    stat = path.stat()
+    ident = "\0".join([str(path), str(stat.st_size), str(stat.st_mtime_ns)])
+    return hashlib.sha256(ident.encode()).hexdigest()[:32]
@@ -0,0 +1,311 @@
+"""Online input and prediction drift against the model's training profile.
+
+training/train_iris.py saves a reference profile next to the model
+(reference.json): for every feature, histogram bin edges at the training
+deciles with the share of training rows in each bin, plus mean and
+standard deviation; the same kind of histogram for the confidence of
+out-of-fold predictions; and the share of each predicted class.
+
+DriftMonitor keeps the live counterpart in constant memory: one count per
+bin and running sums per feature, updated with a handful of vectorized
+NumPy calls per scored batch, whatever its size. Older traffic fades out
+with a half-life of DRIFT_HALF_LIFE_ROWS rows, so the scores describe
+recent traffic rather than everything since startup.
+
+Scores are computed when metrics are flushed (on scrape, or on the
+METRICS_FLUSH_SECONDS timer), not per request:
+
+- model_drift_psi{signal}: population stability index of each feature,
+  of "confidence" and of "predicted_class". Under 0.1 is usually read as
+  no shift, over 0.25 as a large one.
+- model_drift_mean_shift{feature}: live mean minus training mean, in
+  training standard deviations.
+- model_drift_std_ratio{feature}: live standard deviation over the
+  training one.
+- model_drift_window_rows: rows the scores are based on, after decay.
+"""
+
+import json
+import threading
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from src.monitoring import metrics
+
+REFERENCE_FILE = "reference.json"
+
+# added to empty bins so PSI stays finite
+_EPSILON = 1e-4
+
+
+def psi(expected: np.ndarray, actual: np.ndarray) -> float:
+    """Population stability index between two histograms of bin shares."""
+    e = np.maximum(expected, _EPSILON)
+    a = np.maximum(actual, _EPSILON)
+    return float(np.sum((a - e) * np.log(a / e)))
+
+
+def load_reference(directory: Path | None) -> dict[str, Any] | None:
+    """reference.json from a model directory, or None if there isn't one."""
+    if directory is None:
+        return None
+    try:
+        reference: dict[str, Any] = json.loads((directory / REFERENCE_FILE).read_text())
+    except FileNotFoundError:
+        return None
+    return reference
+
+
+class DriftCounts:
+    """Additive live counts: bin counts, running sums and a row count.
+
+    Picklable, so a process-pool worker can hand what it saw back to the
+    parent, like metrics.PendingMetrics.
+    """
+
+    __slots__ = (
+        "features",
+        "present",
+        "sums",
+        "squares",
+        "confidence",
+        "classes",
+        "rows",
+    )
+
+    def __init__(self, n_bins: int, n_features: int, n_conf: int, n_classes: int):
+        self.features = np.zeros(n_bins)
+        # finite values seen per feature; NaN and inf are left out of the
+        # feature histograms and moments, which are taken over these
+        self.present = np.zeros(n_features)
+        self.sums = np.zeros(n_features)
+        self.squares = np.zeros(n_features)
+        self.confidence = np.zeros(n_conf)
+        self.classes = np.zeros(n_classes)
+        self.rows = 0.0
+
+    def empty_like(self) -> "DriftCounts":
+        return DriftCounts(
+            len(self.features), len(self.sums), len(self.confidence), len(self.classes)
+        )
+
+    def add(self, other: "DriftCounts", scale: float = 1.0) -> None:
+        """self = self * scale + other, in place."""
+        for name in self.__slots__:
+            setattr(self, name, getattr(self, name) * scale + getattr(other, name))
+
+
+class DriftMonitor:
+    """Streaming summaries of live traffic, compared with a reference profile.
+
+    observe() only adds to pending counts under a lock, once per batch.
+    Decay and scoring happen in scores(), which folds the pending counts
+    into the decayed window first.
+    """
+
+    def __init__(self, reference: dict[str, Any], half_life_rows: float = 5000):
+        self.feature_names = list(reference["features"])
+        self.class_names = list(reference["predicted_class"])
+        self.half_life_rows = half_life_rows
+
+        profiles = [reference["features"][name] for name in self.feature_names]
+        # one row of edges per feature, padded with +inf so a single
+        # broadcast comparison bins every feature at once
+        width = max(len(p["edges"]) for p in profiles)
+        self._edges = np.full((len(profiles), width), np.inf)
+        sizes = []
+        for i, profile in enumerate(profiles):
+            self._edges[i, : len(profile["edges"])] = profile["edges"]
+            sizes.append(len(profile["edges"]) + 1)
+        # feature i's bins sit at offsets[i]:offsets[i] + sizes[i] in one array
+        self._offsets = np.cumsum([0, *sizes[:-1]])
+        self._slices = [
+            slice(start, start + size)
+            for start, size in zip(self._offsets, sizes, strict=True)
+        ]
+        self._expected = [np.asarray(p["fractions"]) for p in profiles]
+        self._means = np.array([p["mean"] for p in profiles])
+        self._stds = np.array([p["std"] for p in profiles])
+
+        self._conf_edges = np.asarray(reference["confidence"]["edges"])
+        self._conf_expected = np.asarray(reference["confidence"]["fractions"])
+        self._class_expected = np.array(
+            [reference["predicted_class"][name] for name in self.class_names]
+        )
+
+        self._pending = DriftCounts(
+            sum(sizes),
+            len(profiles),
+            len(self._conf_expected),
+            len(self.class_names),
+        )
+        self._window = self._pending.empty_like()
+        self._conf_offset = sum(sizes)
+        self._class_offset = self._conf_offset + len(self._conf_expected)
+        self._n_counts = self._class_offset + len(self.class_names)
+        self._lock = threading.Lock()
+
+    def observe(
+        self, X: np.ndarray, pred_idx: np.ndarray, confidences: np.ndarray
+    ) -> None:
+        """Count one scored batch. Columns of X follow the reference's features.
+
+        Non-finite values (the fast path turns a JSON null into NaN) are
+        only counted as absent: once in a decayed sum, a NaN would never
+        leave it.
+        """
+        finite = np.isfinite(X)
+        bins = (X[:, :, np.newaxis] >= self._edges).sum(axis=2) + self._offsets
+        # non-finite values go to one slot past the end, dropped below
+        bins = np.where(finite, bins, self._n_counts)
+        conf = np.searchsorted(self._conf_edges, confidences, side="right")
+        # every histogram in one bincount: feature bins, then confidence
+        # bins, then classes
+        counts = np.bincount(
+            np.concatenate(
+                [bins.ravel(), conf + self._conf_offset, pred_idx + self._class_offset]
+            ),
+            minlength=self._n_counts + 1,
+        )
+        X = np.where(finite, X, 0.0)
+        sums = X.sum(axis=0)
+        squares = np.einsum("ij,ij->j", X, X)
+        present = finite.sum(axis=0)
+        with self._lock:
+            pending = self._pending
+            pending.features += counts[: self._conf_offset]
+            pending.confidence += counts[self._conf_offset : self._class_offset]
+            pending.classes += counts[self._class_offset : self._n_counts]
+            pending.present += present
+            pending.sums += sums
+            pending.squares += squares
+            pending.rows += len(X)
+
+    def drain(self) -> DriftCounts:
+        """Everything observed since the last drain, or since the last scores()."""
+        with self._lock:
+            pending, self._pending = self._pending, self._pending.empty_like()
+        return pending
+
+    def merge(self, counts: DriftCounts) -> None:
+        """Add counts observed elsewhere, e.g. drained in a process-pool worker."""
+        with self._lock:
+            self._pending.add(counts)
+
+    def scores(self) -> dict[str, Any]:
+        """Fold pending counts into the window and score it against the reference.
+
+        Returns:
+            dict with "psi" (signal -> PSI), "mean_shift" and "std_ratio"
+            (feature -> value) and "rows"; empty if nothing was observed yet
+        """
+        with self._lock:
+            pending, self._pending = self._pending, self._pending.empty_like()
+            # decay by the rows that arrived since the last fold, all at once
+            window = self._window
+            window.add(pending, scale=0.5 ** (pending.rows / self.half_life_rows))
+            rows = window.rows
+            if rows <= 0:
+                return {}
+            # features with no finite values in the window aren't scored
+            seen = window.present > 0
+            present = np.where(seen, window.present, 1.0)
+            features = window.features.copy()
+            for i, bins in enumerate(self._slices):
+                features[bins] /= present[i]
+            means = window.sums / present
+            variances = np.maximum(window.squares / present - np.square(means), 0.0)
+            confidence = window.confidence / rows
+            classes = window.classes / rows
+
+        scores = {
+            name: psi(expected, features[bins])
+            for name, expected, bins, ok in zip(
+                self.feature_names, self._expected, self._slices, seen, strict=True
+            )
+            if ok
+        }
+        scores["confidence"] = psi(self._conf_expected, confidence)
+        scores["predicted_class"] = psi(self._class_expected, classes)
+        stds = np.where(self._stds > 0, self._stds, 1.0)
+        return {
+            "psi": scores,
+            "mean_shift": self._by_feature((means - self._means) / stds, seen),
+            "std_ratio": self._by_feature(np.sqrt(variances) / stds, seen),
+            "rows": rows,
+        }
+
+    def _by_feature(self, values: np.ndarray, seen: np.ndarray) -> dict[str, float]:
+        return {
+            name: value
+            for name, value, ok in zip(
+                self.feature_names, values.tolist(), seen, strict=True
+            )
+            if ok
+        }
+
+    def __getstate__(self) -> dict[str, Any]:
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+
+# the monitor for the serving model, published by publish()
+_active: DriftMonitor | None = None
+
+# signals and features publish() has set gauges for in this process
+_published: tuple[set[str], set[str]] = (set(), set())
+
+
+def activate(monitor: DriftMonitor | None) -> None:
+    """Make `monitor` the one whose scores are exported.
+
+    The previous monitor's scores stop being exported. With
+    PROMETHEUS_MULTIPROC_DIR set, labelled series can't be removed from
+    the per-process files (clear() only warns there), so this process's
+    are set to their no-drift values until the new monitor publishes.
+    """
+    global _active
+    _active = monitor
+    signals, features = _published
+    if metrics.multiprocess():
+        for signal in signals:
+            metrics.MODEL_DRIFT_PSI.labels(signal=signal).set(0.0)
+        for feature in features:
+            metrics.MODEL_DRIFT_MEAN_SHIFT.labels(feature=feature).set(0.0)
+            metrics.MODEL_DRIFT_STD_RATIO.labels(feature=feature).set(1.0)
+    else:
+        metrics.MODEL_DRIFT_PSI.clear()
+        metrics.MODEL_DRIFT_MEAN_SHIFT.clear()
+        metrics.MODEL_DRIFT_STD_RATIO.clear()
+        signals.clear()
+        features.clear()
+    metrics.MODEL_DRIFT_WINDOW_ROWS.set(0)
+
+
+def publish() -> None:
+    """Score the active monitor into the drift gauges."""
+    if _active is None:
+        return
+    scores = _active.scores()
+    if not scores:
+        return
+    signals, features = _published
+    for signal, value in scores["psi"].items():
+        metrics.MODEL_DRIFT_PSI.labels(signal=signal).set(value)
+        signals.add(signal)
+    for feature, shift in scores["mean_shift"].items():
+        metrics.MODEL_DRIFT_MEAN_SHIFT.labels(feature=feature).set(shift)
+        features.add(feature)
+    for feature, ratio in scores["std_ratio"].items():
+        metrics.MODEL_DRIFT_STD_RATIO.labels(feature=feature).set(ratio)
+    metrics.MODEL_DRIFT_WINDOW_ROWS.set(scores["rows"])
+
+
+metrics.add_flush_hook(publish)
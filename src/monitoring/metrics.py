@@ -1,22 +1,531 @@
-"""Prometheus metrics for model serving."""
+"""Prometheus metrics for model serving.
+
+The per-prediction metrics (inference time, stage timings, predictions by
+class, cache lookups) are hot: every request records several of them, and
+prometheus_client takes a lock and walks the bucket list per observation.
+By default (METRICS_MODE=aggregated) the record_* functions only bump
+plain per-thread Python counts, without taking a lock, and those are
+flushed into the real metrics in bulk whenever /metrics is scraped.
+METRICS_MODE=direct records each observation straight into
+prometheus_client instead.
+
+prometheus_client has no bulk observe() for histograms, so the flush
+adds to the bucket and sum values Histogram.observe() would. Those are
+internals, checked once at import. If they ever change, everything is
+recorded as with METRICS_MODE=direct, and what process-pool workers send
+back is replayed one observe() at a time (see _observe_each).
+
+With PROMETHEUS_MULTIPROC_DIR set, /metrics reads every worker's values
+from disk, so a scrape only reaches one process. The serving app flushes
+on a timer instead (METRICS_FLUSH_SECONDS), see flush_periodically().
+"""
+
+import asyncio
+import math
+import os
+import threading
+from bisect import bisect_left
+from collections.abc import Callable, Iterable, Iterator, Mapping
 
 from fastapi import FastAPI
-from prometheus_client import Counter, Histogram
+from prometheus_client import REGISTRY, Counter, Gauge, Histogram
+from prometheus_client.metrics import MetricWrapperBase
+from prometheus_client.registry import Collector
 from prometheus_fastapi_instrumentator import Instrumentator
 
+_INFERENCE_BUCKETS = [0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0]
+_STAGE_BUCKETS = [
+    0.00001,
+    0.000025,
+    0.00005,
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+]
+
+# the metrics below with registry=None are exposed through _Aggregated,
+# which flushes pending observations into them before they're read
 INFERENCE_TIME = Histogram(
     "model_inference_seconds",
     "Time spent in model inference",
-    buckets=[0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0],
+    buckets=_INFERENCE_BUCKETS,
+    registry=None,
+)
+
+REQUEST_STAGE_SECONDS = Histogram(
+    "request_stage_seconds",
+    "Time spent in each stage of serving a prediction request",
+    ["stage"],
+    buckets=_STAGE_BUCKETS,
+    registry=None,
+)
+
+# request parse -> features -> queue wait -> inference -> postprocess ->
+# metrics -> serialize; see src/monitoring/stages.py
+STAGES = (
+    "parse",
+    "features",
+    "queue_wait",
+    "inference",
+    "postprocess",
+    "metrics",
+    "serialize",
 )
 
 PREDICTION_COUNTER = Counter(
     "predictions_total",
     "Total predictions made",
     ["predicted_class"],
+    registry=None,
+)
+
+PREDICTION_CACHE_HITS = Counter(
+    "prediction_cache_hits_total",
+    "Predictions served from the result cache",
+    registry=None,
+)
+
+PREDICTION_CACHE_MISSES = Counter(
+    "prediction_cache_misses_total",
+    "Result cache lookups that had to run the model",
+    registry=None,
+)
+
+PREDICTION_CACHE_EVICTIONS = Counter(
+    "prediction_cache_evictions_total",
+    "Entries dropped from the result cache",
+    ["reason"],
+)
+
+# livesum: with several worker processes, report the total across the
+# live ones rather than one series per pid
+MODEL_REGISTRY_MEMORY = Gauge(
+    "model_registry_memory_bytes",
+    "Approximate memory held by models loaded in the in-process registry",
+    multiprocess_mode="livesum",
+)
+
+MODEL_REGISTRY_MODELS = Gauge(
+    "model_registry_models_loaded",
+    "Models currently loaded in the in-process registry",
+    multiprocess_mode="livesum",
+)
+
+MODEL_WARMUP_SECONDS = Gauge(
+    "model_warmup_seconds",
+    "First warmup pass at each batch size for the most recently warmed model",
+    ["batch_size"],
+    multiprocess_mode="mostrecent",
+)
+
+# set from src/monitoring/drift.py when metrics are flushed; max across
+# worker processes, so one drifting worker isn't averaged away
+MODEL_DRIFT_PSI = Gauge(
+    "model_drift_psi",
+    "Population stability index of recent traffic against the training profile",
+    ["signal"],
+    multiprocess_mode="max",
+    registry=None,
+)
+
+MODEL_DRIFT_MEAN_SHIFT = Gauge(
+    "model_drift_mean_shift",
+    "Recent feature mean minus training mean, in training standard deviations",
+    ["feature"],
+    multiprocess_mode="mostrecent",
+    registry=None,
+)
+
+MODEL_DRIFT_STD_RATIO = Gauge(
+    "model_drift_std_ratio",
+    "Recent feature standard deviation over the training one",
+    ["feature"],
+    multiprocess_mode="mostrecent",
+    registry=None,
+)
+
+MODEL_DRIFT_WINDOW_ROWS = Gauge(
+    "model_drift_window_rows",
+    "Rows the drift scores are based on, after decay",
+    multiprocess_mode="livesum",
+    registry=None,
+)
+
+# recorded from the shadow scorer's own thread, off the request path; see
+# src/api/shadow.py
+SHADOW_PREDICTIONS = Counter(
+    "shadow_predictions_total",
+    "Mirrored rows where the shadow model agreed or disagreed with the live one",
+    ["result"],
+)
+
+SHADOW_REQUESTS = Counter(
+    "shadow_requests_total",
+    "Calls sampled for mirroring to the shadow model, by outcome",
+    ["outcome"],
+)
+
+SHADOW_LATENCY_DELTA = Histogram(
+    "shadow_latency_delta_seconds",
+    "Shadow model inference time minus the live model's for the same rows",
+    buckets=[
+        -0.01,
+        -0.005,
+        -0.001,
+        -0.0005,
+        -0.0001,
+        0.0,
+        0.0001,
+        0.0005,
+        0.001,
+        0.005,
+        0.01,
+        0.05,
+    ],
+)
+
+# set from src/api/admission.py; livesum adds up every worker's limit
+ADMISSION_LIMIT = Gauge(
+    "admission_concurrency_limit",
+    "Concurrent scoring calls admitted before new ones are refused",
+    multiprocess_mode="livesum",
+)
+
+ADMISSION_REJECTED = Counter(
+    "admission_rejected_total",
+    "Scoring calls refused by admission control, by reason",
+    ["reason"],
+)
+
+MODEL_REGISTRY_LOADS = Counter(
+    "model_registry_loads_total",
+    "Models loaded on demand into the in-process registry",
+)
+
+MODEL_REGISTRY_EVICTIONS = Counter(
+    "model_registry_evictions_total",
+    "Models evicted from the in-process registry to stay under budget",
+)
+
+# labels() is a dict lookup under a lock, so bind each child once
+_STAGE_CHILDREN = {stage: REQUEST_STAGE_SECONDS.labels(stage=stage) for stage in STAGES}
+_PREDICTION_CHILDREN: dict[str, Counter] = {}
+
+# the bounds prometheus_client uses, +Inf appended, so bisect_left picks
+# the same bucket observe() would
+_INFERENCE_BOUNDS = [*_INFERENCE_BUCKETS, math.inf]
+_STAGE_BOUNDS = [*_STAGE_BUCKETS, math.inf]
+
+
+def _can_add_buckets(histogram: Histogram, bounds: list[float]) -> bool:
+    """Whether histogram has the internals _observe_buckets adds to."""
+    values = getattr(histogram, "_buckets", None)
+    return (
+        getattr(histogram, "_upper_bounds", None) == bounds
+        and isinstance(values, list)
+        and all(hasattr(value, "inc") for value in values)
+        and hasattr(getattr(histogram, "_sum", None), "inc")
+    )
+
+
+_BULK_OBSERVE = _can_add_buckets(INFERENCE_TIME, _INFERENCE_BOUNDS) and all(
+    _can_add_buckets(child, _STAGE_BOUNDS) for child in _STAGE_CHILDREN.values()
+)
+
+
+class PendingMetrics:
+    """Observations as plain numbers, not yet in the prometheus metrics.
+
+    Histograms are a list of per-bucket counts with the running sum as the
+    last element. Picklable, so a process-pool worker can hand what it
+    recorded back to the parent along with its results.
+    """
+
+    __slots__ = ("inference", "stages", "predictions", "cache_hits", "cache_misses")
+
+    def __init__(self) -> None:
+        self.inference = [0.0] * (len(_INFERENCE_BOUNDS) + 1)
+        self.stages = {stage: [0.0] * (len(_STAGE_BOUNDS) + 1) for stage in STAGES}
+        self.predictions: dict[str, int] = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def copy(self) -> "PendingMetrics":
+        # each copy is a single C-level call, so it can't interleave with a
+        # write from the owning thread
+        out = PendingMetrics()
+        out.inference = self.inference[:]
+        out.stages = {stage: buckets[:] for stage, buckets in self.stages.items()}
+        out.predictions = self.predictions.copy()
+        out.cache_hits = self.cache_hits
+        out.cache_misses = self.cache_misses
+        return out
+
+    def merge(self, other: "PendingMetrics", sign: int = 1) -> None:
+        """Add other's counts to these, or subtract them with sign=-1."""
+        _add(self.inference, other.inference, sign)
+        for stage, buckets in other.stages.items():
+            _add(self.stages[stage], buckets, sign)
+        for name, count in other.predictions.items():
+            self.predictions[name] = self.predictions.get(name, 0) + sign * count
+        self.cache_hits += sign * other.cache_hits
+        self.cache_misses += sign * other.cache_misses
+
+
+def _add(into: list[float], counts: list[float], sign: int) -> None:
+    for i, n in enumerate(counts):
+        if n:
+            into[i] += sign * n
+
+
+class _ThreadTotals:
+    """Running totals for one thread, written only by that thread.
+
+    Nothing on the recording side takes a lock: a drain copies the totals
+    and reports the difference from the previous copy, so it never has to
+    reset counts another thread might be incrementing.
+    """
+
+    __slots__ = ("totals", "reported", "thread")
+
+    def __init__(self) -> None:
+        self.totals = PendingMetrics()
+        self.reported = PendingMetrics()
+        self.thread = threading.current_thread()
+
+
+# aggregating only pays off when a flush can add counts in bulk
+_direct = os.environ.get("METRICS_MODE", "aggregated") == "direct" or not _BULK_OBSERVE
+_flush_hooks: list[Callable[[], None]] = []
+_local = threading.local()
+_threads: list[_ThreadTotals] = []
+_drain_lock = threading.Lock()
+
+
+def _totals() -> PendingMetrics:
+    try:
+        totals: PendingMetrics = _local.totals
+    except AttributeError:
+        state = _ThreadTotals()
+        with _drain_lock:
+            _threads.append(state)
+        totals = _local.totals = state.totals
+    return totals
+
+
+def record_stage(stage: str, seconds: float) -> None:
+    """Record time spent in one stage of a request."""
+    if _direct:
+        _STAGE_CHILDREN[stage].observe(seconds)
+        return
+    buckets = _totals().stages[stage]
+    buckets[bisect_left(_STAGE_BOUNDS, seconds)] += 1
+    buckets[-1] += seconds
+
+
+def record_inference(elapsed: float, class_counts: Mapping[str, int]) -> None:
+    """Record one model call and the predictions it produced."""
+    if _direct:
+        INFERENCE_TIME.observe(elapsed)
+    else:
+        buckets = _totals().inference
+        buckets[bisect_left(_INFERENCE_BOUNDS, elapsed)] += 1
+        buckets[-1] += elapsed
+    record_predictions(class_counts)
+
+
+def record_predictions(class_counts: Mapping[str, int]) -> None:
+    """Count predictions served, whether or not the model ran for them."""
+    if _direct:
+        for predicted_class, count in class_counts.items():
+            if count:
+                _prediction_child(predicted_class).inc(count)
+        return
+    predictions = _totals().predictions
+    for predicted_class, count in class_counts.items():
+        if count:
+            predictions[predicted_class] = predictions.get(predicted_class, 0) + count
+
+
+def record_cache_lookup(hit: bool) -> None:
+    """Count one result cache lookup."""
+    if _direct:
+        (PREDICTION_CACHE_HITS if hit else PREDICTION_CACHE_MISSES).inc()
+    elif hit:
+        _totals().cache_hits += 1
+    else:
+        _totals().cache_misses += 1
+
+
+def _prediction_child(predicted_class: str) -> Counter:
+    child = _PREDICTION_CHILDREN.get(predicted_class)
+    if child is None:
+        child = PREDICTION_COUNTER.labels(predicted_class=predicted_class)
+        _PREDICTION_CHILDREN[predicted_class] = child
+    return child
+
+
+def drain() -> PendingMetrics:
+    """Everything recorded in this process since the last drain."""
+    out = PendingMetrics()
+    with _drain_lock:
+        for state in list(_threads):
+            current = state.totals.copy()
+            out.merge(current)
+            out.merge(state.reported, sign=-1)
+            state.reported = current
+            # read after the thread ended, so nothing more can arrive
+            if not state.thread.is_alive():
+                _threads.remove(state)
+    return out
+
+
+def merge(pending: PendingMetrics) -> None:
+    """Add metrics recorded elsewhere, e.g. drained in a process-pool worker."""
+    if _direct:
+        _apply(pending)
+    else:
+        _totals().merge(pending)
+
+
+def flush() -> None:
+    """Move everything recorded so far into the prometheus metrics."""
+    _apply(drain())
+    for hook in _flush_hooks:
+        hook()
+
+
+def add_flush_hook(hook: Callable[[], None]) -> None:
+    """Call hook on every flush, to update metrics computed from other state."""
+    _flush_hooks.append(hook)
+
+
+def hold_for_parent() -> None:
+    """Keep this process's metrics unreported until drain() is called.
+
+    For process-pool workers: nothing scrapes them, so the parent drains
+    their metrics with each result instead. A forked worker also starts
+    with a copy of the parent's totals, which the parent reports itself,
+    so those are dropped here.
+    """
+    global _direct, _local, _threads, _drain_lock
+    _direct = False
+    _local = threading.local()
+    _threads = []
+    _drain_lock = threading.Lock()
+
+
+def _apply(pending: PendingMetrics) -> None:
+    _observe_buckets(INFERENCE_TIME, _INFERENCE_BOUNDS, pending.inference)
+    for stage, buckets in pending.stages.items():
+        _observe_buckets(_STAGE_CHILDREN[stage], _STAGE_BOUNDS, buckets)
+    for predicted_class, count in pending.predictions.items():
+        if count:
+            _prediction_child(predicted_class).inc(count)
+    if pending.cache_hits:
+        PREDICTION_CACHE_HITS.inc(pending.cache_hits)
+    if pending.cache_misses:
+        PREDICTION_CACHE_MISSES.inc(pending.cache_misses)
+
+
+def _observe_buckets(
+    histogram: Histogram, bounds: list[float], buckets: list[float]
+) -> None:
+    if not any(buckets[:-1]):
+        return
+    if not _BULK_OBSERVE:
+        _observe_each(histogram, bounds, buckets)
+        return
+    # Histogram has no bulk observe(); these are the values it increments
+    for value, count in zip(histogram._buckets, buckets[:-1], strict=True):
+        if count:
+            value.inc(count)
+    histogram._sum.inc(buckets[-1])
+
+
+def _observe_each(
+    histogram: Histogram, bounds: list[float], buckets: list[float]
+) -> None:
+    """One observe() per call, landing in the same buckets with the same sum.
+
+    Only each bucket's count is known, not the values in it, so calls are
+    observed at one value per bucket: finite buckets start at their upper
+    bound and +Inf at its lower one, then the difference from the real sum
+    is made up on +Inf, or taken off the highest buckets first. Only used
+    when prometheus_client's internals aren't what _observe_buckets
+    expects, for what process-pool workers send back.
+    """
+    counts = buckets[:-1]
+    lowers = [0.0, *bounds[:-1]]
+    values = [*bounds[:-1], math.nextafter(bounds[-2], math.inf)]
+    missing = buckets[-1] - sum(c * v for c, v in zip(counts, values, strict=True))
+    if missing > 0 and counts[-1]:
+        values[-1] += missing / counts[-1]
+    for i in reversed(range(len(counts) - 1)):
+        if missing >= 0:
+            break
+        if counts[i]:
+            take = min(-missing, counts[i] * (values[i] - lowers[i]))
+            values[i] = max(
+                values[i] - take / counts[i], math.nextafter(lowers[i], math.inf)
+            )
+            missing += take
+    for value, count in zip(values, counts, strict=True):
+        for _ in range(int(count)):
+            histogram.observe(value)
+
+
+class _Aggregated(Collector):
+    """Exposes the locally aggregated metrics, flushing them first."""
+
+    def __init__(self, *metrics: MetricWrapperBase):
+        self.metrics = metrics
+
+    def describe(self) -> Iterable:
+        for metric in self.metrics:
+            yield from metric.describe()
+
+    def collect(self) -> Iterator:
+        flush()
+        for metric in self.metrics:
+            yield from metric.collect()
+
+
+REGISTRY.register(
+    _Aggregated(
+        INFERENCE_TIME,
+        REQUEST_STAGE_SECONDS,
+        PREDICTION_COUNTER,
+        PREDICTION_CACHE_HITS,
+        PREDICTION_CACHE_MISSES,
+        MODEL_DRIFT_PSI,
+        MODEL_DRIFT_MEAN_SHIFT,
+        MODEL_DRIFT_STD_RATIO,
+        MODEL_DRIFT_WINDOW_ROWS,
+    )
 )
 
 
+def multiprocess() -> bool:
+    """Whether metrics are shared between processes through files."""
+    return "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+
+async def flush_periodically(interval: float) -> None:
+    """Flush every `interval` seconds, for when scrapes don't reach us."""
+    while True:
+        await asyncio.sleep(interval)
+        flush()
+
+
 def setup_metrics(app: FastAPI) -> None:
     """Attach prometheus instrumentation to the FastAPI app."""
     Instrumentator().instrument(app).expose(app)
@@ -0,0 +1,104 @@
+"""Per-stage latency breakdown for prediction requests.
+
+model_inference_seconds only covers predict_proba, and the Instrumentator's
+request histogram only covers the whole request. This fills in the rest:
+every prediction request is split into the stages in metrics.STAGES, and
+each one is observed in request_stage_seconds{stage=...}.
+
+- parse: request arrival until the handler runs (routing, body read and
+  pydantic validation), or until the fast path has decoded its rows
+- features, inference, postprocess, metrics: timed inside
+  IrisClassifier._score around each step
+- queue_wait: time a call spent waiting for a free executor worker
+- serialize: handler return until the response starts going out
+
+Everything is a perf_counter() call and a locally aggregated count (see
+metrics.py), a few microseconds per request in total, so it stays on.
+"""
+
+import functools
+import time
+from collections.abc import Awaitable, Callable
+from contextvars import ContextVar
+from typing import Any
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.monitoring.metrics import record_stage
+
+
+class RequestTimer:
+    """Stage boundaries for one request, shared by middleware and handler."""
+
+    __slots__ = ("start", "parsed_at", "finished_at")
+
+    def __init__(self) -> None:
+        self.start = time.perf_counter()
+        self.parsed_at: float | None = None
+        self.finished_at: float | None = None
+
+
+_current: ContextVar[RequestTimer | None] = ContextVar("request_timer", default=None)
+
+
+def parsed() -> None:
+    """Mark the request as parsed. Only the first call per request counts."""
+    timer = _current.get()
+    if timer is not None and timer.parsed_at is None:
+        timer.parsed_at = time.perf_counter()
+        record_stage("parse", timer.parsed_at - timer.start)
+
+
+def finished() -> None:
+    """Mark the handler as done. Serialization is timed from here."""
+    timer = _current.get()
+    if timer is not None:
+        timer.finished_at = time.perf_counter()
+
+
+def timed(endpoint: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+    """Time parse and serialize around an endpoint that takes a pydantic body.
+
+    FastAPI has already read and validated the body when the endpoint is
+    called, so entry marks the end of parsing. Return marks the start of
+    serialization. Endpoints that decode their own body call parsed()
+    themselves instead.
+    """
+
+    @functools.wraps(endpoint)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        parsed()
+        result = await endpoint(*args, **kwargs)
+        finished()
+        return result
+
+    return wrapper
+
+
+class StageTimingMiddleware:
+    """Starts a RequestTimer per HTTP request and times serialization.
+
+    A plain ASGI middleware rather than BaseHTTPMiddleware, which would add
+    a task and a stream copy to every request.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timer = RequestTimer()
+        token = _current.set(timer)
+
+        async def send_timed(message: Message) -> None:
+            if message["type"] == "http.response.start" and timer.finished_at:
+                record_stage("serialize", time.perf_counter() - timer.finished_at)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_timed)
+        finally:
+            _current.reset(token)
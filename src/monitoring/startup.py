@@ -0,0 +1,80 @@
+"""Per-phase startup timings for the serving process.
+
+Cold start is import, model load, warmup and then the first request, which
+still pays for anything initialized lazily. Each phase's duration is kept
+in the startup_phase_seconds gauge and logged once the service is ready,
+so a regression (say, a heavy import creeping back in) shows up on the
+dashboard rather than as a slow rollout.
+"""
+
+import logging
+import os
+import resource
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from prometheus_client import Gauge
+
+logger = logging.getLogger(__name__)
+
+STARTUP_PHASE_SECONDS = Gauge(
+    "startup_phase_seconds",
+    "Time spent in each phase of process startup",
+    ["phase"],
+)
+
+
+def process_age() -> float | None:
+    """Seconds since this process was started, if the OS will tell us.
+
+    Read from /proc on Linux, at clock-tick resolution (usually 10ms).
+    Covers interpreter start-up and every import before the app ran.
+    """
+    try:
+        with open("/proc/self/stat") as f:
+            # the command name can contain spaces, so split after its ")"
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        started = int(fields[19]) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return None
+    return max(uptime - started, 0.0)
+
+
+class StartupTimer:
+    """Collects phase durations and publishes them as gauges."""
+
+    def __init__(self) -> None:
+        self.phases: dict[str, float] = {}
+        self.first_request_pending = True
+
+    def record(self, phase: str, seconds: float) -> None:
+        self.phases[phase] = seconds
+        STARTUP_PHASE_SECONDS.labels(phase=phase).set(seconds)
+
+    @contextmanager
+    def phase(self, phase: str) -> Iterator[None]:
+        """Time the enclosed block as one startup phase."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(phase, time.perf_counter() - start)
+
+    def record_first_request(self, seconds: float) -> None:
+        """Record the first prediction's latency, once per process."""
+        if self.first_request_pending:
+            self.first_request_pending = False
+            self.record("first_request", seconds)
+            logger.info("First request served in %.1f ms", seconds * 1000)
+
+    def log_summary(self) -> None:
+        parts = ", ".join(f"{name} {secs:.3f}s" for name, secs in self.phases.items())
+        # ru_maxrss is KiB on Linux
+        rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        logger.info("Startup: %s (peak RSS %.0f MB)", parts, rss_mb)
+
+
+STARTUP = StartupTimer()
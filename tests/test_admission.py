@@ -0,0 +1,170 @@
+"""Tests for adaptive admission control in front of the scoring routes."""
+
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from src.api import admission, main
+from src.api.admission import AdaptiveLimiter
+
+
+def rejected(reason: str) -> float:
+    return (
+        REGISTRY.get_sample_value("admission_rejected_total", {"reason": reason}) or 0.0
+    )
+
+
+def busy(limiter: AdaptiveLimiter, latency: float, calls: int) -> None:
+    """Finish `calls` calls of `latency` seconds with the limit fully in use."""
+    for _ in range(calls):
+        limiter.in_flight = int(limiter.limit)
+        limiter.release(latency)
+    limiter.in_flight = 0
+
+
+def test_limit_grows_while_latency_holds():
+    limiter = AdaptiveLimiter(initial_limit=10, max_limit=50)
+    busy(limiter, 0.001, 200)
+    assert limiter.limit == 50
+
+
+def test_limit_shrinks_when_latency_rises():
+    limiter = AdaptiveLimiter(initial_limit=40, min_limit=2)
+    busy(limiter, 0.001, 300)
+    before = limiter.limit
+
+    # queueing: calls now take ten times the baseline
+    busy(limiter, 0.010, 30)
+    assert limiter.limit < before / 2
+
+    busy(limiter, 0.010, 200)
+    assert limiter.limit < 10
+
+    # back to normal: the limit recovers
+    busy(limiter, 0.001, 300)
+    assert limiter.limit > 100
+
+
+def test_quiet_pod_keeps_its_limit():
+    """Fast calls with most of the limit unused say nothing about capacity."""
+    limiter = AdaptiveLimiter(initial_limit=20)
+    for _ in range(100):
+        assert limiter.try_acquire() is None
+        limiter.release(0.001)
+    assert limiter.limit == 20
+
+
+def test_refuses_over_limit_and_past_deadline():
+    limiter = AdaptiveLimiter(initial_limit=2, min_limit=1)
+    assert limiter.try_acquire() is None
+    assert limiter.try_acquire() is None
+    assert limiter.try_acquire() == "limit"
+    limiter.release(0.050)
+    limiter.release(None)
+    assert limiter.in_flight == 0
+
+    # calls take 50 ms, so a caller willing to wait 10 ms is turned away
+    assert limiter.try_acquire(timeout=0.010) == "deadline"
+    assert limiter.try_acquire(timeout=0.100) is None
+
+    with pytest.raises(ValueError, match="min_limit"):
+        AdaptiveLimiter(initial_limit=1, min_limit=2)
+
+
+@pytest.fixture
+def limited(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.delenv("MLFLOW_TRACKING_URI", raising=False)
+    monkeypatch.setenv("ADMISSION_CONTROL_ENABLED", "true")
+    monkeypatch.setenv("ADMISSION_INITIAL_LIMIT", "4")
+    with TestClient(main.app) as client:
+        limiter = admission._active
+        assert limiter is not None
+        yield client, limiter
+    assert admission._active is None
+
+
+def test_predict_admitted_and_released(limited, sample_features):
+    client, limiter = limited
+    response = client.post("/predict", json={"features": sample_features})
+    assert response.status_code == 200
+    assert limiter.in_flight == 0
+    assert limiter.latency > 0
+
+
+def test_full_pod_refuses_predict_but_not_health(limited, sample_features):
+    client, limiter = limited
+    before = rejected("limit")
+    limiter.in_flight = int(limiter.limit)
+    try:
+        response = client.post("/predict", json={"features": sample_features})
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "1"
+        assert rejected("limit") - before == 1
+
+        assert client.get("/health").status_code == 200
+        assert client.get("/ready").status_code == 200
+    finally:
+        limiter.in_flight = 0
+
+
+@pytest.mark.parametrize(
+    "path",
+    [
+        "/predict/batch",
+        "/predict/fast",
+        "/predict/stream",
+        "/models/iris-classifier/1.0.0/predict",
+    ],
+)
+def test_full_pod_refuses_every_scoring_route(limited, path):
+    client, limiter = limited
+    limiter.in_flight = int(limiter.limit)
+    try:
+        assert client.post(path, content=b"{}").status_code == 429
+        assert client.get("/models").status_code == 200
+    finally:
+        limiter.in_flight = 0
+
+
+def test_stream_latency_not_sampled(limited, sample_features):
+    """A stream lasts as long as its body, which says nothing about load."""
+    client, limiter = limited
+    response = client.post(
+        "/predict/stream",
+        content=json.dumps(sample_features).encode(),
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    assert response.status_code == 200
+    assert limiter.in_flight == 0
+    assert limiter.latency == 0
+
+
+def test_timeout_header(limited, sample_features):
+    client, limiter = limited
+    client.post("/predict", json={"features": sample_features})
+    before = rejected("deadline")
+
+    response = client.post(
+        "/predict",
+        json={"features": sample_features},
+        headers={"X-Request-Timeout-Ms": str(limiter.latency * 1000 / 10)},
+    )
+    assert response.status_code == 429
+    assert rejected("deadline") - before == 1
+
+    response = client.post(
+        "/predict",
+        json={"features": sample_features},
+        headers={"X-Request-Timeout-Ms": "60000"},
+    )
+    assert response.status_code == 200
+
+    response = client.post(
+        "/predict",
+        json={"features": sample_features},
+        headers={"X-Request-Timeout-Ms": "soon"},
+    )
+    assert response.status_code == 400
+    assert limiter.in_flight == 0
@@ -1,7 +1,10 @@
 """Tests for the FastAPI endpoints."""
 
+import numpy as np
 from fastapi.testclient import TestClient
 
+from src.api.schemas import MAX_BATCH_ROWS
+
 
 def test_health(client: TestClient):
     """Health endpoint should return healthy."""
@@ -72,6 +75,54 @@ def test_predict_invalid_json(client: TestClient):
     assert response.status_code == 422
 
 
+def test_predict_batch(client: TestClient, sample_features: dict[str, float]):
+    """Batch endpoint should return one prediction per instance, in order."""
+    virginica = {
+        "sepal length (cm)": 6.7,
+        "sepal width (cm)": 3.0,
+        "petal length (cm)": 5.2,
+        "petal width (cm)": 2.3,
+    }
+    response = client.post(
+        "/predict/batch", json={"instances": [sample_features, virginica]}
+    )
+    assert response.status_code == 200
+
+    predictions = response.json()["predictions"]
+    assert [p["prediction"] for p in predictions] == ["setosa", "virginica"]
+    for p in predictions:
+        assert 0 <= p["confidence"] <= 1
+        assert "model_version" in p
+
+
+def test_predict_batch_missing_feature(client: TestClient):
+    """Should return 400 when any instance is missing a feature."""
+    response = client.post(
+        "/predict/batch", json={"instances": [{"sepal length (cm)": 5.0}]}
+    )
+    assert response.status_code == 400
+
+
+def test_predict_batch_empty(client: TestClient):
+    """Should return 422 for an empty batch."""
+    response = client.post("/predict/batch", json={"instances": []})
+    assert response.status_code == 422
+
+
+def test_predict_batch_too_large(client: TestClient, sample_features: dict[str, float]):
+    """Should return 422 for a batch over PREDICT_BATCH_MAX_ROWS."""
+    response = client.post(
+        "/predict/batch", json={"instances": [sample_features] * MAX_BATCH_ROWS}
+    )
+    assert response.status_code == 200
+
+    response = client.post(
+        "/predict/batch",
+        json={"instances": [sample_features] * (MAX_BATCH_ROWS + 1)},
+    )
+    assert response.status_code == 422
+
+
 def test_metrics_endpoint(client: TestClient):
     """Prometheus metrics endpoint should return metrics."""
     response = client.get("/metrics")
@@ -84,3 +135,70 @@ def test_openapi_docs(client: TestClient):
     response = client.get("/openapi.json")
     assert response.status_code == 200
     assert "paths" in response.json()
+
+
+def test_predict_fast_matches_predict(
+    client: TestClient, sample_features: dict[str, float]
+):
+    """A positional row should get the same answer as the named-feature route."""
+    expected = client.post("/predict", json={"features": sample_features}).json()
+
+    response = client.post("/predict/fast", json=list(sample_features.values()))
+    assert response.status_code == 200
+    data = response.json()
+    assert data["prediction"] == expected["prediction"]
+    assert data["confidence"] == expected["confidence"]
+    assert data["model_version"] == expected["model_version"]
+
+
+def test_predict_fast_many_rows(client: TestClient):
+    """A list of rows gets a list of predictions back, in order."""
+    rows = [[5.1, 3.5, 1.4, 0.2], [6.7, 3.0, 5.2, 2.3]]
+    response = client.post("/predict/fast", json=rows)
+    assert response.status_code == 200
+
+    predictions = response.json()["predictions"]
+    assert [p["prediction"] for p in predictions] == ["setosa", "virginica"]
+
+
+def test_predict_fast_float32(client: TestClient):
+    """Raw little-endian float32 rows are scored without any parsing."""
+    body = np.array([[5.1, 3.5, 1.4, 0.2]] * 3, dtype="<f4").tobytes()
+    response = client.post(
+        "/predict/fast",
+        content=body,
+        headers={"Content-Type": "application/x-float32"},
+    )
+    assert response.status_code == 200
+    predictions = response.json()["predictions"]
+    assert [p["prediction"] for p in predictions] == ["setosa"] * 3
+
+
+def test_predict_fast_bad_payloads(client: TestClient):
+    """Wrong row width, bad JSON and partial float32 rows are client errors."""
+    assert client.post("/predict/fast", json=[5.1, 3.5]).status_code == 400
+    assert client.post("/predict/fast", json=[]).status_code == 400
+    assert client.post("/predict/fast", json=["a", 1, 2, 3]).status_code == 400
+    assert (
+        client.post(
+            "/predict/fast",
+            content=b"[5.1, 3.5",
+            headers={"Content-Type": "application/json"},
+        ).status_code
+        == 400
+    )
+    assert (
+        client.post(
+            "/predict/fast",
+            content=b"\x00" * 10,
+            headers={"Content-Type": "application/x-float32"},
+        ).status_code
+        == 400
+    )
+
+
+def test_predict_fast_unsupported_content_type(client: TestClient):
+    response = client.post(
+        "/predict/fast", content=b"1,2,3,4", headers={"Content-Type": "text/csv"}
+    )
+    assert response.status_code == 415
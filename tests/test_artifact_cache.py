@@ -0,0 +1,151 @@
+"""Tests for the local model artifact cache."""
+
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.models.artifact_cache import ArtifactCache
+from src.models.iris_classifier import IrisClassifier
+
+FEATURES = [
+    "sepal length (cm)",
+    "sepal width (cm)",
+    "petal length (cm)",
+    "petal width (cm)",
+]
+TARGETS = ["setosa", "versicolor", "virginica"]
+
+
+def test_put_then_get(tmp_path: Path, classifier: IrisClassifier):
+    """A cached version should load back as a normal model pickle."""
+    cache = ArtifactCache(tmp_path)
+    assert cache.get("iris", "3", "run1") is None
+
+    path = cache.put("iris", "3", "run1", classifier.model, FEATURES, TARGETS)
+    assert cache.get("iris", "3", "run1") == path
+
+    loaded = IrisClassifier(path)
+    assert loaded.version == "3"
+    assert loaded.feature_names == FEATURES
+
+
+def test_key_includes_run_id(tmp_path: Path, classifier: IrisClassifier):
+    """Same version number from a different run must not hit."""
+    cache = ArtifactCache(tmp_path)
+    cache.put("iris", "3", "run1", classifier.model, FEATURES, TARGETS)
+    assert cache.get("iris", "3", "run2") is None
+
+
+def test_corrupt_entry_is_a_miss(tmp_path: Path, classifier: IrisClassifier):
+    """A modified model.pkl should fail the checksum and be ignored."""
+    cache = ArtifactCache(tmp_path)
+    path = cache.put("iris", "3", "run1", classifier.model, FEATURES, TARGETS)
+    path.write_bytes(path.read_bytes()[:-10])
+
+    assert cache.get("iris", "3", "run1") is None
+
+
+def test_pinned(tmp_path: Path, classifier: IrisClassifier):
+    """The last version served for a stage should be findable offline."""
+    cache = ArtifactCache(tmp_path)
+    assert cache.pinned("iris", "Production") is None
+
+    path = cache.put("iris", "3", "run1", classifier.model, FEATURES, TARGETS)
+    cache.pin("iris", "Production", "3", "run1")
+    assert cache.pinned("iris", "Production") == path
+    assert cache.pinned("iris", "Staging") is None
+
+
+@pytest.fixture
+def fake_registry(classifier: IrisClassifier):
+    """Patched MLflow client/loader serving version 3 of the real model."""
+    with (
+        patch("mlflow.tracking.MlflowClient") as client_cls,
+        patch("mlflow.set_tracking_uri"),
+        patch("mlflow.sklearn.load_model") as load_model,
+    ):
+        client = MagicMock()
+        client_cls.return_value = client
+        mv = MagicMock(version="3", run_id="abc123")
+        client.get_latest_versions.return_value = [mv]
+        client.get_run.return_value.data.tags = {
+            "feature_names": ",".join(FEATURES),
+            "target_names": ",".join(TARGETS),
+        }
+        load_model.return_value = classifier.model
+        yield client, load_model
+
+
+def test_from_mlflow_warm_cache_skips_download(tmp_path: Path, fake_registry):
+    """Second start should skip the artifact download and run lookup."""
+    client, load_model = fake_registry
+
+    cold = IrisClassifier.from_mlflow(
+        "http://m", "iris", "Production", cache_dir=tmp_path
+    )
+    warm = IrisClassifier.from_mlflow(
+        "http://m", "iris", "Production", cache_dir=tmp_path
+    )
+
+    assert load_model.call_count == 1
+    assert client.get_run.call_count == 1
+    assert warm.version == cold.version == "3"
+    assert warm.target_names == TARGETS
+
+
+def test_from_mlflow_registry_down_uses_pinned(tmp_path: Path, fake_registry):
+    """If the registry can't be reached, start from the last served version."""
+    client, _ = fake_registry
+    IrisClassifier.from_mlflow("http://m", "iris", "Production", cache_dir=tmp_path)
+
+    client.get_latest_versions.side_effect = ConnectionError("timed out")
+    clf = IrisClassifier.from_mlflow(
+        "http://m", "iris", "Production", cache_dir=tmp_path
+    )
+    assert clf.version == "3"
+
+
+def test_from_mlflow_empty_stage_does_not_fall_back(tmp_path: Path, fake_registry):
+    """An empty stage is an answer from the registry, not an outage."""
+    client, _ = fake_registry
+    IrisClassifier.from_mlflow("http://m", "iris", "Production", cache_dir=tmp_path)
+
+    client.get_latest_versions.return_value = []
+    with pytest.raises(RuntimeError, match="No model"):
+        IrisClassifier.from_mlflow("http://m", "iris", "Production", cache_dir=tmp_path)
+
+
+def test_warm_cache_versions_are_str(tmp_path: Path, classifier: IrisClassifier):
+    """A SQL registry's int versions come back from the cache as str."""
+    pytest.importorskip("mlflow")
+    from mlflow.tracking import MlflowClient
+
+    uri = f"sqlite:///{tmp_path / 'mlflow.db'}"
+    client = MlflowClient(uri)
+    tags = {"feature_names": ",".join(FEATURES), "target_names": ",".join(TARGETS)}
+    run = client.create_run(client.create_experiment("iris"), tags=tags)
+    client.create_registered_model("iris")
+    mv = client.create_model_version("iris", "/nowhere", run_id=run.info.run_id)
+    client.transition_model_version_stage("iris", mv.version, "Production")
+    assert isinstance(mv.version, int)
+
+    # what a cold load writes: the registry's own version value
+    cache = ArtifactCache(tmp_path / "cache")
+    cache.put("iris", mv.version, mv.run_id, classifier.model, FEATURES, TARGETS)
+    cache.pin("iris", "Production", mv.version, mv.run_id)
+
+    # set_tracking_uri would outlive the test's registry
+    with patch("mlflow.set_tracking_uri"):
+        warm = IrisClassifier.from_mlflow(
+            uri, "iris", "Production", cache_dir=cache.root
+        )
+        # registry down: served from the pin
+        offline = IrisClassifier.from_mlflow(
+            f"sqlite:///{tmp_path / 'gone' / 'mlflow.db'}",
+            "iris",
+            "Production",
+            cache_dir=cache.root,
+        )
+    assert warm.version == "1"
+    assert offline.version == "1"
@@ -0,0 +1,129 @@
+"""Tests for pluggable inference backends and the ONNX export."""
+
+import pickle
+import shutil
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from src.models import backends
+from src.models.iris_classifier import IrisClassifier
+
+pytest.importorskip("onnxruntime")
+pytest.importorskip("skl2onnx")
+
+from training.train_iris import export_onnx  # noqa: E402
+
+ROWS = np.random.default_rng(0).uniform(0, 8, size=(500, 4))
+
+
+@pytest.fixture
+def exported_dir(tmp_path: Path, model_path: Path, classifier: IrisClassifier) -> Path:
+    """A copy of models/model.pkl with a fresh model.onnx export beside it."""
+    shutil.copy(model_path, tmp_path / "model.pkl")
+    export_onnx(classifier.model, ROWS, tmp_path / "model.onnx")
+    return tmp_path
+
+
+def test_onnx_matches_sklearn(exported_dir: Path, classifier: IrisClassifier):
+    """Same classes, and probabilities within float32 rounding."""
+    onnx = IrisClassifier(exported_dir / "model.pkl", backend="onnx")
+    assert onnx.backend == "onnx"
+
+    np.testing.assert_allclose(
+        onnx.predict_proba(ROWS),
+        classifier.predict_proba(ROWS),
+        atol=backends.PARITY_ATOL,
+    )
+    assert [r["prediction"] for r in onnx.predict_array(ROWS)] == [
+        r["prediction"] for r in classifier.predict_array(ROWS)
+    ]
+
+
+def test_stale_export_is_refused(exported_dir: Path):
+    """An export of some other model must fail the parity check at load."""
+    other = RandomForestClassifier(n_estimators=5, random_state=1).fit(
+        ROWS, (ROWS[:, 2] > 4).astype(int) + (ROWS[:, 3] > 4)
+    )
+    export_onnx(other, ROWS, exported_dir / "model.onnx")
+
+    with pytest.raises(ValueError, match="differ from sklearn"):
+        IrisClassifier(exported_dir / "model.pkl", backend="onnx")
+
+
+def test_missing_export(tmp_path: Path, model_path: Path):
+    shutil.copy(model_path, tmp_path / "model.pkl")
+    with pytest.raises(ValueError, match="needs model.onnx"):
+        IrisClassifier(tmp_path / "model.pkl", backend="onnx")
+
+
+def test_onnx_model_pickles(exported_dir: Path):
+    """Process-pool workers get the session rebuilt from the model bytes."""
+    onnx = IrisClassifier(exported_dir / "model.pkl", backend="onnx")
+    copy = pickle.loads(pickle.dumps(onnx))
+    np.testing.assert_array_equal(copy.predict_proba(ROWS), onnx.predict_proba(ROWS))
+
+
+def test_registered_backend(model_path: Path, classifier: IrisClassifier):
+    """Third-party backends plug in by name and are parity-checked too."""
+    backends.register_backend("shifted", lambda est, _: lambda X: est.predict_proba(X))
+    try:
+        assert "shifted" in backends.available()
+        clf = IrisClassifier(model_path, backend="shifted")
+        assert clf.predict_proba(ROWS[:3]).shape == (3, 3)
+
+        backends.register_backend(
+            "shifted", lambda est, _: lambda X: est.predict_proba(X) + 0.1
+        )
+        with pytest.raises(ValueError, match="differ from sklearn"):
+            clf.set_backend("shifted")
+        assert clf.backend == "shifted"  # the checked one is still in use
+    finally:
+        backends._factories.pop("shifted")
+
+
+def test_from_mlflow_fetches_export_into_cache(
+    tmp_path: Path, exported_dir: Path, classifier: IrisClassifier
+):
+    """The run's model.onnx is downloaded once and kept with the cached pickle.
+
+    That includes a version first cached while serving another backend.
+    """
+
+    def download(run_id: str, name: str, dst: str) -> str:
+        return shutil.copy(exported_dir / name, dst)
+
+    with (
+        patch("mlflow.tracking.MlflowClient") as client_cls,
+        patch("mlflow.set_tracking_uri"),
+        patch("mlflow.sklearn.load_model", return_value=classifier.model),
+    ):
+        client = MagicMock()
+        client_cls.return_value = client
+        client.get_latest_versions.return_value = [
+            MagicMock(version="3", run_id="abc123")
+        ]
+        client.get_run.return_value.data.tags = {
+            "feature_names": ",".join(classifier.feature_names),
+            "target_names": ",".join(classifier.target_names),
+        }
+        client.download_artifacts.side_effect = download
+
+        cache_dir = tmp_path / "cache"
+        cold = IrisClassifier.from_mlflow(
+            "http://m", "iris", "Production", cache_dir=cache_dir
+        )
+        IrisClassifier.from_mlflow(
+            "http://m", "iris", "Production", backend="onnx", cache_dir=cache_dir
+        )
+        warm = IrisClassifier.from_mlflow(
+            "http://m", "iris", "Production", backend="onnx", cache_dir=cache_dir
+        )
+
+    fetched = [call.args[1] for call in client.download_artifacts.call_args_list]
+    assert fetched.count("model.onnx") == 1
+    assert (warm.model_path.parent / "model.onnx").exists()
+    assert (cold.backend, warm.backend) == ("sklearn", "onnx")
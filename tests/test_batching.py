@@ -0,0 +1,111 @@
+"""Tests for the /predict micro-batcher."""
+
+import asyncio
+from typing import Any
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api.batching import MicroBatcher
+from src.api.main import app
+
+
+class RecordingModel:
+    """Fake predict_batch that records the size of every call."""
+
+    def __init__(self) -> None:
+        self.calls: list[int] = []
+
+    async def predict_batch(self, rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        self.calls.append(len(rows))
+        return [{"echo": row["x"]} for row in rows]
+
+
+async def test_concurrent_submits_share_one_call():
+    """Requests arriving together should be scored in a single batch."""
+    fake = RecordingModel()
+    batcher = MicroBatcher(fake.predict_batch, max_batch_size=16, max_wait_us=50_000)
+    await batcher.start()
+    try:
+        results = await asyncio.gather(*(batcher.submit({"x": i}) for i in range(8)))
+    finally:
+        await batcher.stop()
+
+    assert [r["echo"] for r in results] == list(range(8))
+    assert fake.calls == [8]
+
+
+async def test_batch_size_is_capped():
+    """No batch should exceed max_batch_size."""
+    fake = RecordingModel()
+    batcher = MicroBatcher(fake.predict_batch, max_batch_size=3, max_wait_us=50_000)
+    await batcher.start()
+    try:
+        results = await asyncio.gather(*(batcher.submit({"x": i}) for i in range(7)))
+    finally:
+        await batcher.stop()
+
+    assert [r["echo"] for r in results] == list(range(7))
+    assert max(fake.calls) <= 3
+    assert sum(fake.calls) == 7
+
+
+async def test_bad_row_only_fails_its_caller():
+    """A row that raises should not take down the rest of its batch."""
+    fake = RecordingModel()
+    batcher = MicroBatcher(fake.predict_batch, max_batch_size=16, max_wait_us=50_000)
+    await batcher.start()
+    try:
+        results = await asyncio.gather(
+            batcher.submit({"x": 1}),
+            batcher.submit({"missing": 2}),
+            batcher.submit({"x": 3}),
+            return_exceptions=True,
+        )
+    finally:
+        await batcher.stop()
+
+    assert results[0] == {"echo": 1}
+    assert isinstance(results[1], KeyError)
+    assert results[2] == {"echo": 3}
+
+
+async def test_stop_fails_partly_collected_batch():
+    """Rows already taken off the queue for a batch get an answer on stop()."""
+    fake = RecordingModel()
+    batcher = MicroBatcher(fake.predict_batch, max_batch_size=16, max_wait_us=10**7)
+    await batcher.start()
+    pending = [asyncio.create_task(batcher.submit({"x": i})) for i in range(3)]
+    # let the loop collect them; it then waits for more until the deadline
+    await asyncio.sleep(0.01)
+    assert batcher._queue.empty()
+
+    await batcher.stop()
+    results = await asyncio.wait_for(
+        asyncio.gather(*pending, return_exceptions=True), 1
+    )
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert fake.calls == []
+
+
+async def test_submit_before_start_raises():
+    """Submitting to a batcher that isn't running is a programming error."""
+    batcher = MicroBatcher(RecordingModel().predict_batch)
+    with pytest.raises(RuntimeError, match="not started"):
+        await batcher.submit({"x": 1})
+
+
+def test_predict_with_microbatching(
+    monkeypatch: pytest.MonkeyPatch, sample_features: dict[str, float]
+):
+    """/predict should behave the same with micro-batching switched on."""
+    monkeypatch.setenv("PREDICT_MICROBATCH_ENABLED", "true")
+    monkeypatch.setenv("PREDICT_MICROBATCH_MAX_WAIT_US", "500")
+
+    with TestClient(app) as client:
+        response = client.post("/predict", json={"features": sample_features})
+        assert response.status_code == 200
+        assert response.json()["prediction"] == "setosa"
+
+        response = client.post("/predict", json={"features": {"bad": 1.0}})
+        assert response.status_code == 400
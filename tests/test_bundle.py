@@ -0,0 +1,102 @@
+"""Tests for versioned model bundles."""
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from src.models import loader
+from src.models.bundle import MANIFEST_FILE, is_bundle, load_bundle, save_bundle
+from src.models.iris_classifier import IrisClassifier
+from src.models.tree_engine import CompiledForest
+
+ROWS = np.random.default_rng(0).uniform(0, 8, size=(500, 4))
+
+
+@pytest.fixture
+def bundle_dir(tmp_path: Path, classifier: IrisClassifier) -> Path:
+    """models/model.pkl written as a bundle."""
+    return save_bundle(
+        tmp_path / "bundle",
+        CompiledForest.from_sklearn(classifier.model),
+        classifier.feature_names,
+        classifier.target_names,
+        "1.0.0",
+        reference={"features": {}},
+    )
+
+
+def test_bundle_matches_sklearn(
+    bundle_dir: Path, classifier: IrisClassifier, sample_features
+):
+    bundled = IrisClassifier(bundle_dir)
+
+    assert bundled.model is None
+    assert bundled.backend == "compiled"
+    assert (bundled.version, bundled.feature_names, bundled.target_names) == (
+        "1.0.0",
+        classifier.feature_names,
+        classifier.target_names,
+    )
+    np.testing.assert_array_equal(
+        bundled.predict_proba(ROWS), classifier.model.predict_proba(ROWS)
+    )
+    assert bundled.predict(sample_features)["prediction"] == "setosa"
+
+    forest, _ = load_bundle(bundle_dir)
+    assert isinstance(forest.feature, np.memmap)
+
+
+def test_incomplete_bundle_is_not_a_bundle(bundle_dir: Path):
+    """The manifest is written last; without it the directory isn't used."""
+    assert is_bundle(bundle_dir)
+    (bundle_dir / MANIFEST_FILE).unlink()
+    assert not is_bundle(bundle_dir)
+
+
+def test_other_format_refused(bundle_dir: Path):
+    manifest = json.loads((bundle_dir / MANIFEST_FILE).read_text())
+    manifest["format"] = 2
+    (bundle_dir / MANIFEST_FILE).write_text(json.dumps(manifest))
+
+    with pytest.raises(ValueError, match="has format 2"):
+        IrisClassifier(bundle_dir)
+
+
+def test_table_not_matching_manifest_refused(bundle_dir: Path):
+    forest, _ = load_bundle(bundle_dir)
+    np.save(bundle_dir / "values.npy", np.asarray(forest.values, dtype=np.float32))
+
+    with pytest.raises(ValueError, match="values.npy is <f4"):
+        load_bundle(bundle_dir)
+
+
+def test_object_arrays_refused(bundle_dir: Path):
+    """A table that would need unpickling is never loaded."""
+    forest, _ = load_bundle(bundle_dir)
+    np.save(
+        bundle_dir / "feature.npy",
+        np.array([object()] * len(forest.feature)),
+        allow_pickle=True,
+    )
+
+    with pytest.raises(ValueError, match="Python objects"):
+        load_bundle(bundle_dir)
+
+
+def test_compiled_backend_serves_bundle(
+    monkeypatch: pytest.MonkeyPatch, bundle_dir: Path
+):
+    monkeypatch.delenv("MLFLOW_TRACKING_URI", raising=False)
+    monkeypatch.setattr(loader, "DEFAULT_BUNDLE_PATH", bundle_dir)
+
+    monkeypatch.setenv("MODEL_BACKEND", "compiled")
+    served = loader.load_model()
+    assert served is not None and served.model is None
+    assert served.reference == {"features": {}}
+
+    # the sklearn backend needs the estimator, so it keeps model.pkl
+    monkeypatch.setenv("MODEL_BACKEND", "sklearn")
+    served = loader.load_model()
+    assert served is not None and served.model is not None
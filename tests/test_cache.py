@@ -0,0 +1,117 @@
+"""Tests for the prediction result cache."""
+
+import pickle
+
+import numpy as np
+import pytest
+
+from src.models.cache import PredictionCache
+from src.models.iris_classifier import IrisClassifier
+from src.monitoring.metrics import PREDICTION_CACHE_EVICTIONS
+
+
+def _evictions(reason: str) -> float:
+    return PREDICTION_CACHE_EVICTIONS.labels(reason=reason)._value.get()
+
+
+def test_hit_and_miss():
+    """A stored result should come back for the same key and version."""
+    cache = PredictionCache(maxsize=10)
+    key = cache.make_keys(np.array([[1.0, 2.0]]))[0]
+
+    assert cache.get("1", key) is None
+    cache.put("1", key, {"prediction": "setosa"})
+    assert cache.get("1", key) == {"prediction": "setosa"}
+
+
+def test_lru_eviction():
+    """The least recently used entry should go first when full."""
+    cache = PredictionCache(maxsize=2)
+    a, b, c = cache.make_keys(np.array([[1.0], [2.0], [3.0]]))
+    before = _evictions("lru")
+
+    cache.put("1", a, {"v": "a"})
+    cache.put("1", b, {"v": "b"})
+    cache.get("1", a)  # a is now most recent
+    cache.put("1", c, {"v": "c"})
+
+    assert cache.get("1", b) is None
+    assert cache.get("1", a) == {"v": "a"}
+    assert _evictions("lru") == before + 1
+
+
+def test_ttl_expiry(monkeypatch: pytest.MonkeyPatch):
+    """Entries older than the TTL should be treated as misses."""
+    now = [1000.0]
+    monkeypatch.setattr("src.models.cache.time.monotonic", lambda: now[0])
+    cache = PredictionCache(ttl_seconds=10)
+    key = cache.make_keys(np.array([[1.0]]))[0]
+
+    cache.put("1", key, {"v": 1})
+    now[0] += 9
+    assert cache.get("1", key) is not None
+    now[0] += 2
+    assert cache.get("1", key) is None
+    assert len(cache) == 0
+
+
+def test_new_version_invalidates():
+    """Looking up under a new model version should drop every old entry."""
+    cache = PredictionCache()
+    key = cache.make_keys(np.array([[1.0]]))[0]
+    cache.put("1", key, {"v": 1})
+
+    assert cache.get("2", key) is None
+    assert len(cache) == 0
+
+
+def test_rounding_shares_entries():
+    """With rounding on, nearby inputs should map to the same key."""
+    cache = PredictionCache(round_digits=1)
+    k1, k2 = cache.make_keys(np.array([[5.11, 3.5], [5.14, 3.5]]))
+    assert k1 == k2
+
+
+def test_pickles_with_its_entries():
+    """Process workers get a copy of the model, cache included."""
+    cache = PredictionCache()
+    cache.put("v1", (1.0,), {"prediction": "a"})
+
+    copy = pickle.loads(pickle.dumps(cache))
+    assert copy.get("v1", (1.0,)) == {"prediction": "a"}
+    copy.put("v1", (2.0,), {"prediction": "b"})
+    assert len(copy) == 2 and len(cache) == 1
+
+
+def test_classifier_serves_hits_from_cache(
+    classifier: IrisClassifier, sample_features: dict[str, float]
+):
+    """Second call should come from the cache with no model call."""
+    classifier.cache = PredictionCache()
+    first = classifier.predict(sample_features)
+
+    classifier._predict_proba = None  # any model call would now blow up
+    second = classifier.predict(sample_features)
+
+    assert second["prediction"] == first["prediction"]
+    assert second["confidence"] == first["confidence"]
+    assert second["inference_time_ms"] == 0.0
+
+
+def test_classifier_batch_mixes_hits_and_misses(
+    classifier: IrisClassifier, sample_features: dict[str, float]
+):
+    """A batch should keep row order when only some rows are cached."""
+    virginica = {
+        "sepal length (cm)": 6.7,
+        "sepal width (cm)": 3.0,
+        "petal length (cm)": 5.2,
+        "petal width (cm)": 2.3,
+    }
+    classifier.cache = PredictionCache()
+    classifier.predict(sample_features)
+
+    results = classifier.predict_batch([virginica, sample_features, virginica])
+    assert [r["prediction"] for r in results] == ["virginica", "setosa", "virginica"]
+    assert results[1]["inference_time_ms"] == 0.0
+    assert len(classifier.cache) == 2
@@ -0,0 +1,200 @@
+"""Tests for streaming drift monitoring against the training profile."""
+
+import json
+import pickle
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from prometheus_client import REGISTRY, CollectorRegistry, multiprocess
+from sklearn.datasets import load_iris
+
+from src.api.executor import InferenceExecutor
+from src.models.cache import PredictionCache
+from src.models.iris_classifier import IrisClassifier
+from src.monitoring import drift, metrics
+from src.monitoring.drift import REFERENCE_FILE, DriftMonitor
+from training.train_iris import reference_profile
+
+ROOT = Path(__file__).parent.parent
+
+X, _ = load_iris(return_X_y=True)
+
+
+@pytest.fixture
+def reference(classifier: IrisClassifier) -> dict:
+    return reference_profile(
+        X,
+        classifier.model.predict_proba(X),
+        classifier.feature_names,
+        classifier.target_names,
+    )
+
+
+def observe(monitor: DriftMonitor, classifier: IrisClassifier, rows: np.ndarray):
+    proba = classifier.model.predict_proba(rows)
+    monitor.observe(rows, proba.argmax(axis=1), proba.max(axis=1))
+
+
+def test_training_traffic_has_no_drift(reference, classifier):
+    monitor = DriftMonitor(reference)
+    for batch in np.array_split(X, 7):
+        observe(monitor, classifier, batch)
+
+    scores = monitor.scores()
+    assert scores["rows"] == len(X)
+    assert max(scores["psi"].values()) < 1e-6
+    for feature in classifier.feature_names:
+        assert scores["mean_shift"][feature] == pytest.approx(0.0, abs=1e-9)
+        assert scores["std_ratio"][feature] == pytest.approx(1.0)
+
+
+def test_shifted_feature_stands_out(reference, classifier):
+    monitor = DriftMonitor(reference)
+    shifted = X.copy()
+    shifted[:, 2] += 2.0
+    observe(monitor, classifier, shifted)
+
+    scores = monitor.scores()
+    assert scores["psi"]["petal length (cm)"] > 1.0
+    assert scores["psi"]["sepal length (cm)"] < 1e-6
+    assert scores["mean_shift"]["petal length (cm)"] == pytest.approx(
+        2.0 / X[:, 2].std()
+    )
+
+
+def test_old_traffic_fades(reference, classifier):
+    monitor = DriftMonitor(reference, half_life_rows=150)
+    observe(monitor, classifier, X + 3.0)
+    drifted = monitor.scores()["psi"]["sepal width (cm)"]
+
+    for _ in range(10):
+        observe(monitor, classifier, X)
+    assert monitor.scores()["psi"]["sepal width (cm)"] < drifted / 100
+
+
+def test_missing_values_left_out(reference, classifier):
+    """A NaN (a JSON null on the fast path) mustn't stick in the decayed sums."""
+    monitor = DriftMonitor(reference)
+    rows = X.copy()
+    rows[0, 0] = np.nan
+    rows[1, 1] = np.inf
+    proba = classifier.model.predict_proba(X)
+    monitor.observe(rows, proba.argmax(axis=1), proba.max(axis=1))
+
+    scores = monitor.scores()
+    for signal in ("mean_shift", "std_ratio", "psi"):
+        assert np.isfinite(list(scores[signal].values())).all()
+    assert scores["psi"]["sepal length (cm)"] < 0.01
+    assert scores["mean_shift"]["sepal length (cm)"] == pytest.approx(
+        (X[1:, 0].mean() - X[:, 0].mean()) / X[:, 0].std()
+    )
+
+    # a feature with nothing but missing values isn't scored at all
+    only_nan = DriftMonitor(reference)
+    rows = X[:10].copy()
+    rows[:, 3] = np.nan
+    only_nan.observe(rows, proba[:10].argmax(axis=1), proba[:10].max(axis=1))
+    assert "petal width (cm)" not in only_nan.scores()["mean_shift"]
+
+
+def test_drain_and_merge_move_counts(reference, classifier):
+    """What a process worker drains adds up in the parent's copy."""
+    parent = DriftMonitor(reference)
+    worker = pickle.loads(pickle.dumps(parent))
+    observe(worker, classifier, X)
+
+    parent.merge(worker.drain())
+    assert worker.drain().rows == 0
+    assert max(parent.scores()["psi"].values()) < 1e-6
+
+
+def test_scores_exported_on_scrape(reference, classifier):
+    monitor = DriftMonitor(reference)
+    drift.activate(monitor)
+    try:
+        observe(monitor, classifier, X[:50])
+        metrics.flush()
+        # only setosa in the first 50 rows
+        assert REGISTRY.get_sample_value(
+            "model_drift_psi", {"signal": "predicted_class"}
+        ) > REGISTRY.get_sample_value("model_drift_psi", {"signal": "sepal width (cm)"})
+        assert REGISTRY.get_sample_value("model_drift_window_rows") > 49
+    finally:
+        drift.activate(None)
+
+
+async def test_process_workers_report_drift(reference, classifier, sample_features):
+    classifier.drift = DriftMonitor(reference)
+    executor = InferenceExecutor(classifier, kind="process", max_workers=1)
+    try:
+        await executor.predict_batch(classifier, [sample_features] * 3)
+    finally:
+        executor.shutdown()
+    assert classifier.drift.scores()["rows"] == pytest.approx(3, rel=1e-3)
+
+
+def test_cache_hits_observed(reference, classifier):
+    """Rows served from the prediction cache count like scored ones."""
+    rows = X[:50]  # only setosa, so the scores aren't all zero
+    classifier.drift = DriftMonitor(reference)
+    classifier.cache = PredictionCache()
+    classifier.predict_array(rows)
+    classifier._predict_proba = None  # the second pass is all hits
+    classifier.predict_array(rows)
+
+    direct = DriftMonitor(reference)
+    observe(direct, classifier, rows)
+    observe(direct, classifier, rows)
+    served, expected = classifier.drift.scores(), direct.scores()
+    assert served["rows"] == pytest.approx(expected["rows"])
+    assert served["psi"] == pytest.approx(expected["psi"])
+    assert served["psi"]["predicted_class"] > 1
+
+
+def test_activate_in_multiprocess_mode(reference, tmp_path):
+    """A reload resets this worker's scores in the shared files, no clear()."""
+    (tmp_path / REFERENCE_FILE).write_text(json.dumps(reference))
+    script = """
+import sys, warnings
+from pathlib import Path
+import numpy as np
+warnings.simplefilter("error")
+from src.monitoring import drift, metrics
+from src.monitoring.drift import DriftMonitor, load_reference
+reference = load_reference(Path(sys.argv[1]))
+monitor = DriftMonitor(reference)
+drift.activate(monitor)
+monitor.observe(np.full((50, 4), 5.0), np.zeros(50, int), np.ones(50))
+metrics.flush()
+if sys.argv[2] == "reload":
+    drift.activate(DriftMonitor(reference))
+    metrics.flush()
+"""
+    shared = tmp_path / "metrics"
+    env = {"PROMETHEUS_MULTIPROC_DIR": str(shared)}
+    for step in ["serve", "reload"]:
+        shared.mkdir()
+        subprocess.run(
+            [sys.executable, "-c", script, str(tmp_path), step],
+            env=env,
+            cwd=ROOT,
+            check=True,
+        )
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry, path=str(shared))
+        psi = registry.get_sample_value(
+            "model_drift_psi", {"signal": "predicted_class"}
+        )
+        shift = registry.get_sample_value(
+            "model_drift_mean_shift", {"feature": "petal width (cm)"}
+        )
+        if step == "serve":
+            assert psi > 1 and shift > 1
+        else:
+            assert psi == shift == 0.0
+            assert registry.get_sample_value("model_drift_window_rows") == 0
+        shutil.rmtree(shared)
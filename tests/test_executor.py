@@ -0,0 +1,107 @@
+"""Tests for the bounded inference executor."""
+
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api import main
+from src.api.executor import ExecutorSaturatedError, InferenceExecutor
+from src.models.iris_classifier import IrisClassifier
+from src.models.loader import warm_up
+
+
+async def test_runs_off_event_loop_thread(classifier: IrisClassifier):
+    """Work submitted to a thread executor should not run on the loop thread."""
+    executor = InferenceExecutor(classifier, kind="thread", max_workers=1)
+    try:
+        worker = await executor.run(threading.get_ident)
+    finally:
+        executor.shutdown()
+    assert worker != threading.get_ident()
+
+
+async def test_rejects_when_saturated(classifier: IrisClassifier):
+    """Past workers + queue, run() should fail fast instead of queueing."""
+    executor = InferenceExecutor(classifier, max_workers=1, max_queue=1)
+    gate = threading.Event()
+    try:
+        running = [asyncio.ensure_future(executor.run(gate.wait)) for _ in range(2)]
+        await asyncio.sleep(0)
+        assert executor.in_flight == 2
+
+        with pytest.raises(ExecutorSaturatedError):
+            await executor.run(gate.wait)
+
+        gate.set()
+        await asyncio.gather(*running)
+        # slots are released from the worker thread via the loop
+        await asyncio.sleep(0)
+        assert executor.in_flight == 0
+    finally:
+        gate.set()
+        executor.shutdown()
+
+
+async def test_process_pool_predict_batch(
+    classifier: IrisClassifier, sample_features: dict[str, float]
+):
+    """Process workers should score with their own copy of the model."""
+    executor = InferenceExecutor(classifier, kind="process", max_workers=1)
+    try:
+        results = await executor.predict_batch(classifier, [sample_features])
+    finally:
+        executor.shutdown()
+    assert results[0]["prediction"] == "setosa"
+
+
+async def test_process_pool_predict_array(
+    classifier: IrisClassifier, sample_features: dict[str, float]
+):
+    """Ordered feature matrices go to the workers the same way as rows."""
+    executor = InferenceExecutor(classifier, kind="process", max_workers=1)
+    try:
+        X = np.array([list(sample_features.values())])
+        results = await executor.predict_array(classifier, X)
+    finally:
+        executor.shutdown()
+    assert results[0]["prediction"] == "setosa"
+
+
+async def test_process_pool_start_spawns_warm_workers(classifier: IrisClassifier):
+    """start() brings every worker up, each warming its own model copy."""
+    executor = InferenceExecutor(
+        classifier, kind="process", max_workers=2, warmup=warm_up
+    )
+    try:
+        await executor.start()
+        assert len(executor._pool._processes) == 2
+    finally:
+        executor.shutdown()
+
+
+def test_unknown_kind(classifier: IrisClassifier):
+    """Only thread and process pools are supported."""
+    with pytest.raises(ValueError, match="Unknown executor kind"):
+        InferenceExecutor(classifier, kind="gpu")
+
+
+def test_predict_returns_429_when_saturated(
+    client: TestClient,
+    monkeypatch: pytest.MonkeyPatch,
+    sample_features: dict[str, float],
+):
+    """A full executor should turn into a fast 429, not a hung request."""
+
+    async def saturated(*args, **kwargs):
+        raise ExecutorSaturatedError("full")
+
+    monkeypatch.setattr(main.executor, "predict_batch", saturated)
+    response = client.post("/predict", json={"features": sample_features})
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "1"
+
+    # liveness stays up regardless
+    assert client.get("/health").status_code == 200
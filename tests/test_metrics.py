@@ -0,0 +1,149 @@
+"""Tests for locally aggregated prediction metrics."""
+
+import subprocess
+import sys
+import threading
+from bisect import bisect_left
+from pathlib import Path
+
+import pytest
+from prometheus_client import REGISTRY, CollectorRegistry, Histogram, multiprocess
+
+from src.api.executor import InferenceExecutor
+from src.models.iris_classifier import IrisClassifier
+from src.monitoring import metrics
+
+ROOT = Path(__file__).parent.parent
+
+
+def sample(name: str, labels: dict[str, str] | None = None) -> float:
+    return REGISTRY.get_sample_value(name, labels or {}) or 0.0
+
+
+def histogram_samples(registry, name: str, labels: dict[str, str]) -> dict:
+    """A histogram's buckets by le, plus _count and _sum."""
+    return {
+        s.labels.get("le", s.name.removeprefix(name)): s.value
+        for metric in registry.collect()
+        for s in metric.samples
+        if s.name in (f"{name}_bucket", f"{name}_count", f"{name}_sum")
+        and all(s.labels.get(k) == v for k, v in labels.items())
+    }
+
+
+def observed_directly(name: str, bounds: list[float], values: list[float]) -> dict:
+    reference = CollectorRegistry()
+    histogram = Histogram(name, "", buckets=bounds, registry=reference)
+    for value in values:
+        histogram.observe(value)
+    return histogram_samples(reference, name, {})
+
+
+STAGE_VALUES = [0.0, 0.00001, 0.00003, 0.0001, 0.2, 0.25, 5.0]
+
+
+def test_buckets_match_direct_observe():
+    """Aggregated values should land in the same buckets observe() uses."""
+    # a prometheus_client upgrade that changes its internals shows up here
+    assert metrics._BULK_OBSERVE and not metrics._direct
+    labels = {"stage": "postprocess"}
+    before = histogram_samples(REGISTRY, "request_stage_seconds", labels)
+
+    for value in STAGE_VALUES:
+        metrics.record_stage("postprocess", value)
+
+    after = histogram_samples(REGISTRY, "request_stage_seconds", labels)
+    delta = {key: after[key] - before.get(key, 0.0) for key in after}
+    expected = observed_directly(
+        "request_stage_seconds", metrics._STAGE_BOUNDS, STAGE_VALUES
+    )
+    assert delta.keys() == expected.keys()
+    for key, value in expected.items():
+        assert delta[key] == pytest.approx(value)
+
+
+def test_fallback_without_histogram_internals(monkeypatch: pytest.MonkeyPatch):
+    """Without the internals, a flush observes each call, to the same result."""
+    monkeypatch.setattr(metrics, "_BULK_OBSERVE", False)
+    pending = metrics.PendingMetrics()
+    buckets = pending.stages["postprocess"]
+    for value in STAGE_VALUES:
+        buckets[bisect_left(metrics._STAGE_BOUNDS, value)] += 1
+        buckets[-1] += value
+
+    reference = CollectorRegistry()
+    histogram = Histogram(
+        "request_stage_seconds",
+        "",
+        buckets=metrics._STAGE_BOUNDS,
+        registry=reference,
+    )
+    metrics._observe_buckets(histogram, metrics._STAGE_BOUNDS, buckets)
+
+    flushed = histogram_samples(reference, "request_stage_seconds", {})
+    expected = observed_directly(
+        "request_stage_seconds", metrics._STAGE_BOUNDS, STAGE_VALUES
+    )
+    assert flushed.keys() == expected.keys()
+    for key, value in expected.items():
+        assert flushed[key] == pytest.approx(value)
+
+
+def test_reports_other_threads_once():
+    """Counts from every thread are flushed, including finished ones, once."""
+    before = sample("predictions_total", {"predicted_class": "setosa"})
+
+    def record() -> None:
+        metrics.record_predictions({"setosa": 2})
+
+    threads = [threading.Thread(target=record) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sample("predictions_total", {"predicted_class": "setosa"}) == before + 6
+    assert sample("predictions_total", {"predicted_class": "setosa"}) == before + 6
+
+
+def test_drain_returns_only_new_observations():
+    metrics.flush()
+    metrics.record_cache_lookup(hit=True)
+    metrics.record_cache_lookup(hit=False)
+
+    pending = metrics.drain()
+    assert (pending.cache_hits, pending.cache_misses) == (1, 1)
+    assert metrics.drain().cache_hits == 0
+
+
+async def test_process_pool_worker_metrics_reach_parent(
+    classifier: IrisClassifier, sample_features: dict[str, float]
+):
+    """Stages recorded inside a process worker are exported by the parent."""
+    before = sample("request_stage_seconds_count", {"stage": "inference"})
+    executor = InferenceExecutor(classifier, kind="process", max_workers=1)
+    try:
+        await executor.predict_batch(classifier, [sample_features])
+    finally:
+        executor.shutdown()
+    assert sample("request_stage_seconds_count", {"stage": "inference"}) == before + 1
+
+
+def test_multiprocess_mode_writes_shared_files(tmp_path):
+    """With PROMETHEUS_MULTIPROC_DIR, flushed values are readable across processes."""
+    script = """
+from src.monitoring import metrics
+metrics.record_inference(0.002, {"virginica": 3})
+metrics.flush()
+"""
+    env = {"PROMETHEUS_MULTIPROC_DIR": str(tmp_path)}
+    for _ in range(2):
+        subprocess.run([sys.executable, "-c", script], env=env, cwd=ROOT, check=True)
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry, path=str(tmp_path))
+    assert (
+        registry.get_sample_value("predictions_total", {"predicted_class": "virginica"})
+        == 6
+    )
+    assert registry.get_sample_value("model_inference_seconds_count") == 2
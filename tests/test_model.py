@@ -1,11 +1,17 @@
 """Tests for the Iris classifier."""
 
+import subprocess
+import sys
+from pathlib import Path
 from unittest.mock import MagicMock, patch
 
+import numpy as np
 import pytest
 
 from src.models.iris_classifier import IrisClassifier
 
+ROOT = Path(__file__).parent.parent
+
 
 def test_model_loads(classifier: IrisClassifier):
     """Model should load without errors."""
@@ -75,6 +81,61 @@ def test_predict_missing_feature(classifier: IrisClassifier):
         classifier.predict(incomplete)
 
 
+def test_predict_batch_matches_predict(
+    classifier: IrisClassifier, sample_features: dict[str, float]
+):
+    """Batch scoring should give the same answer as scoring row by row."""
+    virginica = {
+        "sepal length (cm)": 6.7,
+        "sepal width (cm)": 3.0,
+        "petal length (cm)": 5.2,
+        "petal width (cm)": 2.3,
+    }
+    rows = [sample_features, virginica, sample_features]
+    results = classifier.predict_batch(rows)
+
+    assert len(results) == 3
+    for row, result in zip(rows, results, strict=True):
+        single = classifier.predict(row)
+        assert result["prediction"] == single["prediction"]
+        assert result["confidence"] == single["confidence"]
+    assert results[1]["prediction"] == "virginica"
+
+
+def test_predict_batch_empty(classifier: IrisClassifier):
+    """Empty batch should return an empty list without calling the model."""
+    assert classifier.predict_batch([]) == []
+
+
+def test_predict_batch_missing_feature(classifier: IrisClassifier):
+    """A missing feature in any row should raise KeyError."""
+    with pytest.raises(KeyError):
+        classifier.predict_batch([{"sepal length (cm)": 5.0}])
+
+
+def test_predict_array_matches_predict_batch(
+    classifier: IrisClassifier, sample_features: dict[str, float]
+):
+    """Positional rows in feature_names order score like named rows."""
+    X = np.array([[sample_features[name] for name in classifier.feature_names]])
+    assert classifier.predict_array(X)[0]["prediction"] == (
+        classifier.predict_batch([sample_features])[0]["prediction"]
+    )
+
+
+def test_predict_array_wrong_width(classifier: IrisClassifier):
+    """A matrix with the wrong number of columns is rejected, not guessed at."""
+    with pytest.raises(ValueError, match="4 features"):
+        classifier.predict_array(np.zeros((2, 3)))
+
+
+def test_warmup_times_each_batch_size(classifier: IrisClassifier):
+    """Warmup runs every size the requested number of times."""
+    timings = classifier.warmup(batch_sizes=[1, 16], iterations=3)
+    assert list(timings) == [1, 16]
+    assert all(len(passes) == 3 and min(passes) > 0 for passes in timings.values())
+
+
 def test_get_model_info(classifier: IrisClassifier):
     """Model info should have expected fields."""
     info = classifier.get_model_info()
@@ -86,6 +147,13 @@ def test_get_model_info(classifier: IrisClassifier):
     assert "classes" in info
 
 
+def test_importing_model_does_not_import_mlflow():
+    """mlflow should only load when the registry path is actually used."""
+    code = "import sys; import src.api.main; " "sys.exit('mlflow' in sys.modules)"
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT)
+    assert result.returncode == 0
+
+
 def test_model_not_found():
     """Should raise error for missing model file."""
     with pytest.raises(FileNotFoundError):
@@ -95,9 +163,10 @@ def test_model_not_found():
 # --- MLflow loading tests ---
 
 
-@patch("src.models.iris_classifier.MlflowClient")
-@patch("src.models.iris_classifier.mlflow")
-def test_from_mlflow(mock_mlflow, mock_client_cls):
+@patch("mlflow.tracking.MlflowClient")
+@patch("mlflow.set_tracking_uri")
+@patch("mlflow.sklearn.load_model")
+def test_from_mlflow(mock_load_model, mock_set_uri, mock_client_cls):
     """Should load model from MLflow registry with correct metadata."""
     mock_client = MagicMock()
     mock_client_cls.return_value = mock_client
@@ -118,7 +187,7 @@ def test_from_mlflow(mock_mlflow, mock_client_cls):
 
     # fake sklearn model
     fake_model = MagicMock()
-    mock_mlflow.sklearn.load_model.return_value = fake_model
+    mock_load_model.return_value = fake_model
 
     clf = IrisClassifier.from_mlflow(
         "http://mlflow:5000", "iris-classifier", "Production"
@@ -133,14 +202,13 @@ def test_from_mlflow(mock_mlflow, mock_client_cls):
         "petal width (cm)",
     ]
     assert clf.target_names == ["setosa", "versicolor", "virginica"]
-    mock_mlflow.sklearn.load_model.assert_called_once_with(
-        "models:/iris-classifier/Production"
-    )
+    # the resolved version, so a promotion in between can't load other bytes
+    mock_load_model.assert_called_once_with("models:/iris-classifier/3")
 
 
-@patch("src.models.iris_classifier.MlflowClient")
-@patch("src.models.iris_classifier.mlflow")
-def test_from_mlflow_no_versions(mock_mlflow, mock_client_cls):
+@patch("mlflow.tracking.MlflowClient")
+@patch("mlflow.set_tracking_uri")
+def test_from_mlflow_no_versions(mock_set_uri, mock_client_cls):
     """Should raise RuntimeError when no model at requested stage."""
     mock_client = MagicMock()
     mock_client_cls.return_value = mock_client
@@ -150,3 +218,24 @@ def test_from_mlflow_no_versions(mock_mlflow, mock_client_cls):
         IrisClassifier.from_mlflow(
             "http://mlflow:5000", "iris-classifier", "Production"
         )
+
+
+@patch("mlflow.tracking.MlflowClient")
+@patch("mlflow.set_tracking_uri")
+@patch("mlflow.sklearn.load_model")
+def test_from_mlflow_exact_version(mock_load_model, mock_set_uri, mock_client_cls):
+    """A numeric stage should resolve that exact registry version."""
+    mock_client = MagicMock()
+    mock_client_cls.return_value = mock_client
+    mock_client.get_model_version.return_value = MagicMock(version="7", run_id="r7")
+    mock_client.get_run.return_value.data.tags = {
+        "feature_names": "a,b",
+        "target_names": "x,y",
+    }
+
+    clf = IrisClassifier.from_mlflow("http://mlflow:5000", "iris-classifier", "7")
+
+    assert clf.version == "7"
+    mock_client.get_model_version.assert_called_once_with("iris-classifier", "7")
+    mock_client.get_latest_versions.assert_not_called()
+    mock_load_model.assert_called_once_with("models:/iris-classifier/7")
@@ -0,0 +1,192 @@
+"""Tests for the in-process multi-model registry."""
+
+import asyncio
+from typing import Any
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api import main
+from src.models import resolver
+from src.models.interface import ModelInterface
+from src.models.iris_classifier import IrisClassifier
+from src.models.registry import ModelNotFoundError, ModelRegistry
+
+
+class SizedModel(ModelInterface):
+    """Fake model with a fixed memory footprint."""
+
+    def __init__(self, name: str, size: int):
+        self.name = name
+        self.size = size
+
+    def predict(self, features: dict[str, Any]) -> dict[str, Any]:
+        return {"prediction": self.name}
+
+    def memory_bytes(self) -> int:
+        return self.size
+
+    def get_model_info(self) -> dict[str, Any]:
+        return {"name": self.name}
+
+
+class CountingLoader:
+    def __init__(self, size: int = 100):
+        self.size = size
+        self.calls: list[tuple[str, str]] = []
+
+    def __call__(self, name: str, version: str) -> ModelInterface:
+        if name == "missing":
+            raise ModelNotFoundError(name)
+        self.calls.append((name, version))
+        return SizedModel(f"{name}/{version}", self.size)
+
+
+async def test_loads_on_demand_and_reuses():
+    """First get loads, later gets are served from memory."""
+    loader = CountingLoader()
+    registry = ModelRegistry(loader, memory_budget_bytes=1000)
+
+    first = await registry.get("iris", "1")
+    again = await registry.get("iris", "1")
+
+    assert first is again
+    assert loader.calls == [("iris", "1")]
+
+
+async def test_concurrent_gets_share_one_load():
+    """A burst of requests for a cold model should load it once."""
+    loader = CountingLoader()
+    registry = ModelRegistry(loader, memory_budget_bytes=1000)
+
+    models = await asyncio.gather(*(registry.get("iris", "2") for _ in range(5)))
+
+    assert len({id(m) for m in models}) == 1
+    assert loader.calls == [("iris", "2")]
+
+
+async def test_evicts_least_recently_used_over_budget():
+    """Going over budget should drop the coldest model, not the newest."""
+    registry = ModelRegistry(CountingLoader(size=100), memory_budget_bytes=250)
+
+    await registry.get("iris", "1")
+    await registry.get("iris", "2")
+    await registry.get("iris", "1")  # 2 is now least recently used
+    await registry.get("iris", "3")
+
+    assert ("iris", "1") in registry
+    assert ("iris", "2") not in registry
+    assert ("iris", "3") in registry
+    assert registry.memory_bytes == 200
+
+
+async def test_pinned_models_are_never_evicted():
+    """The default model stays resident even when it's the coldest."""
+    registry = ModelRegistry(CountingLoader(size=100), memory_budget_bytes=150)
+    registry.put("iris", "default", SizedModel("default", 100), pinned=True)
+
+    await registry.get("iris", "1")
+    await registry.get("iris", "2")
+
+    assert ("iris", "default") in registry
+    assert ("iris", "1") not in registry
+
+    registry.unpin("iris", "default")
+    assert ("iris", "default") not in registry
+
+
+async def test_missing_model_raises():
+    """Unknown models should surface as ModelNotFoundError, and not stick."""
+    registry = ModelRegistry(CountingLoader(), memory_budget_bytes=1000)
+    with pytest.raises(ModelNotFoundError):
+        await registry.get("missing", "1")
+    assert ("missing", "1") not in registry
+
+
+def test_classifier_memory_bytes(classifier: IrisClassifier, model_path):
+    """Compiled backend holds its node tables on top of the estimator."""
+    compiled = IrisClassifier(model_path, backend="compiled")
+    assert classifier.memory_bytes() > 0
+    assert compiled.memory_bytes() > classifier.memory_bytes()
+
+
+def test_models_route_serves_default(
+    client: TestClient, sample_features: dict[str, float]
+):
+    """The default model should be reachable by name and version."""
+    listing = client.get("/models").json()
+    assert listing["models"][0]["pinned"] is True
+    name = listing["models"][0]["name"]
+    version = listing["models"][0]["version"]
+
+    response = client.post(
+        f"/models/{name}/{version}/predict", json={"features": sample_features}
+    )
+    assert response.status_code == 200
+    assert response.json()["prediction"] == "setosa"
+
+
+def test_models_route_loads_other_versions(
+    client: TestClient,
+    monkeypatch: pytest.MonkeyPatch,
+    model_path,
+    sample_features: dict[str, float],
+):
+    """Unloaded versions should be loaded through the registry loader."""
+
+    def loader(name, version):
+        clf = IrisClassifier(model_path)
+        clf.version = version
+        return clf
+
+    monkeypatch.setattr(main.registry, "loader", loader)
+    response = client.post(
+        "/models/iris-classifier/7/predict", json={"features": sample_features}
+    )
+    assert response.status_code == 200
+    assert response.json()["model_version"] == "7"
+    assert len(client.get("/models").json()["models"]) == 2
+
+
+def test_models_route_unknown_model(
+    client: TestClient, sample_features: dict[str, float]
+):
+    """Without a registry to load from, unknown models are a 404."""
+    response = client.post("/models/wine/1/predict", json={"features": sample_features})
+    assert response.status_code == 404
+
+
+def test_models_route_follows_stage(
+    monkeypatch: pytest.MonkeyPatch, model_path, sample_features: dict[str, float]
+):
+    """A stage name is served by whichever version is there now."""
+    monkeypatch.setenv("MLFLOW_TRACKING_URI", "http://mlflow:5000")
+    monkeypatch.setenv("REGISTRY_METADATA_TTL_SECONDS", "0")
+    stages = {"Production": "4"}
+    loads = []
+
+    def from_mlflow(uri, name, stage, **kwargs):
+        loads.append(stage)
+        clf = IrisClassifier(model_path)
+        clf.version = stages.get(stage, stage)
+        return clf
+
+    monkeypatch.setattr(
+        resolver,
+        "_resolve_version",
+        lambda client, name, stage: MagicMock(version=stages.get(stage, stage)),
+    )
+    monkeypatch.setattr(IrisClassifier, "from_mlflow", from_mlflow)
+
+    with TestClient(main.app) as client:
+        url = "/models/iris-classifier/Production/predict"
+        # the default model, not a second copy of it
+        response = client.post(url, json={"features": sample_features})
+        assert response.json()["model_version"] == "4"
+        assert loads == ["Production"]
+
+        stages["Production"] = "5"
+        response = client.post(url, json={"features": sample_features})
+        assert response.json()["model_version"] == "5"
+        assert loads == ["Production", "5"]
@@ -0,0 +1,169 @@
+"""Tests for zero-downtime hot model reload."""
+
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api import main
+from src.models import resolver
+from src.models.cache import PredictionCache
+from src.models.iris_classifier import IrisClassifier
+
+
+@pytest.fixture
+def registry(monkeypatch: pytest.MonkeyPatch, model_path):
+    """Fake MLflow registry whose current version the test controls."""
+    monkeypatch.setenv("MLFLOW_TRACKING_URI", "http://mlflow:5000")
+    state = {"version": "2", "loads": 0, "fail": False}
+
+    def resolve_version(client, name, stage):
+        return MagicMock(version=state["version"], run_id="r1")
+
+    def from_mlflow(
+        uri,
+        name,
+        stage,
+        backend="sklearn",
+        cache_dir=None,
+        shared_dir=None,
+        resolver=None,
+    ):
+        if state["fail"]:
+            raise OSError("artifact store unreachable")
+        state["loads"] += 1
+        clf = IrisClassifier(model_path, backend=backend)
+        clf.version = state["version"]
+        return clf
+
+    monkeypatch.setattr(resolver, "_resolve_version", resolve_version)
+    monkeypatch.setattr(IrisClassifier, "from_mlflow", from_mlflow)
+    return state
+
+
+def test_reload_swaps_to_new_version(
+    client: TestClient, registry, sample_features: dict[str, float]
+):
+    """A new registry version should be loaded and served without restart."""
+    old_model = main.model
+
+    response = client.post("/admin/reload")
+    assert response.status_code == 200
+    assert response.json() == {
+        "status": "reloaded",
+        "version": "2",
+        "previous_version": "1.0.0",
+    }
+    assert main.model is not old_model
+
+    prediction = client.post("/predict", json={"features": sample_features})
+    assert prediction.json()["model_version"] == "2"
+
+
+def test_reload_warms_new_version_before_swap(
+    client: TestClient, registry, monkeypatch
+):
+    """The new version is warmed up while the old one still serves."""
+    warmed = []
+    original = IrisClassifier.warmup
+
+    def warmup(self, batch_sizes=(1,), iterations=1):
+        warmed.append((self.version, main.model.version, list(batch_sizes)))
+        return original(self, batch_sizes, iterations)
+
+    monkeypatch.setattr(IrisClassifier, "warmup", warmup)
+    monkeypatch.setenv("WARMUP_BATCH_SIZES", "1,4")
+    client.post("/admin/reload")
+
+    assert warmed == [("2", "1.0.0", [1, 4])]
+
+
+def test_reload_unchanged_skips_load(client: TestClient, registry):
+    """Same version in the registry should not trigger a load."""
+    client.post("/admin/reload")
+    response = client.post("/admin/reload")
+
+    assert response.json()["status"] == "unchanged"
+    assert registry["loads"] == 1
+
+
+def test_reload_force(client: TestClient, registry):
+    """force=true should reload even when the version hasn't changed."""
+    client.post("/admin/reload")
+    response = client.post("/admin/reload", params={"force": "true"})
+
+    assert response.json()["status"] == "reloaded"
+    assert registry["loads"] == 2
+
+
+def test_failed_reload_keeps_old_model(client: TestClient, registry):
+    """If the new version can't load, the current one must keep serving."""
+    old_model = main.model
+    registry["fail"] = True
+
+    response = client.post("/admin/reload")
+    assert response.status_code == 502
+    assert main.model is old_model
+    assert client.get("/ready").status_code == 200
+
+
+def test_reload_without_registry(client: TestClient, monkeypatch):
+    """Reload needs a tracking URI to know where to look."""
+    monkeypatch.delenv("MLFLOW_TRACKING_URI", raising=False)
+    response = client.post("/admin/reload")
+    assert response.status_code == 409
+
+
+def test_admin_token_required(client: TestClient, registry, monkeypatch):
+    """With ADMIN_TOKEN set, admin endpoints should reject other callers."""
+    monkeypatch.setenv("ADMIN_TOKEN", "s3cret")
+
+    assert client.post("/admin/reload").status_code == 401
+    response = client.post("/admin/reload", headers={"X-Admin-Token": "s3cret"})
+    assert response.status_code == 200
+
+
+def test_cache_carries_over_and_clears(client: TestClient, registry, model_path):
+    """The result cache should move to the new model, emptied."""
+    cache = PredictionCache()
+    main.model.cache = cache
+    main.model.predict_batch([dict.fromkeys(main.model.feature_names, 1.0)])
+    assert len(cache) == 1
+
+    client.post("/admin/reload")
+    assert main.model.cache is cache
+    assert len(cache) == 0
+
+
+def test_reload_errors_map_to_status(client: TestClient, registry, monkeypatch):
+    """Only a missing registry is a conflict; registry answers keep their meaning."""
+
+    def empty_stage(client, name, stage):
+        raise RuntimeError(f"No model '{name}' found at stage '{stage}'")
+
+    monkeypatch.setattr(resolver, "_resolve_version", empty_stage)
+    response = client.post("/admin/reload")
+    assert response.status_code == 404
+    assert "No model" in response.json()["detail"]
+
+    def slow(client, name, stage):
+        raise resolver.RegistryTimeoutError("no answer")
+
+    monkeypatch.setattr(resolver, "_resolve_version", slow)
+    assert client.post("/admin/reload").status_code == 504
+
+
+def test_cache_on_model_before_workers_start(client: TestClient, registry, monkeypatch):
+    """Process workers copy the model at pool start, cache included."""
+    cache = PredictionCache()
+    main.model.cache = cache
+    handed: list[PredictionCache | None] = []
+    with_model = main.executor.with_model
+
+    def spy(new):
+        handed.append(new.cache)
+        return with_model(new)
+
+    monkeypatch.setattr(main.executor, "with_model", spy)
+    client.post("/admin/reload")
+    assert handed == [cache]
@@ -0,0 +1,157 @@
+"""Tests for bounded, cached MLflow registry lookups."""
+
+import asyncio
+import threading
+import time
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.models.artifact_cache import ArtifactCache
+from src.models.iris_classifier import IrisClassifier
+from src.models.resolver import RegistryResolver, RegistryTimeoutError
+
+pytest.importorskip("mlflow")
+
+TAGS = {
+    "feature_names": "sepal length (cm),sepal width (cm),petal length (cm),petal width (cm)",
+    "target_names": "setosa,versicolor,virginica",
+}
+
+
+@pytest.fixture(scope="module")
+def sqlite_registry(tmp_path_factory: pytest.TempPathFactory):
+    """A real sqlite-backed registry with iris v1 in Production."""
+    from mlflow.tracking import MlflowClient
+
+    uri = f"sqlite:///{tmp_path_factory.mktemp('mlflow') / 'mlflow.db'}"
+    client = MlflowClient(uri)
+    run = client.create_run(client.create_experiment("iris"), tags=TAGS)
+    client.create_registered_model("iris")
+    mv = client.create_model_version("iris", "/nowhere", run_id=run.info.run_id)
+    client.transition_model_version_stage("iris", mv.version, "Production")
+    return uri, client, run.info.run_id
+
+
+def test_resolves_from_sqlite_registry(sqlite_registry):
+    uri, client, run_id = sqlite_registry
+    resolver = RegistryResolver(uri)
+    try:
+        mv = resolver.version("iris", "Production")
+        assert (str(mv.version), mv.run_id) == ("1", run_id)
+        assert resolver.version("iris", "1").run_id == run_id
+        assert resolver.run_tags(run_id)["target_names"] == TAGS["target_names"]
+
+        with pytest.raises(RuntimeError, match="No model 'iris' found at stage"):
+            resolver.version("iris", "Staging")
+    finally:
+        resolver.close()
+
+
+def test_stage_lookups_cached_until_fresh(sqlite_registry):
+    """A promotion shows up once the TTL passes, or right away with fresh=True."""
+    uri, client, run_id = sqlite_registry
+    resolver = RegistryResolver(uri, ttl_seconds=60)
+    try:
+        assert str(resolver.version("iris", "Production").version) == "1"
+        mv = client.create_model_version("iris", "/nowhere", run_id=run_id)
+        client.transition_model_version_stage(
+            "iris", mv.version, "Production", archive_existing_versions=True
+        )
+
+        assert str(resolver.version("iris", "Production").version) == "1"
+        assert str(resolver.version("iris", "Production", fresh=True).version) == "2"
+        assert str(resolver.version("iris", "Production").version) == "2"
+    finally:
+        resolver.close()
+
+
+@pytest.fixture
+def slow_client():
+    """Patched MlflowClient whose stage lookups block until released."""
+    release = threading.Event()
+    with patch("mlflow.tracking.MlflowClient") as client_cls:
+        client = MagicMock()
+        client_cls.return_value = client
+
+        def latest(name, stages):
+            release.wait()
+            return [MagicMock(version="3", run_id="abc123")]
+
+        client.get_latest_versions.side_effect = latest
+        client.get_run.return_value.data.tags = TAGS
+        yield client, release
+        release.set()
+
+
+async def test_concurrent_lookups_share_one_call(slow_client):
+    client, release = slow_client
+    resolver = RegistryResolver("http://m", timeout_seconds=5)
+    try:
+        lookups = [resolver.version_async("iris", "Production") for _ in range(5)]
+        release.set()
+        versions = await asyncio.gather(*lookups)
+    finally:
+        resolver.close()
+    assert {mv.version for mv in versions} == {"3"}
+    assert client.get_latest_versions.call_count == 1
+
+
+async def test_slow_registry_times_out(slow_client):
+    """The event loop gets control back after the timeout, not when MLflow answers."""
+    client, release = slow_client
+    resolver = RegistryResolver("http://m", timeout_seconds=0.2, ttl_seconds=60)
+    try:
+        start = time.perf_counter()
+        with pytest.raises(RegistryTimeoutError, match="within 0.2s"):
+            await resolver.version_async("iris", "Production")
+        assert time.perf_counter() - start < 1.0
+
+        # the lookup is still shared once the registry answers
+        release.set()
+        assert resolver.version("iris", "Production").version == "3"
+        assert client.get_latest_versions.call_count == 1
+    finally:
+        resolver.close()
+
+
+def test_failures_cached_for_ttl():
+    with patch("mlflow.tracking.MlflowClient") as client_cls:
+        client = client_cls.return_value
+        client.get_latest_versions.side_effect = ConnectionError("refused")
+        resolver = RegistryResolver("http://m", ttl_seconds=60)
+        try:
+            for _ in range(3):
+                with pytest.raises(ConnectionError):
+                    resolver.version("iris", "Production")
+        finally:
+            resolver.close()
+    assert client.get_latest_versions.call_count == 1
+
+
+def test_hanging_registry_falls_back_to_pinned(
+    tmp_path: Path, slow_client, classifier: IrisClassifier
+):
+    """from_mlflow starts from the cached version instead of waiting on MLflow."""
+    _, release = slow_client
+    cache = ArtifactCache(tmp_path)
+    cache.put(
+        "iris",
+        "3",
+        "abc123",
+        classifier.model,
+        classifier.feature_names,
+        classifier.target_names,
+    )
+    cache.pin("iris", "Production", "3", "abc123")
+
+    resolver = RegistryResolver("http://m", timeout_seconds=0.2)
+    try:
+        with patch("mlflow.set_tracking_uri"):
+            clf = IrisClassifier.from_mlflow(
+                "http://m", "iris", "Production", cache_dir=tmp_path, resolver=resolver
+            )
+    finally:
+        resolver.close()
+    assert clf.version == "3"
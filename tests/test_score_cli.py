@@ -0,0 +1,105 @@
+"""Tests for the offline batch-scoring CLI."""
+
+import csv
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from src.models.iris_classifier import IrisClassifier
+from training.score import iter_tasks, score_file
+
+ROOT = Path(__file__).parent.parent
+
+
+@pytest.fixture
+def rows() -> np.ndarray:
+    return np.random.default_rng(0).uniform(0, 8, size=(1000, 4))
+
+
+def expected(classifier: IrisClassifier, X: np.ndarray) -> tuple[list[str], list]:
+    proba = classifier.model.predict_proba(X)
+    labels = [classifier.target_names[i] for i in proba.argmax(axis=1)]
+    return labels, proba.max(axis=1).tolist()
+
+
+def read_csv(path) -> tuple[list[str], list[float]]:
+    with open(path, newline="") as f:
+        records = list(csv.DictReader(f))
+    return [r["prediction"] for r in records], [float(r["confidence"]) for r in records]
+
+
+def test_npy_input_keeps_row_order(tmp_path, classifier, rows):
+    """Chunks scored by different workers come back in input order."""
+    np.save(tmp_path / "in.npy", rows)
+
+    n = score_file(classifier, tmp_path / "in.npy", tmp_path / "out.csv", 2, 64)
+
+    assert n == len(rows)
+    assert read_csv(tmp_path / "out.csv") == expected(classifier, rows)
+
+
+def test_csv_input_maps_columns_by_header(tmp_path, classifier, rows):
+    """CSV columns are matched by name, so their order doesn't matter."""
+    names = classifier.feature_names
+    with open(tmp_path / "in.csv", "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", *reversed(names)])
+        for i, row in enumerate(rows):
+            writer.writerow([i, *reversed(row.tolist())])
+
+    score_file(classifier, tmp_path / "in.csv", tmp_path / "out.csv", 2, 100)
+
+    assert read_csv(tmp_path / "out.csv") == expected(classifier, rows)
+
+
+def test_parquet_round_trip(tmp_path, classifier, rows):
+    pa = pytest.importorskip("pyarrow")
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    table = pa.table(
+        {name: rows[:, i] for i, name in enumerate(classifier.feature_names)}
+    )
+    pq.write_table(table, tmp_path / "in.parquet", row_group_size=300)
+
+    # chunks follow --chunk-rows, not the file's row groups
+    chunks = iter_tasks(tmp_path / "in.parquet", classifier.feature_names, 128)
+    assert max(len(task[1]) for task in chunks) == 128
+
+    score_file(classifier, tmp_path / "in.parquet", tmp_path / "out.parquet", 2, 128)
+
+    out = pq.read_table(tmp_path / "out.parquet")
+    labels, confidences = expected(classifier, rows)
+    assert out.column("prediction").to_pylist() == labels
+    assert out.column("confidence").to_pylist() == confidences
+
+
+def test_runs_as_a_script(tmp_path, classifier, rows, model_path):
+    """python training/score.py works without the repo root on sys.path."""
+    np.save(tmp_path / "in.npy", rows)
+    subprocess.run(
+        [
+            sys.executable,
+            str(ROOT / "training" / "score.py"),
+            "--input",
+            str(tmp_path / "in.npy"),
+            "--output",
+            str(tmp_path / "out.csv"),
+            "--model",
+            str(model_path),
+            "--workers",
+            "1",
+        ],
+        cwd=tmp_path,
+        check=True,
+        capture_output=True,
+    )
+    assert read_csv(tmp_path / "out.csv") == expected(classifier, rows)
+
+
+def test_rejects_wrong_width_npy(tmp_path, classifier):
+    np.save(tmp_path / "in.npy", np.zeros((10, 3)))
+    with pytest.raises(ValueError, match="expected"):
+        score_file(classifier, tmp_path / "in.npy", tmp_path / "out.csv", 1, 5)
@@ -0,0 +1,144 @@
+"""Tests for mirroring /predict traffic to a shadow model."""
+
+import copy
+import threading
+import time
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from sklearn.datasets import load_iris
+
+from src.api import main
+from src.api.shadow import ShadowScorer
+from src.models import resolver
+from src.models.iris_classifier import IrisClassifier
+
+X, _ = load_iris(return_X_y=True)
+
+
+def sample(name: str, **labels: str) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def rows_of(classifier: IrisClassifier, X: np.ndarray) -> list[dict[str, float]]:
+    return [dict(zip(classifier.feature_names, row, strict=True)) for row in X]
+
+
+def test_same_model_always_agrees(classifier: IrisClassifier):
+    shadow = ShadowScorer(classifier, fraction=1.0)
+    rows = rows_of(classifier, X[::10])
+    agreed = sample("shadow_predictions_total", result="agree")
+    deltas = sample("shadow_latency_delta_seconds_count")
+
+    shadow.mirror(rows, classifier.predict_batch(rows)).result()
+
+    assert sample("shadow_predictions_total", result="agree") - agreed == len(rows)
+    assert sample("shadow_latency_delta_seconds_count") - deltas == 1
+    shadow.close()
+
+
+def test_disagreement_is_counted(classifier: IrisClassifier):
+    """A candidate with its classes in another order disagrees on most rows."""
+    candidate = copy.copy(classifier)
+    candidate.target_names = classifier.target_names[::-1]
+    shadow = ShadowScorer(candidate, fraction=1.0)
+    rows = rows_of(classifier, X)
+    agreed = sample("shadow_predictions_total", result="agree")
+    disagreed = sample("shadow_predictions_total", result="disagree")
+
+    shadow.mirror(rows, classifier.predict_batch(rows)).result()
+
+    # only the middle class keeps its name
+    assert sample("shadow_predictions_total", result="disagree") - disagreed > 90
+    assert sample("shadow_predictions_total", result="agree") + sample(
+        "shadow_predictions_total", result="disagree"
+    ) - agreed - disagreed == len(rows)
+    shadow.close()
+
+
+def test_fraction_samples_calls(classifier: IrisClassifier, sample_features):
+    live = classifier.predict_batch([sample_features])
+    assert (
+        ShadowScorer(classifier, fraction=0.0).mirror([sample_features], live) is None
+    )
+
+    shadow = ShadowScorer(classifier, fraction=0.25, max_pending=400, seed=0)
+    mirrored = [shadow.mirror([sample_features], live) for _ in range(400)]
+    assert 60 < sum(f is not None for f in mirrored) < 140
+    shadow.close()
+
+    with pytest.raises(ValueError, match="fraction"):
+        ShadowScorer(classifier, fraction=1.5)
+
+
+def test_slow_shadow_drops_instead_of_queueing(
+    classifier: IrisClassifier, sample_features
+):
+    release = threading.Event()
+    candidate = copy.copy(classifier)
+    candidate.predict_proba = lambda X: release.wait() and classifier.predict_proba(X)
+    shadow = ShadowScorer(candidate, fraction=1.0, max_pending=2)
+    live = classifier.predict_batch([sample_features])
+    dropped = sample("shadow_requests_total", outcome="dropped")
+
+    queued = [shadow.mirror([sample_features], live) for _ in range(5)]
+    assert sum(f is not None for f in queued) == 2
+    assert sample("shadow_requests_total", outcome="dropped") - dropped == 3
+
+    release.set()
+    for future in queued:
+        if future is not None:
+            future.result()
+    assert shadow.mirror([sample_features], live) is not None
+    shadow.close()
+
+
+def test_failing_shadow_is_contained(classifier: IrisClassifier, sample_features):
+    """A candidate that wants another feature fails on its thread only."""
+    candidate = copy.copy(classifier)
+    candidate.feature_names = [*classifier.feature_names[:3], "petal area (cm2)"]
+    shadow = ShadowScorer(candidate, fraction=1.0)
+    failed = sample("shadow_requests_total", outcome="failed")
+
+    live = classifier.predict_batch([sample_features])
+    shadow.mirror([sample_features], live).result()
+    assert sample("shadow_requests_total", outcome="failed") - failed == 1
+    shadow.close()
+
+
+def test_predict_is_mirrored_to_staging(
+    monkeypatch: pytest.MonkeyPatch, model_path, sample_features
+):
+    """The Staging version shadows Production; callers only see Production."""
+    monkeypatch.setenv("MLFLOW_TRACKING_URI", "http://mlflow:5000")
+    monkeypatch.setenv("SHADOW_MODEL_STAGE", "Staging")
+    monkeypatch.setenv("SHADOW_TRAFFIC_FRACTION", "1")
+    versions = {"Production": "4", "Staging": "5"}
+
+    def from_mlflow(uri, name, stage, **kwargs):
+        clf = IrisClassifier(model_path)
+        clf.version = versions[stage]
+        return clf
+
+    monkeypatch.setattr(
+        resolver,
+        "_resolve_version",
+        lambda client, name, stage: MagicMock(version=versions[stage]),
+    )
+    monkeypatch.setattr(IrisClassifier, "from_mlflow", from_mlflow)
+
+    scored = sample("shadow_requests_total", outcome="scored")
+    with TestClient(main.app) as client:
+        assert main.shadow is not None
+        assert main.shadow.model.version == "5"
+        response = client.post("/predict", json={"features": sample_features})
+        assert response.json()["model_version"] == "4"
+
+        deadline = time.monotonic() + 5
+        while sample("shadow_requests_total", outcome="scored") == scored:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+    assert main.shadow is None
@@ -0,0 +1,142 @@
+"""Tests for models shared between worker processes via memory-mapped tables."""
+
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from src.models import loader
+from src.models.iris_classifier import IrisClassifier
+from src.models.shared import attach, file_key
+
+
+def _attach_in_worker(shared_dir: str, model_path: str) -> str:
+    model = IrisClassifier.from_shared(
+        shared_dir, "iris", lambda: IrisClassifier(model_path)
+    )
+    return model.predict_batch([dict.fromkeys(model.feature_names, 1.0)])[0][
+        "prediction"
+    ]
+
+
+def test_shared_matches_sklearn(tmp_path, model_path, classifier, sample_features):
+    shared = IrisClassifier.from_shared(
+        tmp_path, "iris", lambda: IrisClassifier(model_path)
+    )
+
+    assert shared.model is None
+    assert shared.backend == "compiled"
+    assert shared.version == str(classifier.version)
+    assert shared.feature_names == classifier.feature_names
+
+    X = np.random.default_rng(0).uniform(0, 8, size=(500, 4))
+    np.testing.assert_array_equal(
+        shared._predict_proba(X), classifier.model.predict_proba(X)
+    )
+    assert (
+        shared.predict(sample_features)["prediction"]
+        == classifier.predict(sample_features)["prediction"]
+    )
+
+
+def test_only_first_attach_loads(tmp_path, model_path):
+    loads = []
+
+    def load() -> IrisClassifier:
+        loads.append(1)
+        return IrisClassifier(model_path)
+
+    IrisClassifier.from_shared(tmp_path, "iris", load)
+    IrisClassifier.from_shared(tmp_path, "iris", load)
+
+    assert len(loads) == 1
+
+
+def test_tables_are_memory_mapped(tmp_path, model_path):
+    shared = IrisClassifier.from_shared(
+        tmp_path, "iris", lambda: IrisClassifier(model_path)
+    )
+    engine = shared._predict_proba.__self__
+
+    assert isinstance(engine.values, np.memmap)
+    assert not engine.values.flags.writeable
+
+
+def test_pickles_as_a_path(tmp_path, model_path):
+    """Process-pool workers re-map the files rather than receiving a copy."""
+    shared = IrisClassifier.from_shared(
+        tmp_path, "iris", lambda: IrisClassifier(model_path)
+    )
+    engine = shared._predict_proba.__self__
+
+    payload = pickle.dumps(shared)
+    assert len(payload) < engine.nbytes
+
+    restored = pickle.loads(payload)
+    assert isinstance(restored._predict_proba.__self__.values, np.memmap)
+
+
+def test_sklearn_backend_unavailable(tmp_path, model_path):
+    shared = IrisClassifier.from_shared(
+        tmp_path, "iris", lambda: IrisClassifier(model_path)
+    )
+    with pytest.raises(ValueError, match="compiled"):
+        shared.set_backend("sklearn")
+
+
+def test_onnx_backend_refused(tmp_path, monkeypatch: pytest.MonkeyPatch):
+    """Asking for onnx with a shared dir fails instead of serving compiled."""
+    monkeypatch.delenv("MLFLOW_TRACKING_URI", raising=False)
+    monkeypatch.setenv("MODEL_SHARED_DIR", str(tmp_path))
+    monkeypatch.setenv("MODEL_BACKEND", "onnx")
+    with pytest.raises(ValueError, match="'onnx' can't be shared"):
+        loader.load_model()
+    with pytest.raises(ValueError, match="'onnx' can't be shared"):
+        IrisClassifier.from_mlflow(
+            "http://mlflow:5000", "iris", "Production", "onnx", shared_dir=tmp_path
+        )
+
+    monkeypatch.setenv("MODEL_BACKEND", "sklearn")
+    assert loader.load_model().backend == "compiled"
+
+
+def test_workers_publish_once(tmp_path, model_path):
+    with ProcessPoolExecutor(max_workers=4) as pool:
+        futures = [
+            pool.submit(_attach_in_worker, str(tmp_path), str(model_path))
+            for _ in range(8)
+        ]
+        predictions = {f.result() for f in futures}
+
+    assert len(predictions) == 1
+    # one published entry, no leftover scratch dirs
+    assert sorted(p.name for p in tmp_path.iterdir() if not p.name.startswith(".")) == [
+        "iris"
+    ]
+    assert not list(tmp_path.glob(".tmp-*"))
+
+
+def test_failed_publish_leaves_nothing(tmp_path):
+    def publish(directory: Path) -> None:
+        (directory / "partial").write_text("x")
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        attach(tmp_path, "iris", publish)
+
+    assert not (tmp_path / "iris").exists()
+    assert not list(tmp_path.glob(".tmp-*"))
+
+
+def test_file_key_tracks_replacement(tmp_path):
+    path = tmp_path / "model.pkl"
+    path.write_bytes(b"one")
+    before = file_key(path)
+    assert file_key(path) == before
+
+    path.write_bytes(b"three")
+    os.utime(path, ns=(0, 123))
+    assert file_key(path) != before
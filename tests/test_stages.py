@@ -0,0 +1,86 @@
+"""Tests for per-stage latency metrics and the sampling profiler."""
+
+import threading
+import time
+
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from src.monitoring.metrics import STAGES
+from src.monitoring.profiler import SamplingProfiler
+
+
+def stage_counts() -> dict[str, float]:
+    return {
+        stage: REGISTRY.get_sample_value(
+            "request_stage_seconds_count", {"stage": stage}
+        )
+        or 0.0
+        for stage in STAGES
+    }
+
+
+def test_predict_records_every_stage(
+    client: TestClient, sample_features: dict[str, float]
+):
+    """One /predict call should observe each stage of the request once."""
+    before = stage_counts()
+    response = client.post("/predict", json={"features": sample_features})
+    assert response.status_code == 200
+
+    after = stage_counts()
+    assert {stage: after[stage] - before[stage] for stage in STAGES} == dict.fromkeys(
+        STAGES, 1.0
+    )
+
+
+def test_fast_path_records_parse_and_serialize(client: TestClient):
+    before = stage_counts()
+    response = client.post("/predict/fast", json=[5.1, 3.5, 1.4, 0.2])
+    assert response.status_code == 200
+
+    after = stage_counts()
+    assert after["parse"] - before["parse"] == 1
+    assert after["serialize"] - before["serialize"] == 1
+    # positional rows skip the feature-dict build
+    assert after["features"] == before["features"]
+
+
+def test_profiler_samples_other_threads():
+    stop = threading.Event()
+
+    def busy_worker() -> None:
+        while not stop.is_set():
+            sum(range(1000))
+
+    worker = threading.Thread(target=busy_worker)
+    worker.start()
+    profiler = SamplingProfiler(interval=0.001)
+    profiler.start()
+    time.sleep(0.1)
+    profiler.stop()
+    stop.set()
+    worker.join()
+
+    assert not profiler.running
+    assert any("busy_worker" in stack for stack in profiler.samples)
+    assert not any("src.monitoring.profiler:_run" in s for s in profiler.samples)
+    assert profiler.collapsed().splitlines()[0].rsplit(" ", 1)[1].isdigit()
+
+
+def test_admin_profile_returns_collapsed_stacks(client: TestClient):
+    response = client.post("/admin/profile", params={"seconds": 0.05})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert response.text.strip()
+
+
+def test_admin_profile_requires_token(client: TestClient, monkeypatch):
+    monkeypatch.setenv("ADMIN_TOKEN", "s3cret")
+    response = client.post("/admin/profile", params={"seconds": 0.05})
+    assert response.status_code == 401
+
+
+def test_admin_profile_caps_duration(client: TestClient):
+    response = client.post("/admin/profile", params={"seconds": 600})
+    assert response.status_code == 422
@@ -0,0 +1,56 @@
+"""Tests for startup-phase instrumentation."""
+
+from fastapi.testclient import TestClient
+
+from src.api import main
+from src.api.main import app
+from src.monitoring.startup import StartupTimer, process_age
+
+
+def test_process_age_is_plausible():
+    """The test process has been running for a while, but not for days."""
+    age = process_age()
+    assert age is not None
+    assert 0 < age < 24 * 3600
+
+
+def test_phase_records_duration():
+    """phase() should time the block and keep the result."""
+    timer = StartupTimer()
+    with timer.phase("model_load"):
+        pass
+    assert timer.phases["model_load"] >= 0
+
+
+def test_first_request_recorded_once():
+    """Only the very first request counts as the first request."""
+    timer = StartupTimer()
+    timer.record_first_request(0.5)
+    timer.record_first_request(0.1)
+    assert timer.phases["first_request"] == 0.5
+    assert not timer.first_request_pending
+
+
+def test_startup_phases_exposed_as_metrics(client: TestClient):
+    """Load and warmup phases should be scrapeable once the app is up."""
+    body = client.get("/metrics").text
+    assert 'startup_phase_seconds{phase="model_load"}' in body
+    assert 'startup_phase_seconds{phase="warmup"}' in body
+    assert 'startup_phase_seconds{phase="import"}' in body
+
+
+def test_warmup_batch_sizes_configurable(monkeypatch):
+    """Each WARMUP_BATCH_SIZES entry gets its own warmup latency gauge."""
+    monkeypatch.setenv("WARMUP_BATCH_SIZES", "2,32")
+    with TestClient(app) as client:
+        body = client.get("/metrics").text
+    assert 'model_warmup_seconds{batch_size="2"}' in body
+    assert 'model_warmup_seconds{batch_size="32"}' in body
+
+
+def test_not_ready_until_warm(client: TestClient, monkeypatch):
+    """/ready stays 503 while the loaded model is still warming up."""
+    monkeypatch.setattr(main, "_ready", False)
+    response = client.get("/ready")
+    assert response.status_code == 503
+    assert response.json()["detail"] == "Warming up"
@@ -0,0 +1,167 @@
+"""Tests for streamed NDJSON/CSV bulk scoring."""
+
+import csv
+import io
+import json
+from collections.abc import AsyncIterator
+from typing import Any
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api.executor import ExecutorSaturatedError
+from src.api.streaming import CSV, NDJSON, iter_lines, retrying, score_stream
+
+FEATURES = ["a", "b"]
+
+
+async def fake_score(rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    for row in rows:
+        if set(row) != set(FEATURES):
+            raise KeyError("a")
+    return [{"prediction": "x", "sum": row["a"] + row["b"]} for row in rows]
+
+
+async def body(*chunks: bytes) -> AsyncIterator[bytes]:
+    for chunk in chunks:
+        yield chunk
+
+
+async def collect(stream: AsyncIterator[bytes]) -> bytes:
+    return b"".join([piece async for piece in stream])
+
+
+async def test_iter_lines_across_chunk_boundaries():
+    lines = [line async for line in iter_lines(body(b"one\ntw", b"o\n", b"three"))]
+    assert lines == [b"one", b"two", b"three"]
+
+
+async def test_ndjson_objects_and_arrays():
+    out = await collect(
+        score_stream(
+            body(b'{"a": 1, "b": 2}\n[3, 4]\n\n'), NDJSON, FEATURES, fake_score
+        )
+    )
+    results = [json.loads(line) for line in out.splitlines()]
+    assert [r["sum"] for r in results] == [3, 7]
+
+
+async def test_bad_rows_reported_in_place():
+    """Unparseable and unscorable rows get errors; the rest are still scored."""
+    out = await collect(
+        score_stream(
+            body(b'[1, 2]\nnot json\n{"a": 1}\n[1, 2, 3]\n[5, 5]\n'),
+            NDJSON,
+            FEATURES,
+            fake_score,
+        )
+    )
+    results = [json.loads(line) for line in out.splitlines()]
+
+    assert results[0]["sum"] == 3
+    assert results[1]["line"] == 2 and "Invalid row" in results[1]["error"]
+    assert results[2]["line"] == 3 and "Missing feature" in results[2]["error"]
+    assert results[3]["line"] == 4 and "Expected 2 values" in results[3]["error"]
+    assert results[4]["sum"] == 10
+
+
+async def test_scores_in_bounded_chunks():
+    """However long the input, no model call sees more than chunk_rows rows."""
+    sizes: list[int] = []
+
+    async def score(rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        sizes.append(len(rows))
+        return await fake_score(rows)
+
+    lines = (b"[1, 2]\n" for _ in range(2500))
+    out = await collect(score_stream(body(*lines), NDJSON, FEATURES, score, 1000))
+
+    assert sizes == [1000, 1000, 500]
+    assert len(out.splitlines()) == 2500
+
+
+async def test_results_stream_before_input_ends():
+    """The first chunk's results are yielded before later input is read."""
+    read = 0
+
+    async def slow_body() -> AsyncIterator[bytes]:
+        nonlocal read
+        for _ in range(10):
+            read += 1
+            yield b"[1, 2]\n" * 10
+
+    stream = score_stream(slow_body(), NDJSON, FEATURES, fake_score, chunk_rows=10)
+    first = await anext(stream)
+
+    assert len(first.splitlines()) == 10
+    assert read == 1
+    await stream.aclose()
+
+
+async def test_csv_round_trip():
+    data = b"b,a,extra\n2,1,x\nnope,1,x\n4,3,x\n"
+    out = await collect(score_stream(body(data), CSV, FEATURES, fake_score))
+
+    rows = list(csv.DictReader(io.StringIO(out.decode())))
+    assert [r["line"] for r in rows] == ["2", "3", "4"]
+    assert rows[0]["prediction"] == "x" and rows[0]["error"] == ""
+    assert "Invalid row" in rows[1]["error"]
+    assert rows[2]["prediction"] == "x"
+
+
+async def test_csv_missing_header_column_aborts():
+    out = await collect(score_stream(body(b"a\n1\n"), CSV, FEATURES, fake_score))
+    rows = list(csv.DictReader(io.StringIO(out.decode())))
+    assert len(rows) == 1
+    assert "missing ['b']" in rows[0]["error"]
+
+
+async def test_retrying_waits_out_saturation():
+    calls = 0
+
+    async def score(rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        nonlocal calls
+        calls += 1
+        if calls < 3:
+            raise ExecutorSaturatedError("full")
+        return await fake_score(rows)
+
+    results = await retrying(score)([{"a": 1, "b": 2}])
+    assert results[0]["sum"] == 3
+    assert calls == 3
+
+
+def test_stream_endpoint_ndjson(client: TestClient, sample_features):
+    lines = [json.dumps(sample_features), json.dumps([6.7, 3.0, 5.2, 2.3])]
+    response = client.post(
+        "/predict/stream",
+        content="\n".join(lines * 50).encode(),
+        headers={"Content-Type": NDJSON},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith(NDJSON)
+
+    predictions = [json.loads(line)["prediction"] for line in response.iter_lines()]
+    assert predictions == ["setosa", "virginica"] * 50
+
+
+def test_stream_endpoint_csv(client: TestClient, sample_features):
+    header = ",".join(f'"{name}"' for name in sample_features)
+    values = ",".join(str(v) for v in sample_features.values())
+    response = client.post(
+        "/predict/stream",
+        content=f"{header}\n{values}\n".encode(),
+        headers={"Content-Type": CSV},
+    )
+    assert response.status_code == 200
+
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert rows[0]["prediction"] == "setosa"
+
+
+@pytest.mark.parametrize("content_type", ["application/json", "text/plain"])
+def test_stream_endpoint_unsupported_content_type(client: TestClient, content_type):
+    response = client.post(
+        "/predict/stream", content=b"[]", headers={"Content-Type": content_type}
+    )
+    assert response.status_code == 415
@@ -0,0 +1,115 @@
+"""Tests for the hyperparameter search in training/train_iris.py."""
+
+import argparse
+import pickle
+
+import pytest
+from sklearn.datasets import load_iris
+from sklearn.ensemble import RandomForestClassifier
+
+from training.train_iris import (
+    best_trial,
+    budget,
+    candidates,
+    measure_cost,
+    over_budget,
+    parse_space,
+    run_search,
+    run_trial,
+)
+
+
+def test_parse_space():
+    space = parse_space(
+        ["n_estimators=10,50", "max-depth=3,none", "max_features=sqrt,0.5"]
+    )
+    assert space == {
+        "n_estimators": [10, 50],
+        "max_depth": [3, None],
+        "max_features": ["sqrt", 0.5],
+    }
+    with pytest.raises(ValueError, match="NAME=V1"):
+        parse_space(["n_estimators"])
+
+
+def test_candidates():
+    space = {"n_estimators": [10, 50], "max_depth": [2, 3, None]}
+    assert len(candidates(space, "grid", 0, 0)) == 6
+
+    sampled = candidates(space, "random", 4, 0)
+    assert len(sampled) == 4
+    assert len({tuple(sorted(c.items(), key=str)) for c in sampled}) == 4
+    # never more trials than distinct combinations
+    assert len(candidates(space, "random", 100, 0)) == 6
+
+
+def test_search_matches_serial_trials():
+    """Pool results come back in trial order, same as running them one by one."""
+    X, y = load_iris(return_X_y=True)
+    trials = [
+        {"n_estimators": 5, "max_depth": 1},
+        {"n_estimators": 20, "max_depth": 4},
+        {"n_estimators": 10, "max_depth": 2},
+    ]
+    results = run_search(trials, X, y, cv=3, random_state=0, workers=2)
+
+    serial = [run_trial(t, X, y, cv=3, random_state=0) for t in trials]
+    # the cost metrics are measurements, the scores must match exactly
+    for metric in ("cv_accuracy", "cv_accuracy_std"):
+        assert [r[metric] for r in results] == [r[metric] for r in serial]
+    # a single split on one feature can't separate three classes
+    assert best_trial(results) != 0
+
+
+def trial(accuracy: float, latency: float, size: int = 1000) -> dict[str, float]:
+    return {
+        "cv_accuracy": accuracy,
+        "cv_accuracy_std": 0.01,
+        "latency_single_ms": latency,
+        "latency_batch_ms": latency * 2,
+        "model_size_bytes": size,
+        "memory_bytes": size * 2,
+    }
+
+
+def test_best_trial_prefers_cheaper_on_tie():
+    results = [trial(0.9, 0.5), trial(0.95, 9.0), trial(0.95, 2.0)]
+    assert best_trial(results) == 2
+
+
+def test_best_trial_trades_accuracy_within_tolerance():
+    results = [trial(0.96, 9.0), trial(0.95, 2.0), trial(0.90, 0.5)]
+    assert best_trial(results) == 0
+    assert best_trial(results, tolerance=0.02) == 1
+
+
+def test_best_trial_respects_budget():
+    results = [trial(0.96, 9.0), trial(0.95, 2.0, size=5_000_000)]
+    assert best_trial(results, {"latency_single_ms": 5.0}) == 1
+    assert best_trial(results, {"latency_single_ms": 5.0, "memory_bytes": 1e6}) is None
+
+
+def test_budget_from_args():
+    args = argparse.Namespace(
+        max_latency_ms=2.5,
+        max_batch_latency_ms=None,
+        max_size_mb=1.5,
+        max_memory_mb=None,
+    )
+    limits = budget(args)
+    assert limits == {"latency_single_ms": 2.5, "model_size_bytes": 1.5e6}
+    assert over_budget(trial(0.9, 3.0), limits) == ["latency_single_ms 3.000 > 2.500"]
+
+
+def test_measure_cost():
+    """Bigger forests cost more to store and to load."""
+    X, y = load_iris(return_X_y=True)
+    small = RandomForestClassifier(n_estimators=5, random_state=0).fit(X, y)
+    large = RandomForestClassifier(n_estimators=50, random_state=0).fit(X, y)
+
+    small_cost, large_cost = measure_cost(small, X), measure_cost(large, X)
+    assert small_cost["model_size_bytes"] == len(
+        pickle.dumps(small, protocol=pickle.HIGHEST_PROTOCOL)
+    )
+    assert small_cost["latency_single_ms"] > 0
+    assert large_cost["memory_bytes"] > 5 * small_cost["memory_bytes"]
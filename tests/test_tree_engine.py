@@ -0,0 +1,74 @@
+"""Parity tests for the compiled tree-ensemble engine."""
+
+import numpy as np
+import pytest
+from sklearn.datasets import make_classification
+from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+
+from src.models.iris_classifier import IrisClassifier
+from src.models.tree_engine import CompiledForest
+
+
+def test_parity_with_served_model(classifier: IrisClassifier):
+    """Probabilities must be bit-identical to sklearn's on the real model."""
+    engine = CompiledForest.from_sklearn(classifier.model)
+    X = np.random.default_rng(0).uniform(0, 8, size=(2000, 4))
+
+    np.testing.assert_array_equal(
+        engine.predict_proba(X), classifier.model.predict_proba(X)
+    )
+
+
+@pytest.mark.parametrize("forest_cls", [RandomForestClassifier, ExtraTreesClassifier])
+def test_parity_multiclass_with_missing_values(forest_cls):
+    """Deep trees, 4 classes and NaN inputs should all route like sklearn."""
+    X, y = make_classification(
+        n_samples=600, n_features=8, n_informative=5, n_classes=4, random_state=0
+    )
+    rng = np.random.default_rng(1)
+    X[rng.random(X.shape) < 0.05] = np.nan
+    forest = forest_cls(n_estimators=30, random_state=0).fit(X, y)
+
+    engine = CompiledForest.from_sklearn(forest)
+    np.testing.assert_array_equal(engine.predict_proba(X), forest.predict_proba(X))
+    np.testing.assert_array_equal(
+        engine.apply(X) - engine.roots[:, np.newaxis], forest.apply(X).T
+    )
+
+
+def test_single_row(classifier: IrisClassifier):
+    """A single row should come back as a (1, n_classes) matrix."""
+    engine = CompiledForest.from_sklearn(classifier.model)
+    X = np.array([[5.1, 3.5, 1.4, 0.2]])
+    proba = engine.predict_proba(X)
+    assert proba.shape == (1, 3)
+    np.testing.assert_array_equal(proba, classifier.model.predict_proba(X))
+
+
+def test_rejects_non_forest():
+    """Only fitted tree ensembles can be compiled."""
+    X, y = make_classification(n_samples=50, random_state=0)
+    with pytest.raises(TypeError, match="Can't compile"):
+        CompiledForest.from_sklearn(LogisticRegression().fit(X, y))
+    with pytest.raises(TypeError, match="Can't compile"):
+        CompiledForest.from_sklearn(RandomForestClassifier())
+
+
+def test_classifier_compiled_backend(
+    model_path, classifier: IrisClassifier, sample_features: dict[str, float]
+):
+    """IrisClassifier on the compiled backend should give the same answers."""
+    compiled = IrisClassifier(model_path, backend="compiled")
+    assert compiled.backend == "compiled"
+
+    expected = classifier.predict(sample_features)
+    result = compiled.predict(sample_features)
+    assert result["prediction"] == expected["prediction"]
+    assert result["confidence"] == expected["confidence"]
+
+
+def test_classifier_unknown_backend(model_path):
+    """Unknown backends should fail at load time, not on the first request."""
+    with pytest.raises(ValueError, match="Unknown backend"):
+        IrisClassifier(model_path, backend="tensorrt")
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""Score a dataset offline with the serving model.
+
+Loads the model exactly as the API does (the MLflow registry when
+MLFLOW_TRACKING_URI is set, otherwise models/model.pkl), splits the input
+into chunks and scores them on a process pool. Predictions and confidences
+are written to --output in input row order.
+
+Inputs are never read into memory whole:
+
+- .npy: memory-mapped. Workers slice their rows straight out of the file.
+  Columns must be in the model's feature order.
+- .parquet: read in batches by the main process, feature columns only.
+- .csv: read in chunks by the main process. Needs a header row naming the
+  features (any order, extra columns ignored).
+
+    python training/score.py --input data.npy --output scored.csv
+"""
+
+import argparse
+import csv
+import logging
+import os
+import sys
+import time
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+if not __package__:
+    # run as a script: training/ is on sys.path, the repo root isn't
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.models.iris_classifier import IrisClassifier  # noqa: E402
+from src.models.loader import load_model  # noqa: E402
+
+# one chunk of input: ("npy", path, start, stop), or ("array", X) for rows
+# the main process has already read
+Task = tuple[Any, ...]
+
+# model copy owned by a pool worker, set by _init_worker
+_worker_model: IrisClassifier | None = None
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Score a dataset offline")
+    parser.add_argument("--input", required=True, help=".npy, .csv or .parquet")
+    parser.add_argument("--output", required=True, help=".csv or .parquet")
+    parser.add_argument(
+        "--model", help="pickle to score with instead of the API's model"
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-rows", type=int, default=100_000)
+    return parser.parse_args()
+
+
+def _init_worker(model: IrisClassifier) -> None:
+    global _worker_model
+    _worker_model = model
+
+
+def _read_task(task: Task) -> np.ndarray:
+    if task[0] == "npy":
+        _, path, start, stop = task
+        X: np.ndarray = np.load(path, mmap_mode="r")[start:stop]
+        return X
+    return np.asarray(task[1])
+
+
+def _score_task(task: Task) -> tuple[np.ndarray, np.ndarray]:
+    """Predicted class index and confidence for every row in a chunk."""
+    if _worker_model is None:
+        raise RuntimeError("Worker has no model")
+    X = _read_task(task)
+    proba = _worker_model.predict_proba(X)
+    pred_idx = np.argmax(proba, axis=1)
+    return pred_idx, proba[np.arange(len(X)), pred_idx]
+
+
+def iter_tasks(path: Path, feature_names: list[str], chunk_rows: int) -> Iterator[Task]:
+    """Split an input file into chunks, reading as little as possible up front."""
+    suffix = path.suffix.lower()
+
+    if suffix == ".npy":
+        X = np.load(path, mmap_mode="r")
+        if X.ndim != 2 or X.shape[1] != len(feature_names):
+            raise ValueError(
+                f"{path} has shape {X.shape}, expected (rows, {len(feature_names)})"
+            )
+        for start in range(0, len(X), chunk_rows):
+            yield ("npy", str(path), start, min(start + chunk_rows, len(X)))
+
+    elif suffix == ".parquet":
+        import pyarrow.parquet as pq
+
+        parquet = pq.ParquetFile(path)
+        missing = set(feature_names) - set(parquet.schema_arrow.names)
+        if missing:
+            raise ValueError(f"{path} is missing columns {sorted(missing)}")
+        for batch in parquet.iter_batches(batch_size=chunk_rows, columns=feature_names):
+            yield (
+                "array",
+                np.column_stack(
+                    [batch.column(name).to_numpy() for name in feature_names]
+                ),
+            )
+
+    elif suffix == ".csv":
+        with open(path, newline="") as f:
+            reader = csv.reader(f)
+            header = [name.strip() for name in next(reader)]
+            missing = set(feature_names) - set(header)
+            if missing:
+                raise ValueError(f"{path} header is missing {sorted(missing)}")
+            columns = [header.index(name) for name in feature_names]
+
+            rows: list[list[float]] = []
+            for record in reader:
+                if record:
+                    rows.append([float(record[i]) for i in columns])
+                if len(rows) == chunk_rows:
+                    yield ("array", np.array(rows))
+                    rows = []
+            if rows:
+                yield ("array", np.array(rows))
+
+    else:
+        raise ValueError(f"Unsupported input type '{suffix}', use .npy/.csv/.parquet")
+
+
+class OutputWriter:
+    """Appends scored chunks to a .csv or .parquet file."""
+
+    def __init__(self, path: Path, target_names: list[str]):
+        self.path = path
+        self.target_names = np.asarray(target_names)
+        self.suffix = path.suffix.lower()
+        if self.suffix == ".csv":
+            self._file = open(path, "w", newline="")
+            self._csv = csv.writer(self._file)
+            self._csv.writerow(["prediction", "confidence"])
+        elif self.suffix == ".parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            schema = pa.schema(
+                [("prediction", pa.string()), ("confidence", pa.float64())]
+            )
+            self._parquet = pq.ParquetWriter(path, schema)
+        else:
+            raise ValueError(
+                f"Unsupported output type '{self.suffix}', use .csv/.parquet"
+            )
+
+    def write(self, pred_idx: np.ndarray, confidence: np.ndarray) -> None:
+        labels = self.target_names[pred_idx]
+        if self.suffix == ".csv":
+            self._csv.writerows(zip(labels.tolist(), confidence.tolist(), strict=True))
+        else:
+            import pyarrow as pa
+
+            self._parquet.write_table(
+                pa.table({"prediction": labels.tolist(), "confidence": confidence})
+            )
+
+    def close(self) -> None:
+        if self.suffix == ".csv":
+            self._file.close()
+        else:
+            self._parquet.close()
+
+
+def score_file(
+    model: IrisClassifier,
+    input_path: Path,
+    output_path: Path,
+    workers: int,
+    chunk_rows: int,
+) -> int:
+    """Score input_path into output_path and return the number of rows."""
+    tasks = iter_tasks(input_path, model.feature_names, chunk_rows)
+    writer = OutputWriter(output_path, model.target_names)
+    n_rows = 0
+
+    # a couple of chunks per worker in flight keeps the pool busy, while
+    # bounding how much of a CSV is held in memory at once
+    pending: deque[Future[tuple[np.ndarray, np.ndarray]]] = deque()
+    try:
+        with ProcessPoolExecutor(
+            workers, initializer=_init_worker, initargs=(model,)
+        ) as pool:
+            for task in tasks:
+                pending.append(pool.submit(_score_task, task))
+                if len(pending) >= 2 * workers:
+                    n_rows += _write(writer, pending.popleft())
+            while pending:
+                n_rows += _write(writer, pending.popleft())
+    finally:
+        writer.close()
+    return n_rows
+
+
+def _write(writer: OutputWriter, future: Future[tuple[np.ndarray, np.ndarray]]) -> int:
+    pred_idx, confidence = future.result()
+    writer.write(pred_idx, confidence)
+    return len(pred_idx)
+
+
+def main() -> None:
+    args = parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    model: IrisClassifier | None
+    if args.model:
+        model = IrisClassifier(
+            args.model, backend=os.environ.get("MODEL_BACKEND", "sklearn")
+        )
+    else:
+        model = load_model()
+    if model is None:
+        sys.exit("No model found - set MLFLOW_TRACKING_URI or train one first")
+
+    start = time.perf_counter()
+    n_rows = score_file(
+        model, Path(args.input), Path(args.output), args.workers, args.chunk_rows
+    )
+    elapsed = time.perf_counter() - start
+    print(
+        f"Scored {n_rows} rows with model {model.version} in {elapsed:.2f}s "
+        f"({n_rows / elapsed:,.0f} rows/s) -> {args.output}"
+    )
+
+
+if __name__ == "__main__":
+    main()
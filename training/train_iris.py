@@ -1,16 +1,94 @@
 #!/usr/bin/env python3
-"""Train an Iris classifier and save it."""
+"""Train an Iris classifier and save it.
+
+Besides models/model.pkl and the MLflow model, the classifier is exported
+to ONNX (models/model.onnx, and a model.onnx artifact on the run) for the
+serving API's onnx backend. That needs skl2onnx and onnxruntime, which
+aren't core dependencies (pip install .[onnx]). Without them the export is
+skipped with a warning; --no-onnx skips it quietly.
+
+--search trains many candidates instead of the one given by --n-estimators
+and --max-depth. Each candidate is cross-validated on the training split in
+a process pool and logged as a nested MLflow run under the search's run.
+The best one by mean CV accuracy is then trained, evaluated and registered
+exactly like a single run, so only it becomes a registry version.
+
+    python training/train_iris.py --search grid \
+        --space n_estimators=50,100,200 --space max_depth=3,5,8,none
+    python training/train_iris.py --search random --trials 20 --workers 8
+
+Every model is also measured for what it would cost to serve: single-row
+and batch predict_proba latency, pickled size and memory once loaded. With
+a budget (--max-latency-ms, --max-batch-latency-ms, --max-size-mb,
+--max-memory-mb), a search only picks among candidates within it, and a
+final model over budget is not saved or registered. Among candidates
+within --accuracy-tolerance of the best CV accuracy, the search picks the
+one with the fastest single-row latency.
+
+Next to models/model.pkl, the forest is also saved as a model bundle
+(models/bundle, see src/models/bundle.py): a JSON manifest and flat NumPy
+node tables, which the API serves with MODEL_BACKEND=compiled without
+unpickling anything.
+
+A reference profile of the training data (models/reference.json, and a
+reference.json artifact on the run) is saved with the model. The serving
+API's drift monitor compares live traffic with it, see
+src/monitoring/drift.py for what it holds.
+"""
 
 import argparse
+import importlib.util
+import json
 import os
 import pickle
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Any
 
 import mlflow
+import numpy as np
 from sklearn.datasets import load_iris
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import accuracy_score, classification_report
-from sklearn.model_selection import train_test_split
+from sklearn.model_selection import (
+    ParameterGrid,
+    ParameterSampler,
+    cross_val_predict,
+    cross_val_score,
+    train_test_split,
+)
+
+if not __package__:
+    # run as a script: training/ is on sys.path, the repo root isn't
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.models.bundle import save_bundle  # noqa: E402
+from src.models.tree_engine import CompiledForest  # noqa: E402
+
+# searched when --search is given without --space
+DEFAULT_SPACE: dict[str, list[Any]] = {
+    "n_estimators": [25, 50, 100, 200],
+    "max_depth": [2, 3, 5, 8, None],
+    "min_samples_leaf": [1, 2, 5],
+}
+
+# rows per call for the batch latency, and calls timed for each latency
+COST_BATCH_ROWS = 100
+COST_CALLS = {"latency_single_ms": 50, "latency_batch_ms": 10}
+
+# cost metric -> CLI option that caps it, see budget()
+BUDGET_OPTIONS = {
+    "latency_single_ms": "max_latency_ms",
+    "latency_batch_ms": "max_batch_latency_ms",
+    "model_size_bytes": "max_size_mb",
+    "memory_bytes": "max_memory_mb",
+}
 
 
 def parse_args():
@@ -22,9 +100,343 @@ def parse_args():
     parser.add_argument(
         "--no-save", action="store_true", help="skip saving model to disk"
     )
+    parser.add_argument("--no-onnx", action="store_true", help="skip the ONNX export")
+    parser.add_argument(
+        "--search",
+        choices=["grid", "random"],
+        help="search a parameter space instead of training one model",
+    )
+    parser.add_argument(
+        "--space",
+        action="append",
+        metavar="NAME=V1,V2,...",
+        help="RandomForestClassifier parameter values to search, repeatable",
+    )
+    parser.add_argument(
+        "--trials", type=int, default=20, help="candidates for --search random"
+    )
+    parser.add_argument("--cv", type=int, default=5, help="cross-validation folds")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="processes to run search trials on",
+    )
+    parser.add_argument(
+        "--max-latency-ms", type=float, help="budget for single-row predict latency"
+    )
+    parser.add_argument(
+        "--max-batch-latency-ms",
+        type=float,
+        help=f"budget for {COST_BATCH_ROWS}-row predict latency",
+    )
+    parser.add_argument("--max-size-mb", type=float, help="budget for pickled size")
+    parser.add_argument(
+        "--max-memory-mb", type=float, help="budget for memory once loaded"
+    )
+    parser.add_argument(
+        "--accuracy-tolerance",
+        type=float,
+        default=0.0,
+        help="CV accuracy a search may give up for a faster model",
+    )
     return parser.parse_args()
 
 
+def measure_cost(model: Any, X: np.ndarray) -> dict[str, float]:
+    """What a fitted model costs to serve.
+
+    Latencies are medians of predict_proba calls on rows from X, after a
+    few untimed calls. Memory is what unpickling the model allocates,
+    which is what a serving process pays to load it.
+    """
+    rng = np.random.default_rng(0)
+    batches = {
+        "latency_single_ms": X[rng.integers(len(X), size=1)],
+        "latency_batch_ms": X[rng.integers(len(X), size=COST_BATCH_ROWS)],
+    }
+    cost = {}
+    for metric, batch in batches.items():
+        for _ in range(3):
+            model.predict_proba(batch)
+        timings = []
+        for _ in range(COST_CALLS[metric]):
+            start = time.perf_counter()
+            model.predict_proba(batch)
+            timings.append(time.perf_counter() - start)
+        cost[metric] = statistics.median(timings) * 1000
+
+    blob = pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)
+    cost["model_size_bytes"] = len(blob)
+    cost["memory_bytes"] = loaded_bytes(blob)
+    return cost
+
+
+def loaded_bytes(blob: bytes) -> int:
+    """Memory held by a pickled model once it's loaded."""
+    tracemalloc.start()
+    try:
+        model = pickle.loads(blob)
+        traced = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    # sklearn's tree code mallocs the node and value tables itself, out of
+    # tracemalloc's sight, so add their size separately
+    for estimator in getattr(model, "estimators_", [model]):
+        tree = getattr(estimator, "tree_", None)
+        if tree is not None:
+            state = tree.__getstate__()
+            traced += state["nodes"].nbytes + state["values"].nbytes
+    return traced
+
+
+def budget(args: argparse.Namespace) -> dict[str, float]:
+    """Cost metric -> largest allowed value, for every limit that's set."""
+    limits = {}
+    for metric, option in BUDGET_OPTIONS.items():
+        value = getattr(args, option)
+        if value is not None:
+            # sizes are given in MB, measured in bytes
+            limits[metric] = value * 1e6 if metric.endswith("_bytes") else value
+    return limits
+
+
+def over_budget(cost: dict[str, float], limits: dict[str, float]) -> list[str]:
+    """Which limits the cost breaks, as printable lines."""
+    return [
+        f"{metric} {cost[metric]:,.3f} > {limit:,.3f}"
+        for metric, limit in limits.items()
+        if cost[metric] > limit
+    ]
+
+
+def parse_space(specs: list[str]) -> dict[str, list[Any]]:
+    """--space NAME=V1,V2,... arguments as a parameter grid.
+
+    Values are read as int, then float, and "none" is None. Anything else
+    stays a string, e.g. max_features=sqrt,log2.
+    """
+    space = {}
+    for spec in specs:
+        name, sep, values = spec.partition("=")
+        if not sep or not values:
+            raise ValueError(f"Expected NAME=V1,V2,... but got '{spec}'")
+        space[name.strip().replace("-", "_")] = [
+            _parse_value(v.strip()) for v in values.split(",")
+        ]
+    return space
+
+
+def _parse_value(text: str) -> Any:
+    if text.lower() == "none":
+        return None
+    for kind in (int, float):
+        try:
+            return kind(text)
+        except ValueError:
+            pass
+    return text
+
+
+def candidates(
+    space: dict[str, list[Any]], search: str, trials: int, random_state: int
+) -> list[dict[str, Any]]:
+    """Every combination for a grid search, or `trials` sampled ones."""
+    if search == "grid":
+        return list(ParameterGrid(space))
+    n_combinations = len(ParameterGrid(space))
+    return list(
+        ParameterSampler(
+            space, n_iter=min(trials, n_combinations), random_state=random_state
+        )
+    )
+
+
+def run_trial(
+    params: dict[str, Any], X: np.ndarray, y: np.ndarray, cv: int, random_state: int
+) -> dict[str, float]:
+    """Cross-validate one candidate and measure its cost.
+
+    Runs in a search worker process. The cost is measured on a model fit
+    on all of X, the same way the final model will be trained.
+    """
+    # one core per trial: the pool already keeps every core busy
+    model = RandomForestClassifier(**params, random_state=random_state, n_jobs=1)
+    scores = cross_val_score(model, X, y, cv=cv)
+    return {
+        "cv_accuracy": float(scores.mean()),
+        "cv_accuracy_std": float(scores.std()),
+        **measure_cost(model.fit(X, y), X),
+    }
+
+
+def run_search(
+    trials: list[dict[str, Any]],
+    X: np.ndarray,
+    y: np.ndarray,
+    cv: int,
+    random_state: int,
+    workers: int,
+) -> list[dict[str, float]]:
+    """Metrics for each trial, in the order given."""
+    with ProcessPoolExecutor(min(workers, len(trials))) as pool:
+        futures = [
+            pool.submit(run_trial, params, X, y, cv, random_state) for params in trials
+        ]
+        return [future.result() for future in futures]
+
+
+def best_trial(
+    results: list[dict[str, float]],
+    limits: dict[str, float] | None = None,
+    tolerance: float = 0.0,
+) -> int | None:
+    """Index of the trial to register, or None if none is within budget.
+
+    Of the trials within budget, those within `tolerance` of the highest
+    mean CV accuracy are candidates. The fastest single-row one wins.
+    """
+    eligible = [i for i, r in enumerate(results) if not over_budget(r, limits or {})]
+    if not eligible:
+        return None
+    top = max(results[i]["cv_accuracy"] for i in eligible)
+    return min(
+        (i for i in eligible if results[i]["cv_accuracy"] >= top - tolerance),
+        key=lambda i: (results[i]["latency_single_ms"], -results[i]["cv_accuracy"]),
+    )
+
+
+def search(args: argparse.Namespace, X: np.ndarray, y: np.ndarray) -> dict[str, Any]:
+    """Run the search, log each trial as a nested run and return the best params."""
+    space = parse_space(args.space) if args.space else DEFAULT_SPACE
+    trials = candidates(space, args.search, args.trials, args.random_state)
+    print(
+        f"Searching {len(trials)} candidates ({args.search}, {args.cv}-fold CV, "
+        f"{args.workers} workers)"
+    )
+    results = run_search(trials, X, y, args.cv, args.random_state, args.workers)
+    limits = budget(args)
+
+    for i, (params, metrics) in enumerate(zip(trials, results, strict=True)):
+        within = not over_budget(metrics, limits)
+        with mlflow.start_run(run_name=f"trial-{i}", nested=True):
+            mlflow.log_params(params)
+            mlflow.log_metrics(metrics)
+            mlflow.set_tag("within_budget", str(within).lower())
+        print(
+            f"  {params}: {metrics['cv_accuracy']:.4f} "
+            f"+/- {metrics['cv_accuracy_std']:.4f}, "
+            f"{metrics['latency_single_ms']:.2f} ms/row, "
+            f"{metrics['memory_bytes'] / 1e6:.2f} MB"
+            + ("" if within else " (over budget)")
+        )
+
+    mlflow.log_params(
+        {"search": args.search, "search_trials": len(trials), "cv": args.cv}
+    )
+    best = best_trial(results, limits, args.accuracy_tolerance)
+    if best is None:
+        raise SystemExit("No candidate is within budget, nothing registered")
+    mlflow.log_metrics(
+        {
+            "cv_accuracy": results[best]["cv_accuracy"],
+            "cv_accuracy_std": results[best]["cv_accuracy_std"],
+        }
+    )
+    print(f"Best: {trials[best]}\n")
+    return trials[best]
+
+
+def reference_profile(
+    X: np.ndarray,
+    proba: np.ndarray,
+    feature_names: list[str],
+    target_names: list[str],
+    bins: int = 10,
+) -> dict[str, Any]:
+    """Training-data profile for the serving drift monitor.
+
+    Histograms have edges at the deciles of the data and the share of rows
+    in each bin. A value goes in bin i when i edges are <= it, the same
+    rule the drift monitor applies to live traffic. proba should be out
+    of sample, so its confidences look like the ones served.
+    """
+    quantiles = np.linspace(0.0, 1.0, bins + 1)[1:-1]
+
+    def histogram(values: np.ndarray) -> dict[str, list[float]]:
+        edges = np.unique(np.quantile(values, quantiles))
+        counts = np.bincount(
+            np.searchsorted(edges, values, side="right"), minlength=len(edges) + 1
+        )
+        return {"edges": edges.tolist(), "fractions": (counts / len(values)).tolist()}
+
+    predicted = proba.argmax(axis=1)
+    return {
+        "rows": len(X),
+        "features": {
+            name: {
+                **histogram(X[:, i]),
+                "mean": float(X[:, i].mean()),
+                "std": float(X[:, i].std()),
+            }
+            for i, name in enumerate(feature_names)
+        },
+        "confidence": histogram(proba.max(axis=1)),
+        "predicted_class": {
+            name: float(np.mean(predicted == i)) for i, name in enumerate(target_names)
+        },
+    }
+
+
+# largest probability difference the exported model may show against
+# sklearn; ONNX Runtime computes in float32
+ONNX_PARITY_ATOL = 1e-5
+
+
+def onnx_available() -> bool:
+    """Whether the optional ONNX export dependencies are installed."""
+    return all(
+        importlib.util.find_spec(name) is not None
+        for name in ("onnxruntime", "skl2onnx")
+    )
+
+
+def export_onnx(model: Any, X_check: np.ndarray, path: Path) -> float:
+    """Write model as ONNX to path and check it against sklearn.
+
+    Returns the largest probability difference on X_check, and raises
+    if it's over ONNX_PARITY_ATOL or any predicted class differs.
+    """
+    try:
+        import onnxruntime
+        from skl2onnx import to_onnx
+    except ImportError as e:
+        raise SystemExit(
+            "ONNX export needs skl2onnx and onnxruntime: pip install .[onnx], "
+            "or pass --no-onnx"
+        ) from e
+
+    # zipmap off: plain probability matrix instead of one dict per row
+    onx = to_onnx(
+        model,
+        X_check[:1].astype(np.float32),
+        options={id(model): {"zipmap": False}},
+    )
+    path.write_bytes(onx.SerializeToString())
+
+    session = onnxruntime.InferenceSession(
+        str(path), providers=["CPUExecutionProvider"]
+    )
+    proba = session.run(
+        ["probabilities"], {session.get_inputs()[0].name: X_check.astype(np.float32)}
+    )[0]
+    expected = model.predict_proba(X_check)
+    diff = float(np.max(np.abs(proba - expected)))
+    if diff > ONNX_PARITY_ATOL or (proba.argmax(1) != expected.argmax(1)).any():
+        raise SystemExit(f"ONNX export differs from sklearn by up to {diff:.3g}")
+    return diff
+
+
 def main():
     args = parse_args()
 
@@ -39,13 +451,6 @@ def main():
         X, y, test_size=args.test_size, random_state=args.random_state
     )
 
-    # model params
-    params = {
-        "n_estimators": args.n_estimators,
-        "max_depth": args.max_depth,
-        "random_state": args.random_state,
-    }
-
     # MLflow 3 removed the implicit ./mlruns file-store fallback and raises
     # instead. Default to a local sqlite backend so this runs out of the box;
     # point at a real tracking server by setting MLFLOW_TRACKING_URI.
@@ -56,6 +461,13 @@ def main():
     mlflow.set_experiment("iris-classifier")
 
     with mlflow.start_run():
+        # model params, from the CLI or the best search candidate
+        if args.search:
+            params = search(args, X_train, y_train)
+        else:
+            params = {"n_estimators": args.n_estimators, "max_depth": args.max_depth}
+        params["random_state"] = args.random_state
+
         # log params
         mlflow.log_params(params)
         mlflow.log_param("test_size", args.test_size)
@@ -75,17 +487,83 @@ def main():
         # log metrics
         mlflow.log_metric("accuracy", accuracy)
 
+        # serving cost, measured here rather than in a busy search worker;
+        # a model over budget stops here, before it's saved or registered
+        cost = measure_cost(model, X_train)
+        mlflow.log_metrics(cost)
+        print(
+            f"Cost: {cost['latency_single_ms']:.2f} ms/row, "
+            f"{cost['latency_batch_ms']:.2f} ms/{COST_BATCH_ROWS} rows, "
+            f"{cost['model_size_bytes'] / 1e6:.2f} MB pickled, "
+            f"{cost['memory_bytes'] / 1e6:.2f} MB loaded"
+        )
+        problems = over_budget(cost, budget(args))
+        if problems:
+            raise SystemExit("Over budget, not registered: " + "; ".join(problems))
+
+        model_dir = Path(__file__).parent.parent / "models"
+
+        # drift reference, with out-of-fold predictions from the same params
+        oof_proba = cross_val_predict(
+            RandomForestClassifier(**params),
+            X_train,
+            y_train,
+            cv=args.cv,
+            method="predict_proba",
+        )
+        reference = reference_profile(
+            X_train, oof_proba, list(feature_names), list(target_names)
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            reference_path = Path(tmp) / "reference.json"
+            reference_path.write_text(json.dumps(reference, indent=2))
+            mlflow.log_artifact(str(reference_path))
+            if not args.no_save:
+                model_dir.mkdir(exist_ok=True)
+                (model_dir / "reference.json").write_text(reference_path.read_text())
+
+        # export for the onnx serving backend, checked on the held-out rows
+        # and on random ones across the whole feature range
+        export = not args.no_onnx and onnx_available()
+        if not args.no_onnx and not export:
+            print(
+                "Warning: skl2onnx/onnxruntime not installed, skipping the ONNX "
+                "export (pip install .[onnx])",
+                file=sys.stderr,
+            )
+        if not export and not args.no_save:
+            # an export left by an earlier run belongs to another model
+            (model_dir / "model.onnx").unlink(missing_ok=True)
+        if export:
+            X_check = np.vstack(
+                [
+                    X_test,
+                    np.random.default_rng(args.random_state).uniform(
+                        0.0, 8.0, size=(1000, X.shape[1])
+                    ),
+                ]
+            )
+            with tempfile.TemporaryDirectory() as tmp:
+                onnx_path = Path(tmp) / "model.onnx"
+                diff = export_onnx(model, X_check, onnx_path)
+                mlflow.log_metric("onnx_max_proba_diff", diff)
+                mlflow.log_artifact(str(onnx_path))
+                if not args.no_save:
+                    model_dir.mkdir(exist_ok=True)
+                    (model_dir / "model.onnx").write_bytes(onnx_path.read_bytes())
+            print(f"ONNX export matches sklearn (max probability diff {diff:.2g})")
+
         # save model to disk
         if not args.no_save:
-            model_dir = Path(__file__).parent.parent / "models"
             model_dir.mkdir(exist_ok=True)
             model_path = model_dir / "model.pkl"
 
+            version = "1.0.0"
             model_info = {
                 "model": model,
                 "feature_names": feature_names,
                 "target_names": target_names,
-                "version": "1.0.0",
+                "version": version,
             }
 
             with open(model_path, "wb") as f:
@@ -93,6 +571,18 @@ def main():
 
             print(f"\nModel saved to {model_path}")
 
+            bundle_dir = model_dir / "bundle"
+            shutil.rmtree(bundle_dir, ignore_errors=True)
+            save_bundle(
+                bundle_dir,
+                CompiledForest.from_sklearn(model),
+                list(feature_names),
+                list(target_names),
+                version,
+                reference,
+            )
+            print(f"Model bundle saved to {bundle_dir}")
+
         # log metadata tags the API needs to reconstruct feature/target names
         mlflow.set_tag("feature_names", ",".join(feature_names))
         mlflow.set_tag("target_names", ",".join(target_names))